@@ -0,0 +1,329 @@
+"""
+Benchmark CLI
+
+Performance checks for the optimized code paths.
+'repair' runs locally on instance files, 'transfer' needs no input and
+'ingest' needs the database. That the repair backends give identical
+solutions is checked by tests/test_repair_parity.py.
+
+Usage:
+    python cli/benchmark.py repair --instances mscp41 mscpnrg1
+    python cli/benchmark.py repair --instances mscp41 --population 40 --seeds 5
+    python cli/benchmark.py transfer --lb -10 --ub 10 --dimension 10000
+    python cli/benchmark.py ingest --rows 10000
+"""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.problems.util import read_instance as Instance
+from src.core.problems.repair import ReparaStrategy as repara
+from src.core.problems.repair import kernels
+from src.core.discretization import DiscretizationScheme as DS
+
+
+INSTANCE_DIR = os.path.join(os.path.dirname(__file__), '..', 'instances', 'MSCP')
+
+# Fraction of active columns in the random populations: from mostly feasible
+# (drop phase does the work) to almost empty (add phase does the work)
+DENSITIES = [0.9, 0.05, 0.005]
+
+
+def load_instance(name, instance_dir):
+    """Read an SCP instance file and return (coverage CSR, cost vector)."""
+    path = os.path.join(instance_dir, name if name.endswith('.txt') else f'{name}.txt')
+    instance = Instance.Read(path)
+    return instance.get_r(), np.array(instance.get_c())
+
+
+def run_repair(strategy, population, repair_type, seed):
+    """Repair a population with a fixed RNG stream; returns (solutions, repairs, seconds)."""
+    np.random.seed(seed)
+    start = time.perf_counter()
+    coverage, infeasible = strategy.cumplePoblacion(population)
+    solutions, repairs = strategy.reparaPoblacion(population, infeasible, repair_type, coverage)
+    return solutions, repairs, time.perf_counter() - start
+
+
+def repair(args):
+    """
+    Time the NumPy and Numba repair backends.
+
+    For every instance, repair type and population density, both backends
+    repair the same populations with the same seeds.
+    """
+    if not kernels.NUMBA_DISPONIBLE:
+        print("Numba is not installed: only the NumPy backend is available")
+        return 1
+
+    for name in args.instances:
+        matrix, costs = load_instance(name, args.instance_dir)
+        rows, cols = matrix.shape
+        backends = {
+            backend: repara.ReparaStrategy(matrix, costs, rows, cols, backend=backend)
+            for backend in kernels.BACKENDS
+        }
+        # Compile the kernels before timing
+        warmup = np.zeros((1, cols))
+        for repair_type in args.repair_types:
+            run_repair(backends['numba'], warmup, repair_type, 0)
+
+        print(f"\n{name} ({rows} rows x {cols} columns)")
+        print(f"{'repair':>6} {'density':>8} {'cost':>12} {'numpy s':>9} {'numba s':>9} {'speedup':>8}")
+        for repair_type in args.repair_types:
+            for density in DENSITIES:
+                times = {backend: 0.0 for backend in backends}
+                for seed in range(args.seeds):
+                    rng = np.random.default_rng(seed)
+                    population = (rng.random((args.population, cols)) < density).astype(np.float64)
+                    for backend, strategy in backends.items():
+                        solutions, _, seconds = run_repair(strategy, population, repair_type, seed)
+                        times[backend] += seconds
+                cost = float(np.mean(solutions @ costs))
+                print(f"{repair_type:>6} {density:>8} {cost:>12.2f} "
+                      f"{times['numpy']:>9.3f} {times['numba']:>9.3f} "
+                      f"{times['numpy'] / max(times['numba'], 1e-9):>7.1f}x")
+    return 0
+
+
+def best_time(function, repeat):
+    """Best wall time of repeat calls to function."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def transfer(args):
+    """
+    Compare the exact transfer functions with their lookup tables.
+    
+    The error is measured on a grid 16 times finer than the table over
+    [lb, ub]. Times are for one population: the transfer function alone and
+    binariza() with the Standard operator, exact vs table.
+    """
+    rng = np.random.default_rng(0)
+    population = rng.uniform(args.lb, args.ub, (args.population, args.dimension))
+    binary = rng.integers(0, 2, population.shape)
+    ranking = np.arange(args.population)
+    grid = np.linspace(args.lb, args.ub, 16 * args.points + 1)
+    limits = (args.lb, args.ub)
+    
+    print(f"{'tf':>4} {'max error':>10} {'exact s':>9} {'table s':>9} {'speedup':>8} "
+          f"{'binariza':>9} {'speedup':>8}")
+    with np.errstate(invalid='ignore'):
+        for name in DS.TRANSFERENCIAS:
+            table = DS.obtenerTabla(name, args.lb, args.ub, args.points)
+            exact = DS.TRANSFERENCIAS[name](grid, np.empty(grid.shape))
+            approx = table.evaluar(grid, np.empty(grid.shape), np.empty(grid.shape),
+                                   np.empty(grid.shape, dtype=np.intp))
+            finite = np.isfinite(exact)
+            error = float(np.max(np.abs(exact[finite] - approx[finite]))) if finite.any() else 0.0
+            
+            out = np.empty(population.shape)
+            aux = np.empty(population.shape)
+            indices = np.empty(population.shape, dtype=np.intp)
+            exact_time = best_time(lambda: DS.TRANSFERENCIAS[name](population, out), args.repeat)
+            table_time = best_time(lambda: table.evaluar(population, out, aux, indices), args.repeat)
+            
+            def binariza(limites):
+                DS.DiscretizationScheme(population, binary, ranking, name, 'Standard', limites).binariza()
+            bin_exact = best_time(lambda: binariza(None), args.repeat)
+            bin_table = best_time(lambda: binariza(limits), args.repeat)
+            print(f"{name:>4} {error:>10.2e} {exact_time:>9.4f} {table_time:>9.4f} "
+                  f"{exact_time / table_time:>7.1f}x {bin_table:>9.4f} {bin_exact / bin_table:>7.1f}x")
+    return 0
+
+
+def ingest(args):
+    """
+    Compare rows/sec of the INSERT and COPY paths for datos_iteracion.
+
+    Needs the database in config/database.ini. Rows are written for a
+    temporary experiment that is deleted at the end.
+    """
+    from sqlalchemy import text
+    from src.database import DatabaseManager
+
+    db = DatabaseManager()
+    with db.engine.begin() as connection:
+        exp_id = connection.execute(text("""
+            INSERT INTO datos_ejecucion (nombre_algoritmo, parametros, estado)
+            VALUES ('benchmark_ingest', '{}', 'benchmark') RETURNING id;
+        """)).scalar()
+
+    # Same shape as the records written by the SCP solvers
+    rows = [{
+        "id_ejecucion": exp_id,
+        "numero_iteracion": i,
+        "fitness_mejor": str(500.0 - i * 1e-3),
+        "parametros_iteracion": json.dumps({
+            "fitness": str(500.0 - i * 1e-3),
+            "clockTime": 0.012345,
+            "processTime": 0.012001,
+            "DS": "V4,Elitist",
+            "Diversidades": str(list(np.random.random(7))),
+            "PorcentajeExplor": str(list(np.random.random(2))),
+            "numReparaciones": "17"
+        })
+    } for i in range(args.rows)]
+
+    def count_rows(connection):
+        return connection.execute(
+            text("SELECT COUNT(*) FROM datos_iteracion WHERE id_ejecucion = :id"), {"id": exp_id}
+        ).scalar()
+
+    try:
+        print(f"{'method':>8} {'batch':>7} {'rows/s':>12} {'seconds':>9}")
+        for method in ('insert', 'copy'):
+            best = None
+            for _ in range(args.repeat):
+                with db.engine.begin() as connection:
+                    connection.execute(text("DELETE FROM datos_iteracion WHERE id_ejecucion = :id"), {"id": exp_id})
+                start = time.perf_counter()
+                try:
+                    for k in range(0, len(rows), args.batch):
+                        db.insert_iteration_data(rows[k:k + args.batch], method=method)
+                except RuntimeError as e:
+                    print(f"{method}: {e}")
+                    return 1
+                elapsed = time.perf_counter() - start
+                with db.engine.connect() as connection:
+                    written = count_rows(connection)
+                if written != len(rows):
+                    print(f"{method}: wrote {written} of {len(rows)} rows")
+                    return 1
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{method:>8} {args.batch:>7} {len(rows) / best:>12.0f} {best:>9.3f}")
+    finally:
+        with db.engine.begin() as connection:
+            connection.execute(text("DELETE FROM datos_iteracion WHERE id_ejecucion = :id"), {"id": exp_id})
+            connection.execute(text("DELETE FROM datos_ejecucion WHERE id = :id"), {"id": exp_id})
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks and consistency checks for optimized code paths'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    repair_parser = subparsers.add_parser(
+        'repair',
+        help='Time the NumPy and Numba SCP repair backends'
+    )
+    repair_parser.add_argument(
+        '--instances',
+        nargs='+',
+        default=['mscp41'],
+        help='Instance names in the instance directory (default: mscp41)'
+    )
+    repair_parser.add_argument(
+        '--instance-dir',
+        default=INSTANCE_DIR,
+        help='Directory with the instance files (default: instances/MSCP)'
+    )
+    repair_parser.add_argument(
+        '--repair-types',
+        type=int,
+        nargs='+',
+        default=[1, 2, 3],
+        help='Repair types to check (default: 1 2 3)'
+    )
+    repair_parser.add_argument(
+        '--population',
+        type=int,
+        default=40,
+        help='Population size (default: 40)'
+    )
+    repair_parser.add_argument(
+        '--seeds',
+        type=int,
+        default=3,
+        help='Number of seeds per case (default: 3)'
+    )
+    repair_parser.set_defaults(func=repair)
+
+    transfer_parser = subparsers.add_parser(
+        'transfer',
+        help='Error and speedup of the transfer function lookup tables'
+    )
+    transfer_parser.add_argument(
+        '--lb',
+        type=float,
+        default=-10,
+        help='Lower bound of the continuous population (default: -10)'
+    )
+    transfer_parser.add_argument(
+        '--ub',
+        type=float,
+        default=10,
+        help='Upper bound of the continuous population (default: 10)'
+    )
+    transfer_parser.add_argument(
+        '--points',
+        type=int,
+        default=DS.PUNTOS_TABLA,
+        help=f'Points per table (default: {DS.PUNTOS_TABLA})'
+    )
+    transfer_parser.add_argument(
+        '--population',
+        type=int,
+        default=40,
+        help='Population size (default: 40)'
+    )
+    transfer_parser.add_argument(
+        '--dimension',
+        type=int,
+        default=10000,
+        help='Dimensions per individual (default: 10000)'
+    )
+    transfer_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Repetitions per measurement, the best one is reported (default: 5)'
+    )
+    transfer_parser.set_defaults(func=transfer)
+
+    ingest_parser = subparsers.add_parser(
+        'ingest',
+        help='Compare rows/sec of INSERT and COPY for datos_iteracion (needs the database)'
+    )
+    ingest_parser.add_argument(
+        '--rows',
+        type=int,
+        default=10000,
+        help='Iteration rows to write (default: 10000)'
+    )
+    ingest_parser.add_argument(
+        '--batch',
+        type=int,
+        default=500,
+        help='Rows per call, as the iteration writer batches them (default: 500)'
+    )
+    ingest_parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Repetitions per method, the best one is reported (default: 3)'
+    )
+    ingest_parser.set_defaults(func=ingest)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,21 +7,36 @@ para consultas rapidas y generacion de graficos.
 Fase 1: Procesa datos a nivel de experimento (rapido)
 Fase 2: Procesa datos a nivel de iteracion (opcional, mas lento)
 
+Los experimentos ejecutados con worker.py --telemetry blob/both se leen
+desde telemetria_ejecucion (sql/create_telemetria_ejecucion.sql), en ambas fases.
+
 Uso:
     python post_processor.py --f-1
     python post_processor.py --f-1 --limite 1000
+    python post_processor.py --f-1 --workers 4
+    python post_processor.py --f-2
+    python post_processor.py --f-1 --f-2
+    python post_processor.py --f-1 --incremental
+    python post_processor.py --f-1 --f-2 --daemon --intervalo 120
 """
 
 import argparse
+import multiprocessing
 import sys
 import os
 import json
-from datetime import datetime
+import signal
+import time
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.database import DatabaseManager
+from src.database import DatabaseManager, decode_telemetry
 import sqlalchemy as db
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -105,67 +120,93 @@ def parsear_parametros(params_json):
         return None
 
 
-def procesar_fase_1(db_manager, limite=None):
+# Columnas de resultados_normalizados que escribe la fase 1
+COLUMNAS_NORMALIZADOS = (
+    'id_ejecucion', 'algoritmo_mh', 'algoritmo_ml', 'problema', 'instancia',
+    'poblacion', 'iteraciones_totales', 'discretization_scheme', 'reward_type',
+    'fitness_final', 'tiempo_ejecucion_segundos',
+    'diversidad_0_promedio', 'diversidad_1_promedio', 'diversidad_2_promedio',
+    'diversidad_3_promedio', 'diversidad_4_promedio', 'diversidad_5_promedio'
+)
+
+# Marca de la fase 1 incremental antes de la primera ejecucion
+MARCA_INICIAL = datetime(1970, 1, 1)
+
+# Filas de datos_iteracion leidas por cada fetchmany del cursor
+FILAS_POR_LECTURA = 20000
+
+NUM_DIVERSIDADES = 6
+
+# Experimentos de telemetria_ejecucion leidos por vez en la fase 2
+EXPERIMENTOS_POR_LECTURA = 50
+
+
+def procesar_fase_1(db_manager, limite=None, workers=1, lote=500, incremental=False, margen=60):
     """
     Fase 1: Procesa experimentos terminados y crea registros normalizados.
     Incluye calculo de promedios de las 6 medidas de diversidad.
     
+    Los experimentos se procesan por lotes: una consulta para sus parametros y
+    resultados, una consulta en streaming para todas sus iteraciones (promedios
+    calculados con NumPy) y un insert masivo. Con workers > 1 los lotes se
+    reparten entre procesos.
+    
+    Por defecto se buscan todos los terminados que no estan en
+    resultados_normalizados. En modo incremental solo se leen los terminados
+    despues de la marca (fin, id) guardada en estado_postproceso, que avanza
+    con cada lote insertado. Solo se toman los terminados hace mas de 'margen'
+    segundos, para no saltarse uno que se confirme tarde o cuyo worker tenga el
+    reloj atrasado. Los inserts ignoran experimentos ya normalizados, por lo
+    que repetir un lote no tiene efecto.
+    
     Args:
         db_manager: Instancia de DatabaseManager
         limite: Numero maximo de experimentos a procesar (None = todos)
+        workers: Numero de procesos que procesan lotes en paralelo
+        lote: Numero de experimentos por lote
+        incremental: Usar la marca de agua en vez de buscar todos los pendientes
+        margen: Modo incremental: segundos desde el termino antes de procesar
     """
     print("\n=== FASE 1: Procesando experimentos terminados ===")
     print("Calculando promedios de las 6 medidas de diversidad...\n")
     
     try:
-        connection = db_manager.engine.connect()
-        metadata = db.MetaData()
-        
-        datos_ejecucion = db.Table(
-            'datos_ejecucion',
-            metadata,
-            autoload=True,
-            autoload_with=db_manager.engine
-        )
-        
-        resultado_ejecucion = db.Table(
-            'resultado_ejecucion',
-            metadata,
-            autoload=True,
-            autoload_with=db_manager.engine
-        )
-        
-        datos_iteracion = db.Table(
-            'datos_iteracion',
-            metadata,
-            autoload=True,
-            autoload_with=db_manager.engine
-        )
-        
-        resultados_normalizados = db.Table(
-            'resultados_normalizados',
-            metadata,
-            autoload=True,
-            autoload_with=db_manager.engine
-        )
-        
-        # Obtener experimentos terminados que no han sido procesados
-        query = db.text("""
-            SELECT de.id, de.parametros, re.fitness, re.inicio, re.fin
-            FROM datos_ejecucion de
-            LEFT JOIN resultado_ejecucion re ON de.id = re.id_ejecucion
-            WHERE de.estado = 'terminado' 
-            AND NOT EXISTS (
-                SELECT 1 FROM resultados_normalizados rn 
-                WHERE rn.id_ejecucion = de.id
-            )
-            ORDER BY de.id ASC
-        """)
+        if incremental:
+            with db_manager.connect() as connection:
+                ultimo_id, ultimo_fin = leer_marca(connection, 'fase_1')
+            # Terminados despues de la marca, en orden (fin, id)
+            query = db.text("""
+                SELECT de.id, de.fin
+                FROM datos_ejecucion de
+                WHERE de.estado = 'terminado'
+                AND de.fin <= :corte
+                AND (de.fin > :fin OR (de.fin = :fin AND de.id > :id))
+                ORDER BY de.fin ASC, de.id ASC
+            """)
+            parametros = {
+                "corte": datetime.now() - timedelta(seconds=margen),
+                "fin": ultimo_fin or MARCA_INICIAL,
+                "id": ultimo_id
+            }
+        else:
+            # Obtener experimentos terminados que no han sido procesados
+            query = db.text("""
+                SELECT de.id, de.fin
+                FROM datos_ejecucion de
+                WHERE de.estado = 'terminado' 
+                AND NOT EXISTS (
+                    SELECT 1 FROM resultados_normalizados rn 
+                    WHERE rn.id_ejecucion = de.id
+                )
+                ORDER BY de.id ASC
+            """)
+            parametros = {}
         
         if limite:
             query = db.text(str(query) + f" LIMIT {limite}")
         
-        experimentos = connection.execute(query).fetchall()
+        with db_manager.connect() as connection:
+            experimentos = connection.execute(query, parametros).fetchall()
         
         total = len(experimentos)
         print(f"Encontrados {total} experimentos terminados para procesar\n")
@@ -174,71 +215,33 @@ def procesar_fase_1(db_manager, limite=None):
             print("No hay experimentos nuevos para procesar.")
             return
         
+        lotes = [experimentos[i:i + lote] for i in range(0, total, lote)]
         procesados = 0
         errores = 0
-        
-        for idx, exp in enumerate(experimentos, 1):
-            try:
-                exp_id = exp[0]
-                parametros_json = exp[1]
-                fitness_final = float(exp[2]) if exp[2] else None
-                inicio = exp[3]
-                fin = exp[4]
-                
-                # Calcular tiempo de ejecucion
-                tiempo_ejecucion = None
-                if inicio and fin:
-                    tiempo_ejecucion = (fin - inicio).total_seconds()
-                
-                # Parsear parametros
-                datos_parseados = parsear_parametros(parametros_json)
-                
-                if datos_parseados is None:
-                    print(f"  [{idx}/{total}] ERROR: No se pudo parsear experimento {exp_id}")
-                    errores += 1
-                    continue
-                
-                # Calcular promedios de diversidades desde datos_iteracion
-                diversidades_promedio = calcular_diversidades_promedio(connection, exp_id, datos_iteracion)
-                
-                # Insertar en resultados_normalizados
-                insert_data = {
-                    'id_ejecucion': exp_id,
-                    'algoritmo_mh': datos_parseados['algoritmo_mh'],
-                    'algoritmo_ml': datos_parseados['algoritmo_ml'],
-                    'problema': datos_parseados['problema'],
-                    'instancia': datos_parseados['instancia'],
-                    'poblacion': datos_parseados['poblacion'],
-                    'iteraciones_totales': datos_parseados['iteraciones_totales'],
-                    'discretization_scheme': datos_parseados['discretization_scheme'],
-                    'reward_type': datos_parseados['reward_type'],
-                    'fitness_final': fitness_final,
-                    'tiempo_ejecucion_segundos': tiempo_ejecucion,
-                    'diversidad_0_promedio': diversidades_promedio[0],
-                    'diversidad_1_promedio': diversidades_promedio[1],
-                    'diversidad_2_promedio': diversidades_promedio[2],
-                    'diversidad_3_promedio': diversidades_promedio[3],
-                    'diversidad_4_promedio': diversidades_promedio[4],
-                    'diversidad_5_promedio': diversidades_promedio[5]
-                }
-                
-                insert_stmt = resultados_normalizados.insert()
-                connection.execute(insert_stmt, insert_data)
-                
-                procesados += 1
-                
-                if idx % 100 == 0:
-                    print(f"  Procesados {idx}/{total} experimentos...")
-                    
-            except Exception as e:
-                print(f"  [{idx}/{total}] ERROR procesando experimento {exp[0]}: {e}")
-                errores += 1
+        avanzar = incremental
+        
+        ids_lotes = [[exp[0] for exp in experimentos_lote] for experimentos_lote in lotes]
+        for experimentos_lote, (procesados_lote, errores_lote, completo) in zip(
+                lotes, procesar_lotes(db_manager, ids_lotes, workers)):
+            procesados += procesados_lote
+            errores += errores_lote
+            print(f"  Procesados {procesados + errores}/{total} experimentos...")
+            if avanzar:
+                if completo:
+                    with db_manager.begin() as connection:
+                        guardar_marca(connection, 'fase_1', experimentos_lote[-1][0], experimentos_lote[-1][1])
+                else:
+                    # El lote se reintenta en la proxima ejecucion
+                    avanzar = False
         
         print(f"\n=== Procesamiento completado ===")
         print(f"Total: {total}")
         print(f"Procesados exitosamente: {procesados}")
         print(f"Errores: {errores}")
         
+        if incremental:
+            return
+        
         # Mostrar estadisticas
         stats_query = db.text("""
             SELECT 
@@ -251,7 +254,8 @@ def procesar_fase_1(db_manager, limite=None):
             FROM resultados_normalizados
         """)
         
-        stats = connection.execute(stats_query).fetchone()
+        with db_manager.connect() as connection:
+            stats = connection.execute(stats_query).fetchone()
         
         print(f"\n=== Estadisticas de resultados_normalizados ===")
         print(f"Total de registros: {stats[0]}")
@@ -267,77 +271,557 @@ def procesar_fase_1(db_manager, limite=None):
         print(f"Error inesperado: {e}")
 
 
-def calcular_diversidades_promedio(connection, exp_id, datos_iteracion_table):
+def procesar_lotes(db_manager, lotes, workers=1):
     """
-    Calcula el promedio de las 6 medidas de diversidad para un experimento.
+    Procesa lotes de ids con procesar_lote, en paralelo si workers > 1.
+    
+    Returns:
+        iterator: Resultado de procesar_lote para cada lote, en el orden de lotes
+    """
+    if workers > 1 and len(lotes) > 1:
+        # Cada proceso abre su propio pool; no heredar conexiones del padre
+        db_manager.engine.dispose()
+        with multiprocessing.Pool(min(workers, len(lotes))) as pool:
+            yield from pool.imap(_procesar_lote_en_proceso, lotes)
+    else:
+        for ids in lotes:
+            yield procesar_lote(db_manager, ids)
+
+
+# DatabaseManager de cada proceso de --workers (se crea al recibir el primer lote)
+_db_proceso = None
+
+
+def _procesar_lote_en_proceso(ids):
+    """procesar_lote dentro de un proceso del pool."""
+    global _db_proceso
+    if _db_proceso is None:
+        _db_proceso = DatabaseManager()
+    return procesar_lote(_db_proceso, ids)
+
+
+def procesar_lote(db_manager, ids):
+    """
+    Normaliza un lote de experimentos y los inserta en resultados_normalizados.
+    
+    Los experimentos que ya estan en resultados_normalizados se ignoran.
     
     Args:
-        connection: Conexion a la base de datos
-        exp_id: ID del experimento
-        datos_iteracion_table: Tabla de datos_iteracion
+        db_manager: Instancia de DatabaseManager
+        ids: Ids de experimentos terminados
         
     Returns:
-        list: Lista con 6 promedios (uno por cada medida de diversidad)
-              Retorna [None]*6 si no hay datos de diversidad
+        tuple: (procesados, errores, completo); completo es False si el lote
+               no se pudo leer o escribir y debe reintentarse
     """
+    ids = sorted(ids)
+    query = db.text("""
+        SELECT de.id, de.parametros, re.fitness, re.inicio, re.fin
+        FROM datos_ejecucion de
+        LEFT JOIN resultado_ejecucion re ON de.id = re.id_ejecucion
+        WHERE de.id IN :ids
+        ORDER BY de.id ASC
+    """).bindparams(db.bindparam('ids', expanding=True))
+    
     try:
-        # Obtener todas las iteraciones del experimento
-        query = db.text("""
-            SELECT parametros_iteracion
-            FROM datos_iteracion
-            WHERE id_ejecucion = :exp_id
-            ORDER BY numero_iteracion ASC
-        """)
-        
-        iteraciones = connection.execute(query, exp_id=exp_id).fetchall()
+        with db_manager.connect() as connection:
+            experimentos = connection.execute(query, {"ids": list(ids)}).fetchall()
+            promedios = calcular_diversidades_promedio(db_manager, connection, ids)
+    except Exception as e:
+        print(f"  ERROR leyendo lote {ids[0]}-{ids[-1]}: {e}")
+        return 0, len(ids), False
+    
+    filas = []
+    errores = 0
+    vistos = set()
+    for exp in experimentos:
+        exp_id = exp[0]
+        # Un experimento con mas de un resultado se normaliza una sola vez
+        if exp_id in vistos:
+            continue
+        vistos.add(exp_id)
+        
+        fitness_final = float(exp[2]) if exp[2] else None
+        inicio = exp[3]
+        fin = exp[4]
+        
+        # Calcular tiempo de ejecucion
+        tiempo_ejecucion = None
+        if inicio and fin:
+            tiempo_ejecucion = (fin - inicio).total_seconds()
+        
+        # Parsear parametros
+        datos_parseados = parsear_parametros(exp[1])
+        
+        if datos_parseados is None:
+            print(f"  ERROR: No se pudo parsear experimento {exp_id}")
+            errores += 1
+            continue
+        
+        fila = {
+            'id_ejecucion': exp_id,
+            'fitness_final': fitness_final,
+            'tiempo_ejecucion_segundos': tiempo_ejecucion
+        }
+        for columna in COLUMNAS_NORMALIZADOS:
+            if columna in datos_parseados:
+                fila[columna] = datos_parseados[columna]
+        for i, promedio in enumerate(promedios.get(exp_id, [None] * NUM_DIVERSIDADES)):
+            fila[f'diversidad_{i}_promedio'] = promedio
+        filas.append(fila)
+    
+    if not filas:
+        return 0, errores, True
+    
+    # Insert masivo (executemany) del lote completo; los ya normalizados se ignoran
+    tabla = db.table('resultados_normalizados', *[db.column(c) for c in COLUMNAS_NORMALIZADOS])
+    dialecto = sqlite if db_manager.is_sqlite else postgresql
+    insert = dialecto.insert(tabla).on_conflict_do_nothing(index_elements=['id_ejecucion'])
+    try:
+        with db_manager.begin() as connection:
+            connection.execute(insert, filas)
+    except Exception as e:
+        print(f"  ERROR insertando lote {ids[0]}-{ids[-1]}: {e}")
+        return 0, errores + len(filas), False
+    return len(filas), errores, True
+
+
+def parsear_diversidades(textos):
+    """
+    Convierte strings de diversidades ("[3.3e-01 5.26 ...]") en una matriz.
+    
+    Tambien sirve para PorcentajeExplor, que tiene un valor por diversidad.
+    
+    Los strings se parsean en bloque con una sola llamada a NumPy. Si un bloque
+    no se puede leer completo (algun valor invalido o largos distintos), se
+    divide en dos hasta aislar los strings problematicos, que se parsean uno
+    por uno como antes.
+    
+    Args:
+        textos: Lista de strings, uno por iteracion
         
-        if not iteraciones:
-            return [None, None, None, None, None, None]
+    Los nan (diversidades no seleccionadas en el experimento, ver
+    Diversidad.PlanDiversidades) cuentan como valores ausentes.
+    
+    Returns:
+        tuple: (valores, validos), matrices (len(textos), 6); validos es False
+               donde no habia un valor que se pudiera leer
+    """
+    limpios = [texto.strip().strip('[]') for texto in textos]
+    valores = np.zeros((len(limpios), NUM_DIVERSIDADES))
+    validos = np.zeros((len(limpios), NUM_DIVERSIDADES), dtype=bool)
+    # Los strings vacios (campo ausente) quedan como no validos
+    indices = np.array([i for i, texto in enumerate(limpios) if texto], dtype=np.int64)
+    with warnings.catch_warnings():
+        # fromstring avisa cuando no puede leer todo el texto; se detecta por el largo
+        warnings.simplefilter('ignore', DeprecationWarning)
+        _parsear_bloque([limpios[i] for i in indices], indices, valores, validos)
+    validos &= ~np.isnan(valores)
+    return valores, validos
+
+
+def _parsear_bloque(limpios, indices, valores, validos):
+    """Parsea limpios (sin corchetes) en las filas indices de valores y validos."""
+    n = len(limpios)
+    if n == 0:
+        return
+    leidos = np.fromstring(' '.join(limpios), dtype=np.float64, sep=' ')
+    if leidos.size == n * NUM_DIVERSIDADES:
+        valores[indices] = leidos.reshape(n, NUM_DIVERSIDADES)
+        validos[indices] = True
+        return
+    
+    if n > 8:
+        mitad = n // 2
+        _parsear_bloque(limpios[:mitad], indices[:mitad], valores, validos)
+        _parsear_bloque(limpios[mitad:], indices[mitad:], valores, validos)
+        return
+    
+    for i, texto in zip(indices, limpios):
+        for j, valor in enumerate(texto.split()[:NUM_DIVERSIDADES]):
+            try:
+                valores[i, j] = float(valor)
+                validos[i, j] = True
+            except ValueError:
+                pass
+
+
+def calcular_diversidades_promedio(db_manager, connection, ids):
+    """
+    Calcula el promedio de las 6 medidas de diversidad para un lote de experimentos.
+    
+    Las iteraciones de todo el lote se leen con una sola consulta en streaming
+    (cursor del lado del servidor en PostgreSQL) y los promedios se acumulan
+    con NumPy por bloques. Los experimentos con telemetria columnar
+    (telemetria_ejecucion) toman los promedios directamente de sus arrays.
+    
+    Args:
+        db_manager: Instancia de DatabaseManager
+        connection: Conexion a la base de datos
+        ids: Ids de los experimentos, ordenados
         
-        # Arrays para acumular las 6 diversidades
-        diversidades_acumuladas = [[] for _ in range(6)]
+    Returns:
+        dict: id -> lista con 6 promedios (None donde no hay datos de diversidad).
+              Los experimentos sin iteraciones no aparecen.
+    """
+    ids_lote = np.asarray(ids, dtype=np.int64)
+    sumas = np.zeros((len(ids_lote), NUM_DIVERSIDADES))
+    cuentas = np.zeros((len(ids_lote), NUM_DIVERSIDADES))
+    
+    query = db.text(f"""
+        SELECT id_ejecucion, {db_manager.json_text('Diversidades', column='parametros_iteracion')}
+        FROM datos_iteracion
+        WHERE id_ejecucion IN :ids
+    """).bindparams(db.bindparam('ids', expanding=True))
+    resultado = connection.execution_options(stream_results=True).execute(query, {"ids": list(ids)})
+    while True:
+        filas = resultado.fetchmany(FILAS_POR_LECTURA)
+        if not filas:
+            break
+        filas = [fila for fila in filas if fila[1] is not None]
+        if not filas:
+            continue
+        posiciones = np.searchsorted(ids_lote, [fila[0] for fila in filas])
+        valores, validos = parsear_diversidades([fila[1] for fila in filas])
+        for i in range(NUM_DIVERSIDADES):
+            sumas[:, i] += np.bincount(posiciones, weights=np.where(validos[:, i], valores[:, i], 0.0),
+                                       minlength=len(ids_lote))
+            cuentas[:, i] += np.bincount(posiciones, weights=validos[:, i], minlength=len(ids_lote))
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.round(sumas / cuentas, 4)
+    promedios = {}
+    for posicion in np.flatnonzero(cuentas.any(axis=1)):
+        promedios[int(ids_lote[posicion])] = [
+            float(media) if cuenta else None for media, cuenta in zip(medias[posicion], cuentas[posicion])
+        ]
+    
+    # Experimentos ejecutados con --telemetry blob/both
+    if db.inspect(connection).has_table('telemetria_ejecucion'):
+        query = db.text("""
+            SELECT id_ejecucion, datos FROM telemetria_ejecucion WHERE id_ejecucion IN :ids
+        """).bindparams(db.bindparam('ids', expanding=True))
+        for exp_id, blob in connection.execute(query, {"ids": list(ids)}):
+            diversidades = decode_telemetry(blob).get('diversidades')
+            if diversidades is not None and len(diversidades):
+                columnas = diversidades[:, :NUM_DIVERSIDADES]
+                # nan: diversidad no seleccionada en el experimento
+                cuentas_blob = np.count_nonzero(~np.isnan(columnas), axis=0)
+                medias = np.nansum(columnas, axis=0) / np.maximum(cuentas_blob, 1)
+                promedios[exp_id] = [
+                    round(float(media), 4) if cuenta else None for media, cuenta in zip(medias, cuentas_blob)
+                ]
+    
+    return promedios
+
+
+# Columnas de iteraciones_normalizadas que escribe la fase 2
+COLUMNAS_DIVERSIDAD = tuple(f'diversidad_{i}' for i in range(NUM_DIVERSIDADES))
+COLUMNAS_EXPLORACION = tuple(f'porcentaje_explor_{i}' for i in range(NUM_DIVERSIDADES))
+COLUMNAS_ITERACIONES = (
+    ('id', 'id_ejecucion', 'numero_iteracion', 'fitness', 'clock_time', 'process_time', 'ds')
+    + COLUMNAS_DIVERSIDAD + COLUMNAS_EXPLORACION + ('num_reparaciones',)
+)
+
+
+def procesar_fase_2(db_manager, bloque=10000, retraso=10, margen=60):
+    """
+    Fase 2: Normaliza los datos por iteracion en iteraciones_normalizadas.
+    
+    Lee datos_iteracion en orden de id con un cursor del lado del servidor,
+    parsea cada parametros_iteracion una sola vez y escribe cada bloque con
+    COPY. El ultimo id procesado se guarda en estado_postproceso en la misma
+    transaccion que el bloque, por lo que la fase se puede interrumpir y volver
+    a ejecutar: continua donde quedo y solo procesa filas nuevas.
+    
+    Con la base en uso, una fila con id menor puede confirmarse despues que
+    otra con id mayor. Por eso solo se procesan filas hasta el mayor id visible
+    al comienzo, y despues de esperar 'retraso' segundos a que terminen las
+    transacciones que estaban en curso.
+    
+    Los experimentos ejecutados con --telemetry blob no tienen filas en
+    datos_iteracion: sus series de telemetria_ejecucion se expanden a las
+    mismas columnas (ver procesar_telemetria_fase_2).
+    
+    Args:
+        db_manager: Instancia de DatabaseManager
+        bloque: Filas por bloque (lectura y COPY)
+        retraso: Segundos de espera antes de leer (0 = no esperar)
+        margen: Segundos desde el termino antes de expandir la telemetria de un experimento
         
-        for row in iteraciones:
-            params_json = row[0]
-            
-            try:
-                params = json.loads(params_json) if isinstance(params_json, str) else params_json
-                
-                # Parsear el campo Diversidades
-                if 'Diversidades' in params:
-                    div_str = params['Diversidades']
-                    
-                    # Convertir string "[3.30000e-01 5.26000e+00 ...]" a lista de floats
-                    # Remover corchetes y dividir por espacios
-                    div_str = div_str.strip('[]')
-                    div_values = div_str.split()
-                    
-                    # Convertir a float y agregar a acumuladores
-                    for i, val_str in enumerate(div_values):
-                        if i < 6:  # Solo las primeras 6
-                            try:
-                                diversidades_acumuladas[i].append(float(val_str))
-                            except ValueError:
-                                pass
-                                
-            except Exception as e:
-                # Si falla parsear una iteracion, continuar con las demas
-                continue
-        
-        # Calcular promedios
-        promedios = []
-        for diversidad_list in diversidades_acumuladas:
-            if diversidad_list:
-                promedio = sum(diversidad_list) / len(diversidad_list)
-                promedios.append(round(promedio, 4))
-            else:
-                promedios.append(None)
-        
-        return promedios
+    Returns:
+        int: Numero de filas procesadas
+    """
+    print("\n=== FASE 2: Normalizando datos por iteracion ===\n")
+    
+    try:
+        procesadas = procesar_iteraciones_fase_2(db_manager, bloque, retraso)
+        procesadas += procesar_telemetria_fase_2(db_manager, bloque, margen)
+        print(f"\n=== Fase 2 completada: {procesadas} iteraciones normalizadas ===")
+        return procesadas
         
+    except SQLAlchemyError as e:
+        print(f"Error de base de datos: {e}")
     except Exception as e:
-        print(f"    Error calculando diversidades para experimento {exp_id}: {e}")
-        return [None, None, None, None, None, None]
+        print(f"Error inesperado: {e}")
+    return 0
+
+
+def procesar_iteraciones_fase_2(db_manager, bloque, retraso):
+    """Normaliza las filas nuevas de datos_iteracion; devuelve cuantas se procesaron."""
+    with db_manager.connect() as connection:
+        ultimo_id, _ = leer_marca(connection, 'fase_2')
+        limite = connection.execute(db.text("SELECT MAX(id) FROM datos_iteracion")).scalar() or 0
+    
+    if limite <= ultimo_id:
+        print(f"No hay iteraciones nuevas (ultimo id procesado: {ultimo_id}).")
+        return 0
+    
+    print(f"Procesando iteraciones con id entre {ultimo_id + 1} y {limite}")
+    if retraso > 0:
+        time.sleep(retraso)
+    
+    query = db.text("""
+        SELECT id, id_ejecucion, numero_iteracion, parametros_iteracion
+        FROM datos_iteracion
+        WHERE id > :desde AND id <= :hasta
+        ORDER BY id ASC
+    """)
+    procesadas = 0
+    inicio = time.time()
+    with db_manager.connect() as lectura:
+        resultado = lectura.execution_options(stream_results=True).execute(
+            query, {"desde": ultimo_id, "hasta": limite}
+        )
+        while True:
+            filas = resultado.fetchmany(bloque)
+            if not filas:
+                break
+            datos = normalizar_iteraciones(filas)
+            with db_manager.begin() as escritura:
+                db_manager.insert_rows(escritura, 'iteraciones_normalizadas', COLUMNAS_ITERACIONES, datos)
+                guardar_marca(escritura, 'fase_2', filas[-1][0])
+            procesadas += len(filas)
+            print(f"  {procesadas} iteraciones ({procesadas / max(time.time() - inicio, 1e-9):.0f} filas/s)")
+    return procesadas
+
+
+def procesar_telemetria_fase_2(db_manager, bloque, margen):
+    """
+    Expande a iteraciones_normalizadas la telemetria de los experimentos sin datos_iteracion.
+    
+    Avanza con su propia marca (fin, id) de terminados, como la fase 1
+    incremental: solo toma experimentos terminados hace mas de 'margen'
+    segundos. Los experimentos con --telemetry both ya se normalizan desde
+    datos_iteracion y se saltan. Las filas de un experimento se reemplazan si
+    se vuelve a procesar (por ejemplo, porque se reejecuto).
+    
+    Returns:
+        int: Numero de iteraciones escritas
+    """
+    with db_manager.connect() as connection:
+        if not db.inspect(connection).has_table('telemetria_ejecucion'):
+            return 0
+        ultimo_id, ultimo_fin = leer_marca(connection, 'fase_2_telemetria')
+    
+    query = db.text("""
+        SELECT de.id, de.fin, te.datos
+        FROM telemetria_ejecucion te
+        JOIN datos_ejecucion de ON de.id = te.id_ejecucion
+        WHERE de.estado = 'terminado'
+        AND de.fin <= :corte
+        AND (de.fin > :fin OR (de.fin = :fin AND de.id > :id))
+        AND NOT EXISTS (SELECT 1 FROM datos_iteracion di WHERE di.id_ejecucion = de.id)
+        ORDER BY de.fin ASC, de.id ASC
+    """)
+    borrar = db.text("""
+        DELETE FROM iteraciones_normalizadas WHERE id_ejecucion IN :ids AND id < 0
+    """).bindparams(db.bindparam('ids', expanding=True))
+    parametros = {
+        "corte": datetime.now() - timedelta(seconds=margen),
+        "fin": ultimo_fin or MARCA_INICIAL,
+        "id": ultimo_id
+    }
+    
+    procesadas = 0
+    with db_manager.connect() as lectura:
+        resultado = lectura.execution_options(stream_results=True).execute(query, parametros)
+        while True:
+            # Los blobs son grandes: pocos experimentos por lectura
+            experimentos = resultado.fetchmany(EXPERIMENTOS_POR_LECTURA)
+            ids, datos = [], []
+            for exp_id, fin, blob in experimentos:
+                ids.append(exp_id)
+                datos += normalizar_telemetria(exp_id, decode_telemetry(blob))
+                if len(datos) >= bloque or exp_id == experimentos[-1][0]:
+                    with db_manager.begin() as escritura:
+                        escritura.execute(borrar, {"ids": ids})
+                        db_manager.insert_rows(escritura, 'iteraciones_normalizadas', COLUMNAS_ITERACIONES, datos)
+                        guardar_marca(escritura, 'fase_2_telemetria', exp_id, fin)
+                    procesadas += len(datos)
+                    ids, datos = [], []
+            if not experimentos:
+                break
+            print(f"  {procesadas} iteraciones desde telemetria_ejecucion")
+    return procesadas
+
+
+def normalizar_iteraciones(filas):
+    """
+    Convierte filas de datos_iteracion en filas de iteraciones_normalizadas.
+    
+    Cada JSON se parsea una vez; los arrays de diversidades y porcentajes de
+    exploracion de todo el bloque se convierten juntos con parsear_diversidades.
+    Los campos ausentes (por ejemplo numReparaciones en RW) quedan en None.
+    
+    Args:
+        filas: Tuplas (id, id_ejecucion, numero_iteracion, parametros_iteracion)
+        
+    Returns:
+        list: Diccionarios con las columnas de COLUMNAS_ITERACIONES
+    """
+    parametros = []
+    for fila in filas:
+        try:
+            params = json.loads(fila[3]) if isinstance(fila[3], str) else fila[3]
+        except (TypeError, ValueError):
+            params = None
+        parametros.append(params if isinstance(params, dict) else {})
+    
+    diversidades, div_validas = parsear_diversidades([str(p.get('Diversidades', '')) for p in parametros])
+    explor, explor_validos = parsear_diversidades([str(p.get('PorcentajeExplor', '')) for p in parametros])
+    
+    # Listas de floats de Python; None donde el valor no se pudo leer
+    diversidades = diversidades.tolist()
+    for k, i in zip(*np.nonzero(~div_validas)):
+        diversidades[k][i] = None
+    explor = explor.tolist()
+    for k, i in zip(*np.nonzero(~explor_validos)):
+        explor[k][i] = None
+    
+    datos = []
+    for fila, params, div, exp in zip(filas, parametros, diversidades, explor):
+        dato = {
+            'id': fila[0],
+            'id_ejecucion': fila[1],
+            'numero_iteracion': fila[2],
+            'fitness': _como_numero(params.get('fitness'), float),
+            'clock_time': _como_numero(params.get('clockTime'), float),
+            'process_time': _como_numero(params.get('processTime'), float),
+            'ds': None if params.get('DS') is None else str(params['DS']),
+            'num_reparaciones': _como_numero(params.get('numReparaciones'), int)
+        }
+        dato.update(zip(COLUMNAS_DIVERSIDAD, div))
+        dato.update(zip(COLUMNAS_EXPLORACION, exp))
+        datos.append(dato)
+    return datos
+
+
+def normalizar_telemetria(exp_id, series):
+    """
+    Convierte la telemetria de un experimento en filas de iteraciones_normalizadas.
+    
+    Las filas no tienen fila en datos_iteracion: su id es negativo,
+    -(id_ejecucion * 2**32 + numero_iteracion), para no chocar con esos ids.
+    Las series ausentes (por ejemplo num_reparaciones en RW) y las diversidades
+    no calculadas (nan) quedan en None.
+    
+    Args:
+        exp_id: Id del experimento
+        series: Diccionario de arrays, como lo entrega decode_telemetry
+        
+    Returns:
+        list: Diccionarios con las columnas de COLUMNAS_ITERACIONES
+    """
+    n = len(series.get('fitness', ()))
+    def columna(nombre):
+        valores = series.get(nombre)
+        return [None] * n if valores is None else valores.tolist()
+    def matriz(nombre):
+        valores = series.get(nombre)
+        if valores is None:
+            return [[None] * NUM_DIVERSIDADES] * n
+        valores = np.asarray(valores, dtype=float).reshape(n, -1)[:, :NUM_DIVERSIDADES]
+        return [[None if np.isnan(v) else v for v in fila] for fila in valores.tolist()]
+    
+    if series.get('ds') is not None and series.get('ds_names') is not None:
+        ds = series['ds_names'][series['ds']].tolist()
+    else:
+        ds = [None] * n
+    
+    datos = []
+    for k, fitness, clock, proceso, esquema, reparaciones, div, exp in zip(
+            range(n), columna('fitness'), columna('clock_time'), columna('process_time'), ds,
+            columna('num_reparaciones'), matriz('diversidades'), matriz('porcentaje_explor')):
+        dato = {
+            'id': -(exp_id * 2**32 + k),
+            'id_ejecucion': exp_id,
+            'numero_iteracion': k,
+            'fitness': _como_numero(fitness, float),
+            'clock_time': _como_numero(clock, float),
+            'process_time': _como_numero(proceso, float),
+            'ds': esquema,
+            'num_reparaciones': _como_numero(reparaciones, int)
+        }
+        dato.update(zip(COLUMNAS_DIVERSIDAD, div))
+        dato.update(zip(COLUMNAS_EXPLORACION, exp))
+        datos.append(dato)
+    return datos
+
+
+def _como_numero(valor, tipo):
+    """Convierte un campo del JSON (numero o string) a tipo; None si no se puede."""
+    try:
+        return tipo(float(valor)) if tipo is int else tipo(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def leer_marca(connection, fase):
+    """
+    Marca de agua de una fase incremental.
+    
+    Returns:
+        tuple: (ultimo_id, ultimo_fin); (0, None) si la fase nunca se ejecuto
+    """
+    fila = connection.execute(
+        db.text("SELECT ultimo_id, ultimo_fin FROM estado_postproceso WHERE fase = :fase"), {"fase": fase}
+    ).fetchone()
+    return (fila[0], fila[1]) if fila else (0, None)
+
+
+def guardar_marca(connection, fase, ultimo_id, ultimo_fin=None):
+    """Guarda la marca de agua de una fase, en la transaccion de connection."""
+    connection.execute(db.text("""
+        INSERT INTO estado_postproceso (fase, ultimo_id, ultimo_fin, actualizado)
+        VALUES (:fase, :ultimo_id, :ultimo_fin, CURRENT_TIMESTAMP)
+        ON CONFLICT (fase) DO UPDATE
+        SET ultimo_id = EXCLUDED.ultimo_id, ultimo_fin = EXCLUDED.ultimo_fin,
+            actualizado = EXCLUDED.actualizado
+    """), {"fase": fase, "ultimo_id": ultimo_id, "ultimo_fin": ultimo_fin})
+
+
+def ejecutar_daemon(db_manager, args):
+    """
+    Ejecuta las fases pedidas en modo incremental cada args.intervalo segundos.
+    
+    Pensado para correr junto a los workers: cada pasada solo lee lo nuevo
+    desde la ultima marca, asi los resultados normalizados quedan disponibles
+    pocos minutos despues de que termina cada experimento.
+    """
+    # Terminar limpio con SIGTERM, igual que con Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Modo daemon: cada {args.intervalo} segundos (Ctrl+C para detener)")
+    try:
+        while True:
+            if args.f_1:
+                procesar_fase_1(db_manager, workers=args.workers, lote=args.lote,
+                                incremental=True, margen=args.margen)
+            if args.f_2:
+                procesar_fase_2(db_manager, bloque=args.bloque, retraso=args.retraso, margen=args.margen)
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        print("\nDaemon detenido")
 
 
 def main():
@@ -349,18 +833,71 @@ def main():
         action='store_true',
         help='Ejecutar Fase 1: procesar datos a nivel experimento'
     )
+    parser.add_argument(
+        '--f-2',
+        action='store_true',
+        help='Ejecutar Fase 2: normalizar datos a nivel iteracion (incremental)'
+    )
     parser.add_argument(
         '--limite',
         type=int,
         default=None,
         help='Limitar el numero de experimentos a procesar (para pruebas)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Procesos que procesan lotes de experimentos en paralelo (default: 1)'
+    )
+    parser.add_argument(
+        '--lote',
+        type=int,
+        default=500,
+        help='Experimentos por lote (default: 500)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Fase 1: procesar solo los terminados despues de la ultima marca (fin, id)'
+    )
+    parser.add_argument(
+        '--margen',
+        type=int,
+        default=60,
+        help='Fase 1 incremental y telemetria de la fase 2: segundos desde el termino antes de '
+             'procesar un experimento (default: 60)'
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Repetir las fases pedidas en modo incremental cada --intervalo segundos'
+    )
+    parser.add_argument(
+        '--intervalo',
+        type=int,
+        default=60,
+        help='Segundos entre pasadas en modo daemon (default: 60)'
+    )
+    parser.add_argument(
+        '--bloque',
+        type=int,
+        default=10000,
+        help='Fase 2: iteraciones por bloque leido y escrito (default: 10000)'
+    )
+    parser.add_argument(
+        '--retraso',
+        type=int,
+        default=10,
+        help='Fase 2: segundos de espera para que terminen las escrituras en curso (default: 10)'
+    )
     
     args = parser.parse_args()
     
-    if not args.f_1:
+    if not (args.f_1 or args.f_2):
         print("Debes especificar al menos una fase:")
         print("  --f-1    Procesar datos a nivel experimento")
+        print("  --f-2    Normalizar datos a nivel iteracion")
         return
     
     print("="*60)
@@ -369,8 +906,16 @@ def main():
     
     db = DatabaseManager()
     
+    if args.daemon:
+        ejecutar_daemon(db, args)
+        return
+    
     if args.f_1:
-        procesar_fase_1(db, limite=args.limite)
+        procesar_fase_1(db, limite=args.limite, workers=args.workers, lote=args.lote,
+                        incremental=args.incremental, margen=args.margen)
+    
+    if args.f_2:
+        procesar_fase_2(db, bloque=args.bloque, retraso=args.retraso, margen=args.margen)
     
     print("\n" + "="*60)
     print("Procesamiento finalizado")
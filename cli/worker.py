@@ -8,18 +8,449 @@ Usage:
     python worker.py
     python worker.py --max-experiments 10
     python worker.py --continuous
+    python worker.py --continuous --affinity
+    python worker.py --continuous --processes 14
+    python worker.py --continuous --telemetry blob
 """
 
 import argparse
+import multiprocessing
+import multiprocessing.connection
+import random
+import signal
 import sys
 import os
 import time
+from collections import deque
+
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.database import DatabaseManager
+from src.core.problems import SCP
 from src.solvers import SCPMLSolver, SCPSolver, RWMLSolver, RWSolver
+from src.utils import InstanceCache
+
+
+# Delay before restarting a crashed worker, doubled on each consecutive crash
+RESTART_BACKOFF = 5
+RESTART_BACKOFF_MAX = 300
+
+
+class PrefetchBuffer:
+    """
+    Local buffer of claimed experiments.
+    
+    Claims experiments from the queue in batches and hands them out one at a
+    time. Buffered experiments are already marked 'ejecutando' in the database,
+    so release() must be called on shutdown to return the unstarted ones. Their
+    'inicio' stays NULL until next() hands them out.
+    
+    Under a supervisor, claimed, started and released ids are also sent over
+    the report pipe, so the supervisor can clean up after a child that dies
+    without running release() (SIGKILL, OOM killer).
+    """
+    
+    def __init__(self, db, size, report=None):
+        self.db = db
+        self.size = size
+        self.report = report
+        self.pending = deque()
+    
+    def next(self, preferred_instance=None):
+        """Return the next experiment, refilling the buffer when it is empty."""
+        if not self.pending:
+            claimed = self.db.claim_experiments(self.size, preferred_instance)
+            self.pending.extend(claimed)
+            self._send('claimed', [experiment[0] for experiment in claimed])
+        if not self.pending:
+            return 0, '', {}
+        experiment = None
+        # Prefer a buffered experiment on the preferred instance
+        if preferred_instance is not None:
+            for candidate in self.pending:
+                if candidate[2].get('paramsProblem', {}).get('instance_name') == preferred_instance:
+                    experiment = candidate
+                    self.pending.remove(candidate)
+                    break
+        if experiment is None:
+            experiment = self.pending.popleft()
+        self.db.start_experiment(experiment[0])
+        self._send('started', experiment[0])
+        return experiment
+    
+    def release(self):
+        """Return unstarted experiments to the queue; returns how many were released."""
+        ids = [experiment[0] for experiment in self.pending]
+        self.pending.clear()
+        released = self.db.release_experiments(ids)
+        self._send('released', ids)
+        return released
+    
+    def _send(self, kind, payload):
+        if self.report is not None and payload:
+            self.report.send((kind, payload))
+
+
+def run_worker(args, instance_cache=None, report=None):
+    """
+    Run the experiment loop in this process.
+    
+    Args:
+        args: Parsed command line arguments
+        instance_cache: InstanceCache to use (e.g. already warmed up by the supervisor)
+        report: Optional connection receiving ('claimed', ids), ('started', id),
+                ('finished', (id, iterations or None if it failed)) and
+                ('released', ids) messages for the supervisor
+        
+    Returns:
+        int: Number of experiments completed
+    """
+    db = DatabaseManager()
+    experiments_completed = 0
+    
+    print(f"Worker started (pid {os.getpid()})")
+    print("=" * 60)
+    
+    # Initialize solvers (SCP solvers share the worker's instance cache)
+    if instance_cache is None:
+        instance_cache = InstanceCache(max_size=args.instance_cache)
+    scp_ml_solver = SCPMLSolver(instance_cache=instance_cache, telemetry=args.telemetry)
+    scp_solver = SCPSolver(instance_cache=instance_cache, telemetry=args.telemetry)
+    rw_ml_solver = RWMLSolver(telemetry=args.telemetry)
+    rw_solver = RWSolver(telemetry=args.telemetry)
+    
+    last_instance = None
+    buffer = PrefetchBuffer(db, max(1, args.prefetch), report)
+    
+    # Stop cleanly on SIGTERM so buffered experiments are released
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    try:
+        while True:
+            # Fetch next pending experiment (from the local buffer)
+            exp_id, algorithm_name, params = buffer.next(
+                preferred_instance=last_instance if args.affinity else None
+            )
+            
+            if exp_id == 0:
+                if args.continuous:
+                    print(f"No pending experiments. Waiting {args.check_interval} seconds...")
+                    time.sleep(args.check_interval)
+                    continue
+                else:
+                    print("No more pending experiments")
+                    break
+            
+            print(f"\nExperiment ID: {exp_id}")
+            print(f"Algorithm: {algorithm_name}")
+            print("-" * 60)
+            
+            # Extract parameters
+            mh = params.get('MH')
+            ml = params.get('ML')
+            params_mh = params.get('paramsMH')
+            params_ml = params.get('paramsML')
+            problem_name = params.get('problemName')
+            params_problem = params.get('paramsProblem')
+            
+            print(f"Problem: {problem_name}")
+            print(f"MH: {mh}")
+            print(f"ML: {ml}")
+            print(f"Instance: {params_problem.get('instance_name', 'N/A')}")
+            print(f"Run: {params_mh.get('run', 'N/A')}")
+            last_instance = params_problem.get('instance_name')
+            
+            # Select appropriate solver
+            try:
+                if problem_name == "SCP":
+                    if ml in ["QL", "SA", "BQSA", "MAB"]:
+                        solver = scp_ml_solver
+                    else:
+                        solver = scp_solver
+                elif problem_name == "RW":
+                    if ml in ["QL", "SA", "BQSA", "MAB"]:
+                        solver = rw_ml_solver
+                    else:
+                        solver = rw_solver
+                else:
+                    print(f"ERROR: Unknown problem type: {problem_name}")
+                    db.finish_experiment(exp_id, None, 'error')
+                    if report is not None:
+                        report.send(('finished', (exp_id, None)))
+                    continue
+            
+                # Execute optimization
+                success = solver.solve(
+                    exp_id, mh, params_mh, ml, params_ml,
+                    problem_name, params_problem
+                )
+            
+                if success:
+                    experiments_completed += 1
+                    print(f"Experiment {exp_id} completed successfully")
+                else:
+                    print(f"Experiment {exp_id} failed")
+                if report is not None:
+                    report.send(('finished', (exp_id, params_mh.get('maxIter', 0) if success else None)))
+            
+            except Exception as e:
+                print(f"ERROR executing experiment {exp_id}: {e}")
+                import traceback
+                traceback.print_exc()
+                db.finish_experiment(exp_id, None, 'error')
+                if report is not None:
+                    report.send(('finished', (exp_id, None)))
+            
+            # Check if we've hit the maximum
+            if args.max_experiments and experiments_completed >= args.max_experiments:
+                print(f"\nReached maximum experiments limit ({args.max_experiments})")
+                break
+            
+            print("=" * 60)
+    finally:
+        released = buffer.release()
+        if released:
+            print(f"Released {released} unstarted experiments back to the queue")
+    
+    print(f"\nWorker finished. Completed {experiments_completed} experiments")
+    print(instance_cache.summary())
+    print(db.pool_metrics.summary())
+    return experiments_completed
+
+
+def warm_up(args, instance_cache):
+    """
+    Load the instances with most pending experiments before forking.
+    
+    Children inherit the parsed instances and repair structures copy-on-write,
+    and the compiled repair kernels are already built, so this setup is paid
+    once per host instead of once per process.
+    """
+    db = DatabaseManager()
+    pending = db.get_pending_instances(instance_cache.max_size)
+    # Children open their own pool; do not leave parent connections to be inherited
+    db.engine.dispose()
+    
+    workdir_instances = os.path.join(os.path.abspath(os.getcwd()), 'instances')
+    for problem_name, instance_dir, instance_file, count in pending:
+        if problem_name != "SCP" or not instance_file:
+            continue
+        instance_path = SCP.SCP(workdir_instances, instance_dir, instance_file).obtenerInstancia()
+        if not os.path.exists(instance_path):
+            continue
+        start = time.time()
+        entry = instance_cache.get_scp(instance_path)
+        # One small repair per strategy compiles the Numba kernels, if enabled
+        repair = entry['repair']
+        for repair_type in (1, 2, 3):
+            empty = np.zeros((1, repair.cols))
+            repair.reparaPoblacion(empty, np.ones(1, dtype=bool), repair_type)
+        print(f"Warmed up {instance_file} ({count} pending) in {time.time() - start:.1f}s")
+    # Counters only reflect experiments
+    instance_cache.hits = instance_cache.misses = 0
+
+
+def _start_child(context, args, instance_cache):
+    """
+    Fork a worker process that inherits the warmed-up cache.
+    
+    Each child reports through its own pipe, so a child killed mid-write
+    cannot block the others (as a shared queue lock could).
+    
+    Returns:
+        tuple: (process, receiving end of its report pipe)
+    """
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child_main, args=(args, instance_cache, sender))
+    process.start()
+    sender.close()
+    return process, receiver
+
+
+def _child_main(args, instance_cache, report):
+    """Entry point of a forked worker process."""
+    # Forked children start with the parent's RNG state: reseed each one
+    np.random.seed()
+    random.seed()
+    # Ctrl+C is handled by the supervisor, which stops children with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(args, instance_cache, report)
+
+
+def supervise(args):
+    """
+    Run args.processes worker processes and keep them alive.
+    
+    Instances are warmed up once and the children are forked afterwards, so
+    read-only instance data is shared copy-on-write. Children that crash are
+    restarted with exponential backoff, at most args.max_restarts times per
+    args.restart_window seconds; children that exit normally (queue empty) are
+    not. Aggregate throughput is printed every args.report_interval seconds.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print("ERROR: --processes needs fork (Linux/macOS); use start_workers.bat on Windows")
+        sys.exit(1)
+    context = multiprocessing.get_context('fork')
+    
+    print(f"Supervisor started (pid {os.getpid()}), {args.processes} processes")
+    print("=" * 60)
+    instance_cache = InstanceCache(max_size=args.instance_cache)
+    warm_up(args, instance_cache)
+    
+    children = [_start_child(context, args, instance_cache) for _ in range(args.processes)]
+    # Experiments each child holds in the database: buffered ids and the one running
+    claims = [_ChildClaims() for _ in children]
+    # Crashed slots waiting for their backoff delay, and recent restart times
+    restart_at = [None] * len(children)
+    crashes = [0] * len(children)
+    recent_restarts = deque()
+    restarts = 0
+    experiments = 0
+    iterations = 0
+    start = time.time()
+    last_report = start
+    
+    stopping = []
+    def stop(signum, frame):
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    try:
+        while not stopping and any(child is not None or due is not None
+                                   for child, due in zip(children, restart_at)):
+            # Collect reports from the children
+            receivers = {child[1]: i for i, child in enumerate(children) if child is not None}
+            for receiver in multiprocessing.connection.wait(list(receivers), timeout=1):
+                i = receivers[receiver]
+                try:
+                    kind, payload = receiver.recv()
+                except EOFError:
+                    continue
+                iters = claims[i].update(kind, payload)
+                if iters is not None:
+                    experiments += 1
+                    iterations += iters
+                    crashes[i] = 0
+            
+            now = time.time()
+            for i, child in enumerate(children):
+                if child is None or child[0].is_alive():
+                    continue
+                process, receiver = child
+                # Reports sent just before exiting
+                while receiver.poll():
+                    try:
+                        kind, payload = receiver.recv()
+                    except EOFError:
+                        break
+                    iters = claims[i].update(kind, payload)
+                    if iters is not None:
+                        experiments += 1
+                        iterations += iters
+                receiver.close()
+                children[i] = None
+                # A killed child never ran its own release()
+                claims[i].cleanup(process.pid)
+                if process.exitcode == 0:
+                    continue
+                while recent_restarts and now - recent_restarts[0] > args.restart_window:
+                    recent_restarts.popleft()
+                if len(recent_restarts) >= args.max_restarts:
+                    print(f"Worker {process.pid} exited with code {process.exitcode}; "
+                          f"{len(recent_restarts)} restarts in the last {args.restart_window}s, "
+                          f"not restarting")
+                    continue
+                delay = min(RESTART_BACKOFF * 2 ** crashes[i], RESTART_BACKOFF_MAX)
+                crashes[i] += 1
+                recent_restarts.append(now)
+                restart_at[i] = now + delay
+                print(f"Worker {process.pid} exited with code {process.exitcode}, "
+                      f"restarting in {delay:.0f}s")
+            
+            for i, due in enumerate(restart_at):
+                if due is not None and now >= due:
+                    children[i] = _start_child(context, args, instance_cache)
+                    restart_at[i] = None
+                    restarts += 1
+            
+            if time.time() - last_report >= args.report_interval:
+                _print_throughput(experiments, iterations, time.time() - start, restarts)
+                last_report = time.time()
+    finally:
+        for child in children:
+            if child is not None and child[0].is_alive():
+                child[0].terminate()
+        for i, child in enumerate(children):
+            if child is not None:
+                child[0].join()
+                # Children release their buffers on SIGTERM; only leftovers remain
+                while child[1].poll():
+                    try:
+                        claims[i].update(*child[1].recv())
+                    except EOFError:
+                        break
+                claims[i].cleanup(child[0].pid)
+    
+    _print_throughput(experiments, iterations, time.time() - start, restarts)
+    print("Supervisor finished")
+
+
+class _ChildClaims:
+    """Experiments a worker process has claimed and not yet finished or released."""
+    
+    def __init__(self):
+        self.buffered = set()
+        self.running = None
+    
+    def update(self, kind, payload):
+        """Apply one report; returns the iterations of a successful experiment, else None."""
+        if kind == 'claimed':
+            self.buffered.update(payload)
+        elif kind == 'started':
+            self.buffered.discard(payload)
+            self.running = payload
+        elif kind == 'released':
+            self.buffered.difference_update(payload)
+        elif kind == 'finished':
+            exp_id, iters = payload
+            if self.running == exp_id:
+                self.running = None
+            return iters
+        return None
+    
+    def cleanup(self, pid):
+        """
+        Return the buffered experiments to the queue and fail the running one.
+        
+        The running experiment may have written part of its iterations, and it
+        may be what killed the child (e.g. out of memory), so it is marked
+        'error' rather than requeued.
+        """
+        if not self.buffered and self.running is None:
+            return
+        db = DatabaseManager()
+        released = db.release_experiments(sorted(self.buffered))
+        if released:
+            print(f"Released {released} experiments claimed by worker {pid}")
+        if self.running is not None:
+            print(f"Experiment {self.running} was running in worker {pid}, marked as error")
+            db.finish_experiment(self.running, None, 'error')
+        # Children forked later must not inherit the supervisor's connections
+        db.engine.dispose()
+        self.buffered.clear()
+        self.running = None
+
+
+def _print_throughput(experiments, iterations, elapsed, restarts):
+    """Print aggregate throughput of all worker processes."""
+    hours = max(elapsed, 1e-9) / 3600
+    print(f"[supervisor] {experiments} experiments in {elapsed / 60:.1f} min: "
+          f"{experiments / hours:.1f} experiments/hour, "
+          f"{iterations / max(elapsed, 1e-9):.1f} iterations/sec, {restarts} restarts")
 
 
 def main():
@@ -43,95 +474,62 @@ def main():
         default=60,
         help='Seconds to wait between checks in continuous mode (default: 60)'
     )
+    parser.add_argument(
+        '--affinity',
+        action='store_true',
+        help='Prefer pending experiments on the instance this worker ran last'
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=1,
+        help='Experiments claimed per queue access and kept in a local buffer (default: 1)'
+    )
+    parser.add_argument(
+        '--instance-cache',
+        type=int,
+        default=4,
+        help='Number of parsed instances kept in memory between experiments (default: 4)'
+    )
+    parser.add_argument(
+        '--telemetry',
+        choices=['json', 'blob', 'both'],
+        default='json',
+        help='Iteration data format: JSON rows in datos_iteracion, one compressed '
+             'blob per experiment in telemetria_ejecucion, or both (default: json)'
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=1,
+        help='Run N worker processes under a supervisor (Linux/macOS, default: 1)'
+    )
+    parser.add_argument(
+        '--report-interval',
+        type=int,
+        default=300,
+        help='Seconds between throughput reports in supervisor mode (default: 300)'
+    )
+    parser.add_argument(
+        '--max-restarts',
+        type=int,
+        default=10,
+        help='Crashed workers restarted at most this many times per --restart-window '
+             'in supervisor mode (default: 10)'
+    )
+    parser.add_argument(
+        '--restart-window',
+        type=int,
+        default=600,
+        help='Window in seconds for --max-restarts (default: 600)'
+    )
     
     args = parser.parse_args()
     
-    db = DatabaseManager()
-    experiments_completed = 0
-    
-    print("Worker started")
-    print("=" * 60)
-    
-    # Initialize solvers
-    scp_ml_solver = SCPMLSolver()
-    scp_solver = SCPSolver()
-    rw_ml_solver = RWMLSolver()
-    rw_solver = RWSolver()
-    
-    while True:
-        # Fetch next pending experiment
-        exp_id, algorithm_name, params = db.get_pending_experiment()
-        
-        if exp_id == 0:
-            if args.continuous:
-                print(f"No pending experiments. Waiting {args.check_interval} seconds...")
-                time.sleep(args.check_interval)
-                continue
-            else:
-                print("No more pending experiments")
-                break
-        
-        print(f"\nExperiment ID: {exp_id}")
-        print(f"Algorithm: {algorithm_name}")
-        print("-" * 60)
-        
-        # Extract parameters
-        mh = params.get('MH')
-        ml = params.get('ML')
-        params_mh = params.get('paramsMH')
-        params_ml = params.get('paramsML')
-        problem_name = params.get('problemName')
-        params_problem = params.get('paramsProblem')
-        
-        print(f"Problem: {problem_name}")
-        print(f"MH: {mh}")
-        print(f"ML: {ml}")
-        print(f"Instance: {params_problem.get('instance_name', 'N/A')}")
-        print(f"Run: {params_mh.get('run', 'N/A')}")
-        
-        # Select appropriate solver
-        try:
-            if problem_name == "SCP":
-                if ml in ["QL", "SA", "BQSA", "MAB"]:
-                    solver = scp_ml_solver
-                else:
-                    solver = scp_solver
-            elif problem_name == "RW":
-                if ml in ["QL", "SA", "BQSA", "MAB"]:
-                    solver = rw_ml_solver
-                else:
-                    solver = rw_solver
-            else:
-                print(f"ERROR: Unknown problem type: {problem_name}")
-                db.finish_experiment(exp_id, None, 'error')
-                continue
-            
-            # Execute optimization
-            success = solver.solve(
-                exp_id, mh, params_mh, ml, params_ml,
-                problem_name, params_problem
-            )
-            
-            if success:
-                experiments_completed += 1
-                print(f"Experiment {exp_id} completed successfully")
-            else:
-                print(f"Experiment {exp_id} failed")
-        
-        except Exception as e:
-            print(f"ERROR executing experiment {exp_id}: {e}")
-            import traceback
-            traceback.print_exc()
-            db.finish_experiment(exp_id, None, 'error')
-        
-        # Check if we've hit the maximum
-        if args.max_experiments and experiments_completed >= args.max_experiments:
-            print(f"\nReached maximum experiments limit ({args.max_experiments})")
-            break
-        
-        print("=" * 60)
-    
-    print(f"\nWorker finished. Completed {experiments_completed} experiments")
+    if args.processes > 1:
+        supervise(args)
+    else:
+        run_worker(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+-- Indice para la toma de experimentos por afinidad de instancia
+-- (DatabaseManager.get_pending_experiment con preferred_instance)
+-- Solo incluye los pendientes, por lo que se mantiene pequeno a medida que la cola avanza
+
+CREATE INDEX IF NOT EXISTS idx_ejecucion_pendiente_instancia
+    ON datos_ejecucion (((parametros::jsonb -> 'paramsProblem' ->> 'instance_name')), id)
+    WHERE estado = 'pendiente';
+
+-- Pendiente mas antiguo (toma sin afinidad)
+CREATE INDEX IF NOT EXISTS idx_ejecucion_pendiente_id
+    ON datos_ejecucion (id)
+    WHERE estado = 'pendiente';
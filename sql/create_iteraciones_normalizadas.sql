@@ -0,0 +1,55 @@
+-- Tabla con los datos por iteracion ya parseados (post_processor.py --f-2)
+-- Una fila por fila de datos_iteracion, con los campos del JSON
+-- parametros_iteracion en columnas tipadas, o por iteracion de la
+-- telemetria de telemetria_ejecucion (worker.py --telemetry blob)
+
+CREATE TABLE IF NOT EXISTS iteraciones_normalizadas (
+    -- Mismo id que en datos_iteracion; negativo para las filas expandidas de
+    -- telemetria_ejecucion: -(id_ejecucion * 2^32 + numero_iteracion)
+    id BIGINT PRIMARY KEY,
+    id_ejecucion INTEGER NOT NULL REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    numero_iteracion INTEGER,
+    
+    fitness DOUBLE PRECISION,
+    clock_time DOUBLE PRECISION,
+    process_time DOUBLE PRECISION,
+    ds VARCHAR(50),
+    
+    -- Diversidades (mismo orden que resultados_normalizados)
+    diversidad_0 DOUBLE PRECISION,  -- DimensionalHussain
+    diversidad_1 DOUBLE PRECISION,  -- PesosDeInercia
+    diversidad_2 DOUBLE PRECISION,  -- LeungGaoXu
+    diversidad_3 DOUBLE PRECISION,  -- Entropica
+    diversidad_4 DOUBLE PRECISION,  -- Hamming
+    diversidad_5 DOUBLE PRECISION,  -- MomentoDeInercia
+    
+    -- Porcentaje de exploracion segun cada diversidad
+    porcentaje_explor_0 DOUBLE PRECISION,
+    porcentaje_explor_1 DOUBLE PRECISION,
+    porcentaje_explor_2 DOUBLE PRECISION,
+    porcentaje_explor_3 DOUBLE PRECISION,
+    porcentaje_explor_4 DOUBLE PRECISION,
+    porcentaje_explor_5 DOUBLE PRECISION,
+    
+    -- Solo SCP: columnas agregadas (y, con repairType 3, quitadas) por la
+    -- reparacion en la iteracion; las ejecuciones antiguas guardaban siempre 0
+    num_reparaciones INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_iteraciones_norm_ejecucion
+    ON iteraciones_normalizadas(id_ejecucion, numero_iteracion);
+
+-- Avance de las fases incrementales del post-procesador (marca de agua):
+-- fase 2 usa el ultimo id de datos_iteracion; fase 1 y fase_2_telemetria el ultimo
+-- (fin, id) de datos_ejecucion
+CREATE TABLE IF NOT EXISTS estado_postproceso (
+    fase VARCHAR(20) PRIMARY KEY,
+    ultimo_id BIGINT NOT NULL DEFAULT 0,
+    ultimo_fin TIMESTAMP,
+    actualizado TIMESTAMP DEFAULT NOW()
+);
+
+-- Busqueda de la fase 1 incremental (terminados despues de la marca)
+CREATE INDEX IF NOT EXISTS idx_ejecucion_terminado_fin
+    ON datos_ejecucion (fin, id)
+    WHERE estado = 'terminado';
@@ -0,0 +1,96 @@
+-- Esquema para el backend SQLite (database.ini: [database] backend = sqlite)
+-- DatabaseManager lo ejecuta al abrir la base, por lo que solo crea lo que falta.
+-- Mismas tablas y columnas que en PostgreSQL; los JSON se guardan como TEXT
+-- y los blobs de telemetria como BLOB.
+
+CREATE TABLE IF NOT EXISTS datos_ejecucion (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre_algoritmo TEXT,
+    parametros TEXT,
+    estado TEXT,
+    inicio TIMESTAMP,
+    fin TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS datos_iteracion (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_ejecucion INTEGER NOT NULL REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    numero_iteracion INTEGER,
+    fitness_mejor TEXT,
+    parametros_iteracion TEXT
+);
+
+CREATE TABLE IF NOT EXISTS resultado_ejecucion (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_ejecucion INTEGER NOT NULL REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    fitness TEXT,
+    inicio TIMESTAMP,
+    fin TIMESTAMP,
+    mejor_solucion TEXT
+);
+
+CREATE TABLE IF NOT EXISTS telemetria_ejecucion (
+    id_ejecucion INTEGER PRIMARY KEY REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    formato TEXT NOT NULL,
+    iteraciones INTEGER NOT NULL,
+    datos BLOB NOT NULL,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS resultados_normalizados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_ejecucion INTEGER NOT NULL UNIQUE REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    algoritmo_mh TEXT,
+    algoritmo_ml TEXT,
+    problema TEXT,
+    instancia TEXT,
+    poblacion INTEGER,
+    iteraciones_totales INTEGER,
+    discretization_scheme TEXT,
+    reward_type TEXT,
+    fitness_final REAL,
+    tiempo_ejecucion_segundos REAL,
+    diversidad_0_promedio REAL,
+    diversidad_1_promedio REAL,
+    diversidad_2_promedio REAL,
+    diversidad_3_promedio REAL,
+    diversidad_4_promedio REAL,
+    diversidad_5_promedio REAL,
+    fecha_procesamiento TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS iteraciones_normalizadas (
+    id INTEGER PRIMARY KEY,
+    id_ejecucion INTEGER NOT NULL REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    numero_iteracion INTEGER,
+    fitness REAL,
+    clock_time REAL,
+    process_time REAL,
+    ds TEXT,
+    diversidad_0 REAL,
+    diversidad_1 REAL,
+    diversidad_2 REAL,
+    diversidad_3 REAL,
+    diversidad_4 REAL,
+    diversidad_5 REAL,
+    porcentaje_explor_0 REAL,
+    porcentaje_explor_1 REAL,
+    porcentaje_explor_2 REAL,
+    porcentaje_explor_3 REAL,
+    porcentaje_explor_4 REAL,
+    porcentaje_explor_5 REAL,
+    num_reparaciones INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS estado_postproceso (
+    fase TEXT PRIMARY KEY,
+    ultimo_id INTEGER NOT NULL DEFAULT 0,
+    ultimo_fin TIMESTAMP,
+    actualizado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_iteraciones_norm_ejecucion ON iteraciones_normalizadas(id_ejecucion, numero_iteracion);
+CREATE INDEX IF NOT EXISTS idx_iteracion_ejecucion ON datos_iteracion(id_ejecucion);
+CREATE INDEX IF NOT EXISTS idx_resultado_ejecucion ON resultado_ejecucion(id_ejecucion);
+CREATE INDEX IF NOT EXISTS idx_ejecucion_pendiente_id ON datos_ejecucion(id) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS idx_ejecucion_terminado_fin ON datos_ejecucion(fin, id) WHERE estado = 'terminado';
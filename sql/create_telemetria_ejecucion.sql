@@ -0,0 +1,13 @@
+-- Telemetria por iteracion en formato columnar comprimido
+-- Una fila por experimento con todas sus series (fitness, tiempos, DS,
+-- diversidades, reparaciones) como un blob np.savez_compressed.
+-- Se escribe con: python cli/worker.py --telemetry blob (o both)
+-- Se lee con: DatabaseManager.get_telemetry(id_ejecucion)
+
+CREATE TABLE IF NOT EXISTS telemetria_ejecucion (
+    id_ejecucion INTEGER PRIMARY KEY REFERENCES datos_ejecucion(id) ON DELETE CASCADE,
+    formato VARCHAR(20) NOT NULL,
+    iteraciones INTEGER NOT NULL,
+    datos BYTEA NOT NULL,
+    fecha TIMESTAMP DEFAULT NOW()
+);
@@ -2,6 +2,130 @@ import numpy as np
 from scipy import special as scyesp
 
 
+# Funciones de transferencia S, V, X y Z sobre un buffer de salida (out), sin
+# arreglos intermedios. Hacen las mismas operaciones en el mismo orden que las
+# expresiones originales, por lo que el resultado es identico bit a bit.
+
+def _sigmoide(factor, divisor=None):
+    """1 / (1 + exp(factor*x [/ divisor])), familias S (factor < 0) y X (factor > 0)."""
+    def transferencia(x, out):
+        np.multiply(x, factor, out=out)
+        if divisor is not None:
+            np.divide(out, divisor, out=out)
+        np.exp(out, out=out)
+        np.add(out, 1, out=out)
+        return np.divide(1, out, out=out)
+    return transferencia
+
+def _V1(x, out):
+    np.multiply(x, np.divide(np.sqrt(np.pi),2), out=out)
+    scyesp.erf(out, out=out)
+    return np.abs(out, out=out)
+
+def _V2(x, out):
+    np.tanh(x, out=out)
+    return np.abs(out, out=out)
+
+def _V3(x, out):
+    np.power(x, 2, out=out)
+    np.add(out, 1, out=out)
+    np.sqrt(out, out=out)
+    np.divide(x, out, out=out)
+    return np.abs(out, out=out)
+
+def _V4(x, out):
+    np.multiply(x, np.divide(np.pi,2), out=out)
+    np.arctan(out, out=out)
+    np.multiply(out, np.divide(2,np.pi), out=out)
+    return np.abs(out, out=out)
+
+def _Z(base):
+    """(1 - base**x) ** 0.5; nan para x > 0."""
+    def transferencia(x, out):
+        np.power(base, x, out=out)
+        np.subtract(1, out, out=out)
+        return np.power(out, 0.5, out=out)
+    return transferencia
+
+TRANSFERENCIAS = {
+    'S1': _sigmoide(-2), 'S2': _sigmoide(-1), 'S3': _sigmoide(-1, 2), 'S4': _sigmoide(-1, 3),
+    'V1': _V1, 'V2': _V2, 'V3': _V3, 'V4': _V4,
+    'X1': _sigmoide(2), 'X2': _sigmoide(1), 'X3': _sigmoide(1, 2), 'X4': _sigmoide(1, 3),
+    'Z1': _Z(2), 'Z2': _Z(5), 'Z3': _Z(8), 'Z4': _Z(20),
+}
+
+# Puntos de las tablas de TablaTransferencia
+PUNTOS_TABLA = 1 << 16
+
+
+class TablaTransferencia:
+    """
+    Funcion de transferencia precalculada en [lb, ub] con interpolacion lineal.
+    Evita erf/exp/tanh/arctan/power por elemento en cada iteracion. Los valores
+    fuera de [lb, ub] se calculan con la funcion exacta. En las Z la tabla
+    cubre [lb, min(ub, 0)], porque para x > 0 la funcion es nan.
+    El error maximo y la ganancia contra la funcion exacta se miden con
+    cli/benchmark.py transfer: conviene en las funciones caras (erf de V1, V3);
+    exp, tanh y arctan de NumPy suelen ser tan rapidos como la tabla.
+    Args:
+        transferFunction: Funcion de transferencia (S1..S4, V1..V4, X1..X4, Z1..Z4)
+        lb, ub: Rango de la tabla, normalmente los limites de la poblacion continua
+        puntos: Numero de puntos de la tabla
+    """
+    def __init__(self, transferFunction, lb, ub, puntos=PUNTOS_TABLA):
+        if transferFunction not in TRANSFERENCIAS:
+            raise ValueError(f"No hay tabla para la funcion de transferencia {transferFunction}")
+        self.funcion = TRANSFERENCIAS[transferFunction]
+        self.lb = float(lb)
+        self.ub = float(ub)
+        self.tope = min(self.ub, 0.0) if transferFunction[0] == 'Z' else self.ub
+        if not self.lb < self.tope:
+            raise ValueError(f"Rango invalido para la tabla de {transferFunction}: [{lb}, {ub}]")
+
+        x = np.linspace(self.lb, self.tope, puntos)
+        self.valores = self.funcion(x, np.empty(puntos))
+        self.pendientes = np.append(np.diff(self.valores), 0.0)
+        self.escala = (puntos - 1) / (self.tope - self.lb)
+
+    def evaluar(self, matrixCont, out, fraccion, indices):
+        """
+        Escribe la funcion interpolada de matrixCont en out.
+        fraccion (float64) e indices (intp) son buffers de la misma forma.
+        """
+        np.subtract(matrixCont, self.lb, out=fraccion)
+        np.multiply(fraccion, self.escala, out=fraccion)
+        np.clip(fraccion, 0, len(self.valores) - 1, out=fraccion)
+        # fraccion >= 0: truncar es floor
+        np.copyto(indices, fraccion, casting='unsafe')
+        np.subtract(fraccion, indices, out=fraccion)
+        np.take(self.pendientes, indices, out=out, mode='clip')
+        np.multiply(fraccion, out, out=fraccion)
+        np.take(self.valores, indices, out=out, mode='clip')
+        np.add(out, fraccion, out=out)
+
+        # Lo normal es que toda la poblacion este en [lb, ub]: basta con min y max
+        minimo, maximo = np.min(matrixCont), np.max(matrixCont)
+        if minimo >= self.lb and maximo <= self.tope:
+            return out
+        if self.tope < self.ub:
+            # Z con x > 0
+            out[matrixCont > self.tope] = np.nan
+            fuera = (matrixCont < self.lb) | np.isnan(matrixCont)
+        else:
+            fuera = (matrixCont < self.lb) | (matrixCont > self.ub) | np.isnan(matrixCont)
+        if fuera.any():
+            out[fuera] = self.funcion(matrixCont[fuera], np.empty(np.count_nonzero(fuera)))
+        return out
+
+_TABLAS = {}
+
+def obtenerTabla(transferFunction, lb, ub, puntos=PUNTOS_TABLA):
+    """TablaTransferencia compartida por todos los DiscretizationScheme del proceso."""
+    clave = (transferFunction, float(lb), float(ub), puntos)
+    if clave not in _TABLAS:
+        _TABLAS[clave] = TablaTransferencia(transferFunction, lb, ub, puntos)
+    return _TABLAS[clave]
+
 
 class DiscretizationScheme:
     """
@@ -15,13 +139,16 @@ class DiscretizationScheme:
         SolutionRanking: Lista de indices ordenadas por fitness, en la posición 0 esta el best
         transferFunction: Funciones de transferencia (V1,..,V4, S1,..,S4)
         binarizationOperator: Operador de binarización (Standard, Complement, Elitist, Static, Roulette)
+        limites: (lb, ub) para usar TablaTransferencia en las familias S, V, X y Z (opcional)
     Returns:
         matrixBinOut: matriz binaria.
 
     Definiciones:
     - Para t>0, es decir, si matrixBin tiene datos, se utiliza el operador de binarización ingresado.
+    - Se crea una vez por experimento: actualizar() entrega la poblacion de cada iteracion
+      y cambiarEsquema() cambia la funcion de transferencia y el operador sin reconstruirlo.
     """
-    def __init__(self, matrixCont, matrixBin, SolutionRanking, transferFunction, binarizationOperator):
+    def __init__(self, matrixCont, matrixBin, SolutionRanking, transferFunction, binarizationOperator, limites=None):
         """
         Docstring for __init__
         Args:
@@ -30,72 +157,145 @@ class DiscretizationScheme:
             SolutionRanking: Lista de indices ordenadas por fitness, en la posición 0 esta el best
             TransferFunction: Funciones de transferencia (V1,..,V4, S1,..,S4)
             binarizationOperator: Operador de binarización (Standard, Complement, Elitist, Static, Roulette)
+            limites: (lb, ub) de la tabla de la funcion de transferencia; None usa la funcion exacta
         """
-        self.transferFunction = transferFunction
-        self.binarizationOperator = binarizationOperator
+        self.limites = limites
 
-        self.matrixCont = matrixCont
-        self.matrixBin = matrixBin
-        self.SolutionRanking = SolutionRanking
-        self.bestRow = np.argmin(SolutionRanking) 
-
-        #output
-        self.matrixProbT = np.zeros(self.matrixCont.shape)
-        self.matrixBinOut = np.zeros(self.matrixBin.shape)
-
-        # debug
-        self.matrixProbTAux = np.zeros(self.matrixCont.shape)
-        self.matrixBinOutAux = np.zeros(self.matrixBin.shape)
+        #output: la funcion de transferencia y la binarizacion escriben sobre estos buffers
+        self.matrixProbT = None
+        self.matrixBinOut = None
 
         #Constantes O1
         self.o1a= 0
         self.o1b= 1
         self.o1c= 1
         self.o1d= 0
-        
-        #Constante de Q-Shaped
-        self.xMax = np.max(0.5*self.matrixCont)
 
         self.uAlpha = 0.5 #*** Por definir como ingresar
         self.uBeta = 1.5 #*** Por definir como ingresar
 
+        # (transferFunction, binarizationOperator) -> metodos ya resueltos
+        self._esquemas = {}
+        self.cambiarEsquema(transferFunction, binarizationOperator)
+        self.actualizar(matrixCont, matrixBin, SolutionRanking)
+
+    # Tablas de despacho: nombres validos de cada parte del esquema
+    FUNCIONES = ('V1', 'V2', 'V3', 'V4', 'S1', 'S2', 'S3', 'S4', 'O1', 'O2', 'O3', 'O4',
+                 'Q1', 'Q2', 'Q3', 'Q4', 'U1', 'U2', 'U3', 'U4', 'U5', 'U6', 'U7', 'U8', 'U9',
+                 'Z1', 'Z2', 'Z3', 'Z4', 'X1', 'X2', 'X3', 'X4')
+    OPERADORES = ('Standard', 'Complement', 'Elitist', 'Static', 'ElitistRoulette')
+
+    def cambiarEsquema(self, transferFunction, binarizationOperator=None):
+        """
+        Cambia el esquema de discretizacion. Cada esquema se resuelve una sola vez
+        a sus metodos T_ y B_; despues cambiar de esquema es una busqueda en un dict.
+        Args:
+            transferFunction: Funcion de transferencia (FUNCIONES)
+            binarizationOperator: Operador de binarizacion (OPERADORES), None si solo se usa appliedTransferFunction
+        """
+        clave = (transferFunction, binarizationOperator)
+        if clave not in self._esquemas:
+            if transferFunction not in self.FUNCIONES:
+                raise ValueError(f"Funcion de transferencia desconocida: {transferFunction}")
+            if binarizationOperator is not None and binarizationOperator not in self.OPERADORES:
+                raise ValueError(f"Operador de binarizacion desconocido: {binarizationOperator}")
+            self._esquemas[clave] = (
+                getattr(self, f'T_{transferFunction}'),
+                None if binarizationOperator is None else getattr(self, f'B_{binarizationOperator}')
+            )
+        self.transferFunction, self.binarizationOperator = clave
+        self._transferir, self._binarizar = self._esquemas[clave]
+
+    def actualizar(self, matrixCont, matrixBin, SolutionRanking, esquema=None):
+        """
+        Entrega la poblacion de la iteracion, para usar el mismo objeto en todo el experimento.
+        Los buffers solo se crean de nuevo si cambia la forma de la poblacion.
+        Args:
+            matrixCont: Matriz de continuos
+            matrixBin: matriz de poblacion binarizada en t-1.
+            SolutionRanking: Lista de indices ordenadas por fitness, en la posición 0 esta el best
+            esquema: "TF,BO" (o "TF") para cambiar tambien el esquema; None mantiene el actual
+        """
+        self.matrixCont = matrixCont
+        self.matrixBin = matrixBin
+        self.SolutionRanking = SolutionRanking
+        self.bestRow = np.argmin(SolutionRanking)
+        self._xMax = None
+        if esquema is not None:
+            self.cambiarEsquema(*esquema.split(','))
+
+        if self.matrixProbT is None or self.matrixProbT.shape != np.shape(matrixCont):
+            self.matrixProbT = np.zeros(np.shape(matrixCont))
+            self.matrixBinOut = np.empty(np.shape(matrixBin), dtype=np.int64)
+            # auxiliares, se crean al usarlos
+            self._condicion = None
+            self._fraccion = None
+            self._indices = None
+
+    @property
+    def xMax(self):
+        #Constante de Q-Shaped, se calcula solo si se usa una Q
+        if self._xMax is None:
+            self._xMax = 0.5*np.max(self.matrixCont)
+        return self._xMax
+
+    def _transferencia(self, transferFunction):
+        """Escribe la funcion de transferencia (S, V, X o Z) en el buffer matrixProbT."""
+        if self.limites is None:
+            TRANSFERENCIAS[transferFunction](self.matrixCont, self.matrixProbT)
+        else:
+            if self._fraccion is None:
+                self._fraccion = np.empty(self.matrixCont.shape)
+                self._indices = np.empty(self.matrixCont.shape, dtype=np.intp)
+            obtenerTabla(transferFunction, *self.limites).evaluar(
+                self.matrixCont, self.matrixProbT, self._fraccion, self._indices
+            )
+
+    def _superaAzar(self, igual=False):
+        """ProbT > Rand() (o >=) en un buffer booleano; Rand() se sortea igual que antes."""
+        matrixRand = np.random.uniform(low=0.0,high=1.0,size=self.matrixCont.shape)
+        if self._condicion is None:
+            self._condicion = np.empty(self.matrixCont.shape, dtype=bool)
+        comparacion = np.greater_equal if igual else np.greater
+        return comparacion(self.matrixProbT, matrixRand, out=self._condicion)
 
     #Funciones de Transferencia
     def T_V1(self):
-        self.matrixProbT = np.abs(scyesp.erf(np.divide(np.sqrt(np.pi),2)*self.matrixCont))
+        self._transferencia('V1')
 
     def T_V2(self):
-        self.matrixProbT = np.abs(np.tanh(self.matrixCont))
+        self._transferencia('V2')
 
     def T_V3(self):
-        self.matrixProbT = np.abs(np.divide(self.matrixCont, np.sqrt(1+np.power(self.matrixCont,2))))
+        self._transferencia('V3')
 
     def T_V4(self):
-        self.matrixProbT = np.abs( np.divide(2,np.pi)*np.arctan( np.divide(np.pi,2)*self.matrixCont ))
+        self._transferencia('V4')
 
     def T_S1(self):
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(-2*self.matrixCont) ) )
+        self._transferencia('S1')
 
     def T_S2(self):
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(-1*self.matrixCont) ) )
+        self._transferencia('S2')
 
     def T_S3(self):
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(np.divide(-1*self.matrixCont,2) ) ))
+        self._transferencia('S3')
 
     def T_S4(self):
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(np.divide(-1*self.matrixCont,3) ) ))
+        self._transferencia('S4')
 
     def T_O1(self):
-        self.matrixProbT = np.sin(np.multiply(np.multiply(np.multiply(np.multiply(2,np.pi),(self.matrixCont - self.o1a)),self.o1b),np.cos(np.multiply(np.multiply(np.multiply(2,np.pi),(self.matrixCont - self.o1a)),self.o1c))))+ self.o1d
+        self.matrixProbT[...] = np.sin(np.multiply(np.multiply(np.multiply(np.multiply(2,np.pi),(self.matrixCont - self.o1a)),self.o1b),np.cos(np.multiply(np.multiply(np.multiply(2,np.pi),(self.matrixCont - self.o1a)),self.o1c))))+ self.o1d
 
     def T_O2(self): #*** solamente entregaría 1 o 0
-        self.matrixProbT =np.trunc(np.abs(np.mod(self.matrixCont,2)))
+        np.trunc(np.abs(np.mod(self.matrixCont,2)), out=self.matrixProbT)
 
     def T_O3(self):
-        self.matrixProbT = np.divide((self.matrixCont + np.min(self.matrixCont)),(np.abs(np.min(self.matrixCont))+np.max(self.matrixCont)))
+        np.divide((self.matrixCont + np.min(self.matrixCont)),(np.abs(np.min(self.matrixCont))+np.max(self.matrixCont)), out=self.matrixProbT)
 
     def T_O4(self): #*** está fuera del dominio [0,1]
-        self.matrixProbT = self.matrixCont
+        # Copia: el buffer no puede ser la matriz del llamador, otra funcion lo reescribiria
+        np.copyto(self.matrixProbT, self.matrixCont)
 
     def T_Q1(self): 
         self.matrixProbT[self.matrixCont < self.xMax] = np.abs(np.divide(self.matrixCont[self.matrixCont < self.xMax],np.max(0.5*self.matrixCont[self.matrixCont < self.xMax])))
@@ -117,85 +317,92 @@ class DiscretizationScheme:
     #     self.matrixProbT = self.uAlpha*(np.power(np.abs(self.matrixCont),self.uBeta))
 
     def T_U1(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 0.5*(np.power(np.abs(self.matrixCont),1.5))
+        np.power(np.abs(self.matrixCont),1.5, out=self.matrixProbT)
+        np.multiply(0.5, self.matrixProbT, out=self.matrixProbT)
 
     def T_U2(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 0.5*(np.power(np.abs(self.matrixCont),2.75))
+        np.power(np.abs(self.matrixCont),2.75, out=self.matrixProbT)
+        np.multiply(0.5, self.matrixProbT, out=self.matrixProbT)
 
     def T_U3(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 0.5*(np.power(np.abs(self.matrixCont),4))
+        np.power(np.abs(self.matrixCont),4, out=self.matrixProbT)
+        np.multiply(0.5, self.matrixProbT, out=self.matrixProbT)
 
     def T_U4(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 1.25*(np.power(np.abs(self.matrixCont),1.5))
+        np.power(np.abs(self.matrixCont),1.5, out=self.matrixProbT)
+        np.multiply(1.25, self.matrixProbT, out=self.matrixProbT)
 
     def T_U5(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 1.25*(np.power(np.abs(self.matrixCont),2.75))
+        np.power(np.abs(self.matrixCont),2.75, out=self.matrixProbT)
+        np.multiply(1.25, self.matrixProbT, out=self.matrixProbT)
 
     def T_U6(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 1.25*(np.power(np.abs(self.matrixCont),4))
+        np.power(np.abs(self.matrixCont),4, out=self.matrixProbT)
+        np.multiply(1.25, self.matrixProbT, out=self.matrixProbT)
 
     def T_U7(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 2*(np.power(np.abs(self.matrixCont),1.5))
+        np.power(np.abs(self.matrixCont),1.5, out=self.matrixProbT)
+        np.multiply(2, self.matrixProbT, out=self.matrixProbT)
 
     def T_U8(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 2*(np.power(np.abs(self.matrixCont),2.75))
+        np.power(np.abs(self.matrixCont),2.75, out=self.matrixProbT)
+        np.multiply(2, self.matrixProbT, out=self.matrixProbT)
 
     def T_U9(self): #Hay que ver como definir como ingresar self.uAlpha y self.uBeta
-        self.matrixProbT = 2*(np.power(np.abs(self.matrixCont),4))
+        np.power(np.abs(self.matrixCont),4, out=self.matrixProbT)
+        np.multiply(2, self.matrixProbT, out=self.matrixProbT)
 
     def T_Z1(self): 
-        self.matrixProbT = np.power((1-np.power(2,self.matrixCont)),0.5)
+        self._transferencia('Z1')
 
     def T_Z2(self): 
-        self.matrixProbT = np.power((1-np.power(5,self.matrixCont)),0.5)
+        self._transferencia('Z2')
 
     def T_Z3(self): 
-        self.matrixProbT = np.power((1-np.power(8,self.matrixCont)),0.5)
+        self._transferencia('Z3')
 
     def T_Z4(self): 
-        self.matrixProbT = np.power((1-np.power(20,self.matrixCont)),0.5)
+        self._transferencia('Z4')
 
     def T_X1(self): #funciones de transferencias S1 invertidad
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(2*self.matrixCont) ) )
+        self._transferencia('X1')
 
     def T_X2(self): #funciones de transferencias S2 invertidad
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(1*self.matrixCont) ) )
+        self._transferencia('X2')
 
     def T_X3(self): #funciones de transferencias S3 invertidad
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(np.divide(1*self.matrixCont,2) ) ))
+        self._transferencia('X3')
 
     def T_X4(self): #funciones de transferencias S4 invertidad
-        self.matrixProbT = np.divide(1, ( 1 + np.exp(np.divide(1*self.matrixCont,3) ) ))
+        self._transferencia('X4')
 
     #Binarization
     def B_Standard(self):
-        matrixRand = np.random.uniform(low=0.0,high=1.0,size=self.matrixCont.shape)
-        self.matrixBinOut = np.greater(self.matrixProbT,matrixRand).astype(int)
+        np.copyto(self.matrixBinOut, self._superaAzar())
 
     def B_Complement(self):
-        matrixRand = np.random.uniform(low=0.0,high=1.0,size=self.matrixCont.shape)
-        matrixComplement = np.abs(1-self.matrixBin)
-        self.matrixBinOut = np.multiply(np.greater_equal(self.matrixProbT,matrixRand).astype(int),matrixComplement)
+        np.copyto(self.matrixBinOut, self._superaAzar(igual=True))
+        # multiplicar por el complemento de una matriz binaria = apagar donde habia un 1
+        self.matrixBinOut[self.matrixBin != 0] = 0
 
     def B_Elitist(self):
-        matrixRand = np.random.uniform(low=0.0,high=1.0,size=self.matrixCont.shape)
         # greater, porque es estricto en la ecuacion.
-        conditionMatrix = np.greater(self.matrixProbT,matrixRand)
+        conditionMatrix = self._superaAzar()
         #todo: validar que el index exista
-        bestIndividual = self.matrixBin[self.bestRow]
+        bestIndividual = np.array(self.matrixBin[self.bestRow])
         # si ProbT > Rand() , then bestIndividualBin, else 0
-        self.matrixBinOut = np.where(conditionMatrix==True,bestIndividual,0)
+        self._copiaDonde(bestIndividual, conditionMatrix)
 
     def B_Static(self):
         alfa = 1/3
-        self.matrixBinOut[self.matrixProbT<=alfa] = 0
-        self.matrixBinOut[(self.matrixProbT > alfa) & (self.matrixProbT <= 0.5*(1+alfa))] = self.matrixBin[(self.matrixProbT > alfa) & (self.matrixProbT <= 0.5*(1+alfa))]
+        self.matrixBinOut[...] = 0
+        np.copyto(self.matrixBinOut, self.matrixBin, casting='unsafe',
+                  where=(self.matrixProbT > alfa) & (self.matrixProbT <= 0.5*(1+alfa)))
         self.matrixBinOut[self.matrixProbT>=0.5*(1+alfa)] = 1
 
     def B_ElitistRoulette(self):
-        matrixRand = np.random.uniform(low=0.0,high=1.0,size=self.matrixCont.shape)
         #greater, porque es estricto en la ecuacion.
-        conditionMatrix = np.greater(self.matrixProbT,matrixRand)
+        conditionMatrix = self._superaAzar()
         #todo: validar que el index exista
         alfa = 0.2
         # condicion sum()==0, para el caso en que entregamos lista de rank con [0 0 0 0 0 0 0 0 ... 0 0 0 0] -> cuando generamos poblacion inicial
@@ -205,148 +412,30 @@ class DiscretizationScheme:
             BestSolutionRaking = int(self.SolutionRanking.shape[0] * alfa)
             random = np.random.randint(low = 0, high = BestSolutionRaking)
             bestIndividual = self.matrixBin[random]
-        self.matrixBinOut = np.where(conditionMatrix==True,bestIndividual,0)
-
-    def binariza(self):
-        if self.transferFunction == 'V1':
-            self.T_V1()
-
-        if self.transferFunction == 'V2':
-            self.T_V2()
-
-        if self.transferFunction == 'V3':
-            self.T_V3()
-
-        if self.transferFunction == 'V4':
-            self.T_V4()
-
-        if self.transferFunction == 'S1':
-            self.T_S1()
-
-        if self.transferFunction == 'S2':
-            self.T_S2()
-
-        if self.transferFunction == 'S3':
-            self.T_S3()
-
-        if self.transferFunction == 'S4':
-            self.T_S4()
+        self._copiaDonde(np.array(bestIndividual), conditionMatrix)
 
-        if self.transferFunction == 'O1':
-            self.T_O1()
-
-        if self.transferFunction == 'Z1':
-            self.T_Z1()
-
-        if self.transferFunction == 'Z2':
-            self.T_Z2()
-
-        if self.transferFunction == 'Z3':
-            self.T_Z3()
-
-        if self.transferFunction == 'Z4':
-            self.T_Z4()
-
-        if self.transferFunction == 'X1':
-            self.T_X1()
-
-        if self.transferFunction == 'X2':
-            self.T_X2()
-
-        if self.transferFunction == 'X3':
-            self.T_X3()
-
-        if self.transferFunction == 'X4':
-            self.T_X4()
-
-        if self.binarizationOperator == 'Standard':
-            self.B_Standard()
-
-        if self.binarizationOperator == 'Complement':
-            self.B_Complement()
-
-        if self.binarizationOperator == 'Elitist':
-            self.B_Elitist()
-
-        if self.binarizationOperator == 'Static':
-            self.B_Static()
-
-        if self.binarizationOperator == 'ElitistRoulette':
-            self.B_ElitistRoulette()
+    def _copiaDonde(self, individuo, condicion):
+        """matrixBinOut = individuo donde condicion, 0 en el resto."""
+        self.matrixBinOut[...] = 0
+        np.copyto(self.matrixBinOut, individuo, casting='unsafe', where=condicion)
 
+    def binariza(self):
+        """
+        Aplica la funcion de transferencia y el operador del esquema actual.
+        Returns:
+            matrixBinOut: matriz binaria. Es un buffer del objeto: la siguiente llamada lo reescribe.
+        """
+        if self._binarizar is None:
+            raise ValueError("El esquema no tiene operador de binarizacion")
+        self._transferir()
+        self._binarizar()
         return self.matrixBinOut
 
     def appliedTransferFunction(self):
-        if self.transferFunction == 'V1':
-            self.T_V1()
-
-        if self.transferFunction == 'V2':
-            self.T_V2()
-
-        if self.transferFunction == 'V3':
-            self.T_V3()
-
-        if self.transferFunction == 'V4':
-            self.T_V4()
-
-        if self.transferFunction == 'S1':
-            self.T_S1()
-
-        if self.transferFunction == 'S2':
-            self.T_S2()
-
-        if self.transferFunction == 'S3':
-            self.T_S3()
-
-        if self.transferFunction == 'S4':
-            self.T_S4()
-
-        if self.transferFunction == 'O1':
-            self.T_O1()
-
-        if self.transferFunction == 'O2':
-            self.T_O2()
-
-        if self.transferFunction == 'O3':
-            self.T_O3()
-
-        if self.transferFunction == 'O4':
-            self.T_O4()
-
-        if self.transferFunction == 'Q1':
-            self.T_Q1()
-
-        if self.transferFunction == 'Q2':
-            self.T_Q2()
-
-        if self.transferFunction == 'Q3':
-            self.T_Q3()
-
-        if self.transferFunction == 'Q4':
-            self.T_Q4()
-
-        if self.transferFunction == 'Z1':
-            self.T_Z1()
-
-        if self.transferFunction == 'Z2':
-            self.T_Z2()
-
-        if self.transferFunction == 'Z3':
-            self.T_Z3()
-
-        if self.transferFunction == 'Z4':
-            self.T_Z4()
-
-        if self.transferFunction == 'X1':
-            self.T_X1()
-
-        if self.transferFunction == 'X2':
-            self.T_X2()
-
-        if self.transferFunction == 'X3':
-            self.T_X3()
-
-        if self.transferFunction == 'X4':
-            self.T_X4()
-
+        """
+        Aplica solo la funcion de transferencia del esquema actual.
+        Returns:
+            matrixProbT: probabilidades. La siguiente llamada puede reescribirla.
+        """
+        self._transferir()
         return self.matrixProbT
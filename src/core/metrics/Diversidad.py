@@ -1,133 +1,129 @@
 import numpy as np
 import math
 
+# Orden de las diversidades que devuelven CalcularDiversidades y ObtenerDiversidadYEstado
+NOMBRES_DIVERSIDADES = ('DimensionalHussain', 'PesosDeInercia', 'LeungGaoXu',
+                        'Entropica', 'Hamming', 'MomentoDeInercia')
+# Diversidad de la que sale el estado que usan los agentes de ML (new_states[0])
+DIVERSIDAD_ESTADO = 0
+
 #action : esquema de discretizacion DS
-def MomentoDeInercia(Poblacion):
+def FrecuenciasUnos(Poblacion):
+  """
+  Cuenta, por dimension, cuantos individuos tienen un valor distinto de 0.
+  Es la unica pasada sobre la poblacion que necesitan Hamming, Entropica y
+  LeungGaoXu; la frecuencia de ceros es N menos este conteo.
+  Args:
+    Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+  Returns:
+    np.array: Conteo de unos de cada dimensión.
+  """
+
+  return np.count_nonzero(Poblacion, axis=0)
+
+def _SumaSecuencial(terminos0, terminos1):
+  """
+  Suma terminos0[0] + terminos1[0] + terminos0[1] + ... en ese orden, como
+  los ciclos originales, para que el redondeo sea exactamente el mismo.
+  """
+
+  if len(terminos0) == 0:
+    return 0
+  return np.cumsum(np.column_stack((terminos0, terminos1)).ravel())[-1]
+
+def _Desviaciones(Poblacion, promedio=None):
+  """
+  Matriz de desviaciones al cuadrado respecto del promedio de cada dimensión,
+  compartida por MomentoDeInercia y PesosDeInercia.
+  """
+
+  if promedio is None:
+    promedio = np.mean(Poblacion, axis=0)
+  return np.power((Poblacion - promedio),2)
+
+def MomentoDeInercia(Poblacion, desviaciones=None):
   """
   Calcula el Momento de Inercia de una poblacion
   Args:
     Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+    desviaciones (np.array, opcional): Resultado de _Desviaciones, si ya se calculó.
   Returns:
     float: Valor del Momento de Inercia de la población.
   """
 
-  Diversidad = 0
-  N = Poblacion.shape[0]
-  D = Poblacion.shape[1]
-  promedio = np.mean(Poblacion, axis=0)
-  MatrizDiversidad = np.power((Poblacion - promedio),2)
+  if desviaciones is None:
+    desviaciones = _Desviaciones(Poblacion)
 
-  Diversidad = np.sum(MatrizDiversidad)
+  Diversidad = np.sum(desviaciones)
 
   return Diversidad
 
-def Hamming(Poblacion):
+def Hamming(Poblacion, unos=None):
   """
   Calcula la diversidad de Hamming de una poblacion. 
   Args:
     Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+    unos (np.array, opcional): Resultado de FrecuenciasUnos, si ya se calculó.
   Returns:      
     float: Valor de la diversidad de Hamming de la población.
   """
 
-  Diversidad = 0
-  frecuencias0 = []
-  frecuencias1 = []
-  
-  for d in range(len(Poblacion[0])):
-    frecuencia0 = 0
-    frecuencia1 = 0
-    
-    for p in range(len(Poblacion)):
-      if Poblacion[p][d] == 0:
-        frecuencia0 = frecuencia0 + 1
-      else:
-        frecuencia1 = frecuencia1 + 1
-    
-    frecuencias0.append(frecuencia0)
-    frecuencias1.append(frecuencia1)
+  n = len(Poblacion)
+  if unos is None:
+    unos = FrecuenciasUnos(Poblacion)
 
-  sumatoria = 0
-  for d in range(len(Poblacion[0])):
-    n = len(Poblacion)
-    sumatoria = sumatoria + (frecuencias0[d]/n) * (1 - (frecuencias0[d]/n))
-    sumatoria = sumatoria + (frecuencias1[d]/n) * (1 - (frecuencias1[d]/n))
+  # Solo hay n + 1 frecuencias posibles: se evalua el termino una vez por conteo
+  p = np.arange(n + 1) / n
+  termino = p * (1 - p)
+  sumatoria = _SumaSecuencial(termino[n - unos], termino[unos])
 
-  Diversidad = ((len(Poblacion)**2) / (2 * len(Poblacion[0]))) * sumatoria
+  Diversidad = ((n**2) / (2 * len(Poblacion[0]))) * sumatoria
 
   return Diversidad
 
-def Entropica(Poblacion):
+def Entropica(Poblacion, unos=None):
   """
   Calcula la diversidad entropica de una poblacion.
   Args:
       Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+      unos (np.array, opcional): Resultado de FrecuenciasUnos, si ya se calculó.
 
   Returns:      
       float: Valor de la diversidad entropica de la población.
   """
-  Diversidad = 0
-  frecuencias0 = []
-  frecuencias1 = []
-  
-  for d in range(len(Poblacion[0])):
-    frecuencia0 = 0
-    frecuencia1 = 0
-    
-    for p in range(len(Poblacion)):
-      if Poblacion[p][d] == 0:
-        frecuencia0 = frecuencia0 + 1
-      else:
-        frecuencia1 = frecuencia1 + 1
-    
-    frecuencias0.append(frecuencia0)
-    frecuencias1.append(frecuencia1)
+  n = len(Poblacion)
+  if unos is None:
+    unos = FrecuenciasUnos(Poblacion)
 
-  sumatoria = 0
-  for d in range(len(Poblacion[0])):
-    n = len(Poblacion)
-    if frecuencias0[d] != 0 and frecuencias1[d] != 0:
-      sumatoria = sumatoria + (frecuencias0[d]/n) * (math.log(frecuencias0[d]/n))
-      sumatoria = sumatoria + (frecuencias1[d]/n) * (math.log(frecuencias1[d]/n))
+  # p*log(p) por conteo posible; 0 para el conteo 0 (dimensión sin aporte)
+  termino = np.zeros(n + 1)
+  for frecuencia in range(1, n + 1):
+    termino[frecuencia] = (frecuencia/n) * (math.log(frecuencia/n))
+  mixtas = (unos != 0) & (unos != n)
+  sumatoria = _SumaSecuencial(termino[n - unos[mixtas]], termino[unos[mixtas]])
 
   Diversidad = (-1 / (len(Poblacion[0]))) * sumatoria
 
   return Diversidad
 
 
-def LeungGaoXu(Poblacion):
+def LeungGaoXu(Poblacion, unos=None):
   """
   Calcula la métrica de diversidad Leung-Gao-Xu (LGX) para una población.
   Esta métrica evalúa la uniformidad de las soluciones a lo largo del frente 
   de Pareto (o las soluciones ordenadas). Una mayor diversidad indica una mejor distribución de soluciones.
   Args:
       Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+      unos (np.array, opcional): Resultado de FrecuenciasUnos, si ya se calculó.
   Returns:
       float: Valor de la diversidad de Leung Gao Xu de la población.
   """
-  Diversidad = 0
-  frecuencias0 = []
-  frecuencias1 = []
   n = len(Poblacion)
-  for d in range(len(Poblacion[0])):
-    frecuencia0 = 0
-    frecuencia1 = 0
-    
-    for p in range(len(Poblacion)):
-      if Poblacion[p][d] == 0:
-        frecuencia0 = frecuencia0 + 1
-      else:
-        frecuencia1 = frecuencia1 + 1
-    
-    frecuencias0.append(frecuencia0/n)
-    frecuencias1.append(frecuencia1/n)
+  if unos is None:
+    unos = FrecuenciasUnos(Poblacion)
 
-  sumatoria = 0
-  for d in range(len(Poblacion[0])):
-    
-    sumatoria = sumatoria + g(frecuencias0[d]) * g(1- frecuencias0[d])
-
-  Diversidad =  sumatoria
+  # g(f0) * g(1 - f0) vale 1 si la dimensión tiene ceros y unos, y 0 si no
+  Diversidad = float(np.count_nonzero((unos != 0) & (unos != n)))
 
   return Diversidad
 
@@ -163,47 +159,224 @@ def Dimensional(Poblacion):
 
   return Diversidad
 
-def PesosDeInercia(Poblacion):
+def PesosDeInercia(Poblacion, desviaciones=None):
   """
   Calcula la diversidad de Pesos de Inercia de una poblacion
   Args:
       Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+      desviaciones (np.array, opcional): Resultado de _Desviaciones, si ya se calculó.
   Returns:
       float: Valor de la diversidad de Pesos de Inercia de la población.
   """
 
-  Pob = Poblacion
-  N = Pob.shape[0]
-  D = Pob.shape[1]
-  promedio = np.mean(Poblacion, axis=0)
+  N = Poblacion.shape[0]
+  if desviaciones is None:
+    desviaciones = _Desviaciones(Poblacion)
   
-  MatrizDiversidad = np.divide((np.sqrt(np.sum((np.power((Pob - promedio),2)), axis=1))),N)
+  MatrizDiversidad = np.divide((np.sqrt(np.sum(desviaciones, axis=1))),N)
   Diversidad = np.sum(MatrizDiversidad)
 
   return Diversidad
 
-def DimensionalHussain(Poblacion):
+def DimensionalHussain(Poblacion, promedio=None):
   """
   Suma normalizada de diferencias absolutas entre medias y población, dividida por N y D
   Args:
       Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+      promedio (np.array, opcional): Promedio de cada dimensión, si ya se calculó.
       
   Returns:
       float: Valor de la diversidad dimensional de Hussain de la población.
   """
 
-  Pob = np.array(Poblacion)
+  Pob = np.asarray(Poblacion)
   N = Pob.shape[0]
   D = Pob.shape[1]
-  Medias = np.mean(Poblacion, axis=0)
+  if promedio is None:
+    promedio = np.mean(Pob, axis=0)
   
-  MatrizDiversidad = np.divide(np.divide(np.abs(Medias - Pob),N),D)
+  MatrizDiversidad = np.divide(np.divide(np.abs(promedio - Pob),N),D)
     
   Diversidad = np.sum(MatrizDiversidad)
 
   return Diversidad
 
-def ObtenerDiversidadYEstado(Poblacion,maxDiversidades):
+def CalcularDiversidades(Poblacion, indices=None):
+  """
+  Calcula las 6 diversidades de ObtenerDiversidadYEstado con una sola pasada
+  de conteo de unos por dimensión y un solo promedio, compartidos por todas.
+  Args:
+      Poblacion (np.array): Matriz de población donde cada fila es un individuo y cada columna una dimensión.
+      indices (iterable, opcional): Posiciones de las diversidades a calcular. Por defecto todas.
+  Returns:
+      list: [DimensionalHussain, PesosDeInercia, LeungGaoXu, Entropica, Hamming, MomentoDeInercia],
+            con NaN en las que no se calcularon.
+  """
+
+  indices = set(range(len(NOMBRES_DIVERSIDADES)) if indices is None else indices)
+  Pob = np.asarray(Poblacion)
+  # Solo se calculan los datos compartidos que usa alguna diversidad pedida
+  unos = FrecuenciasUnos(Pob) if indices & {2, 3, 4} else None
+  promedio = np.mean(Pob, axis=0) if indices & {0, 1, 5} else None
+  desviaciones = _Desviaciones(Pob, promedio) if indices & {1, 5} else None
+
+  calculos = [
+    lambda: DimensionalHussain(Pob, promedio), #0
+    lambda: PesosDeInercia(Pob, desviaciones), #1
+    lambda: LeungGaoXu(Pob, unos), #2
+    lambda: Entropica(Pob, unos), #3
+    lambda: Hamming(Pob, unos), #4
+    lambda: MomentoDeInercia(Pob, desviaciones), #5
+  ]
+  return [calculo() if i in indices else np.nan for i, calculo in enumerate(calculos)]
+
+class PlanDiversidades:
+  """
+  Decide qué diversidades se calculan en cada iteración de un experimento.
+
+  Se configura con claves opcionales de paramsML:
+    diversidades: Índices o nombres (NOMBRES_DIVERSIDADES) de las medidas a
+                  calcular. Por defecto las 6. Las demás quedan en NaN.
+    pasoDiversidades: Las medidas se calculan cada este número de iteraciones
+                      y entre medio conservan su último valor. Por defecto 1.
+    estadoCadaIteracion: Si la diversidad del estado (DIVERSIDAD_ESTADO) se
+                         calcula en todas las iteraciones aunque el resto se
+                         muestree. Por defecto True.
+  La diversidad del estado siempre se incluye, porque de ella depende el agente.
+  """
+
+  def __init__(self, paramsML=None):
+    paramsML = paramsML or {}
+    seleccion = paramsML.get('diversidades')
+    if seleccion is None:
+      seleccion = range(len(NOMBRES_DIVERSIDADES))
+    self.seleccion = sorted({IndiceDiversidad(medida) for medida in seleccion} | {DIVERSIDAD_ESTADO})
+    self.paso = max(1, int(paramsML.get('pasoDiversidades', 1)))
+    self.estadoCadaIteracion = bool(paramsML.get('estadoCadaIteracion', True))
+
+  def indices(self, iteracion):
+    """
+    Returns:
+      list: Posiciones de las diversidades a calcular en la iteración dada.
+    """
+    if iteracion % self.paso == 0:
+      return self.seleccion
+    return [DIVERSIDAD_ESTADO] if self.estadoCadaIteracion else []
+
+def IndiceDiversidad(medida):
+  """
+  Convierte un nombre de NOMBRES_DIVERSIDADES o un índice en el índice de la diversidad.
+  """
+
+  if isinstance(medida, str):
+    if medida not in NOMBRES_DIVERSIDADES:
+      raise ValueError(f"Diversidad desconocida {medida!r}, se esperaba una de {list(NOMBRES_DIVERSIDADES)}")
+    return NOMBRES_DIVERSIDADES.index(medida)
+  if isinstance(medida, bool) or int(medida) != medida or not 0 <= medida < len(NOMBRES_DIVERSIDADES):
+    raise ValueError(f"Índice de diversidad {medida!r} fuera de rango 0-{len(NOMBRES_DIVERSIDADES) - 1}")
+  return int(medida)
+
+class SeguimientoDiversidad:
+  """
+  Diversidades de una población binaria actualizadas de forma incremental.
+
+  Entre iteraciones la mayoría de las columnas de la matriz binaria no cambia.
+  En vez de recorrer toda la población, se guarda el conteo de unos de cada
+  columna y solo se actualizan las columnas que cambiaron. Con valores 0/1,
+  cinco de las seis diversidades dependen solo de esos conteos, y se obtienen
+  de un histograma h[c] (número de columnas con c unos) con S = Σ c(N-c):
+    Hamming = S/D, MomentoDeInercia = S/N, DimensionalHussain = 2S/(N²D),
+    LeungGaoXu = columnas con 0 < c < N, Entropica = -(1/D) Σ h[c](t[c] + t[N-c])
+  con t[k] = (k/N) log(k/N). PesosDeInercia necesita la distancia de cada
+  individuo al promedio, Σ_j x_ij (1 - 2c_j/N) + Σ_j (c_j/N)², y se lleva con
+  el producto entero U_i = Σ_j x_ij (N - 2c_j), también corregido solo en las
+  columnas que cambiaron. Todo se acumula en enteros, sin deriva numérica.
+
+  Los valores coinciden con CalcularDiversidades salvo en el último decimal de
+  punto flotante. Solo sirve para matrices binarias (SCP), no para RW.
+  """
+
+  def __init__(self):
+    self.anterior = None
+
+  def actualizar(self, Poblacion):
+    """
+    Actualiza los conteos con la nueva matriz binaria.
+    Args:
+      Poblacion (np.array): Matriz binaria de población, misma forma en todas las llamadas.
+    """
+
+    Pob = np.asarray(Poblacion)
+    if self.anterior is None or self.anterior.shape != Pob.shape:
+      self._reiniciar(Pob)
+      return
+
+    columnas = np.flatnonzero((Pob != self.anterior).any(axis=0))
+    if len(columnas) == 0:
+      return
+    nuevas = self._binaria(Pob[:, columnas])
+    viejas = self.anterior[:, columnas]
+    N = self.N
+
+    conteos = nuevas.sum(axis=0, dtype=np.int64)
+    pesosViejos = N - 2 * self.unos[columnas]
+    pesosNuevos = N - 2 * conteos
+    self.productos += nuevas @ pesosNuevos - viejas @ pesosViejos
+
+    np.subtract.at(self.histograma, self.unos[columnas], 1)
+    np.add.at(self.histograma, conteos, 1)
+    self.unos[columnas] = conteos
+    self.anterior[:, columnas] = nuevas
+
+  def _reiniciar(self, Pob):
+    """Calcula todos los conteos desde cero."""
+    self.anterior = self._binaria(Pob).copy()
+    self.N, self.D = self.anterior.shape
+    self.unos = self.anterior.sum(axis=0, dtype=np.int64)
+    self.histograma = np.bincount(self.unos, minlength=self.N + 1).astype(np.int64)
+    self.productos = self.anterior @ (self.N - 2 * self.unos)
+
+  @staticmethod
+  def _binaria(matriz):
+    """La matriz como int64; error si tiene valores distintos de 0 y 1."""
+    if not np.all((matriz == 0) | (matriz == 1)):
+      raise ValueError("SeguimientoDiversidad solo acepta matrices binarias (0/1)")
+    return matriz.astype(np.int64)
+
+  def diversidades(self, indices=None):
+    """
+    Las 6 diversidades de la última población, en el orden de CalcularDiversidades.
+    Args:
+      indices (iterable, opcional): Posiciones de las diversidades a calcular. Por defecto todas.
+    Returns:
+      list: Valores de las diversidades, con NaN en las que no se calcularon.
+    """
+
+    indices = set(range(len(NOMBRES_DIVERSIDADES)) if indices is None else indices)
+    N, D = self.N, self.D
+    c = np.arange(N + 1)
+    S = int(self.histograma @ (c * (N - c)))
+
+    valores = [np.nan] * len(NOMBRES_DIVERSIDADES)
+    if 0 in indices:
+      valores[0] = 2 * S / (N**2 * D)
+    if 1 in indices:
+      cuadrados = int(self.histograma @ (c * c))
+      distancias = self.productos / N + cuadrados / N**2
+      valores[1] = np.sum(np.sqrt(np.maximum(distancias, 0)) / N)
+    if 2 in indices:
+      valores[2] = float(D - self.histograma[0] - self.histograma[N])
+    if 3 in indices:
+      p = c[1:N] / N
+      termino = p * np.log(p) + (1 - p) * np.log(1 - p)
+      valores[3] = (-1 / D) * float(self.histograma[1:N] @ termino)
+    if 4 in indices:
+      valores[4] = S / D
+    if 5 in indices:
+      valores[5] = S / N
+    return valores
+
+def ObtenerDiversidadYEstado(Poblacion,maxDiversidades,indices=None,anteriores=None,seguimiento=None):
   """
     Calcula las diversidades de una población, actualiza máximos históricos 
     y determina el estado de exploración/explotación.
@@ -212,6 +385,11 @@ def ObtenerDiversidadYEstado(Poblacion,maxDiversidades):
         Poblacion (np.array): Matriz de población donde cada fila es un individuo 
                               y cada columna una dimensión.
         maxDiversidades (list): Lista con los valores máximos históricos de cada diversidad.
+        indices (iterable, opcional): Diversidades a calcular (ver PlanDiversidades). Por defecto todas.
+        anteriores (np.array, opcional): Diversidades de la llamada anterior. Las que no se
+                                         calculan ahora conservan ese valor; sin anteriores quedan en NaN.
+        seguimiento (SeguimientoDiversidad, opcional): Si se da, las diversidades se calculan
+                                                       de forma incremental (población binaria).
 
     Returns:
         tuple: Una tupla con las métricas de diversidad y estado en el siguiente orden:
@@ -222,13 +400,16 @@ def ObtenerDiversidadYEstado(Poblacion,maxDiversidades):
               5. state (list): Estado de la exploración (1=Exploración, 0=Explotación).
   """
   #Calculamos las diversidades
-  diversidades = []
-  diversidades.append(DimensionalHussain(Poblacion)) #0
-  diversidades.append(PesosDeInercia(Poblacion)) #1
-  diversidades.append(LeungGaoXu(Poblacion)) #2
-  diversidades.append(Entropica(Poblacion)) #3
-  diversidades.append(Hamming(Poblacion)) #4
-  diversidades.append(MomentoDeInercia(Poblacion)) #5
+  if seguimiento is None:
+    diversidades = CalcularDiversidades(Poblacion, indices)
+  elif indices is not None and len(indices) == 0:
+    # Nada que calcular: la próxima actualización toma todos los cambios juntos
+    diversidades = [np.nan] * len(NOMBRES_DIVERSIDADES)
+  else:
+    seguimiento.actualizar(Poblacion)
+    diversidades = seguimiento.diversidades(indices)
+  if anteriores is not None:
+    diversidades = [d if not np.isnan(d) else a for d, a in zip(diversidades, anteriores)]
 
   #Actualizar maxDiversidades y calculamos PorcentajeExplor PorcentajeExplot
   PorcentajeExplor = []
@@ -240,7 +421,12 @@ def ObtenerDiversidadYEstado(Poblacion,maxDiversidades):
       maxDiversidades[i] = diversidades[i]
     
     # Calcular porcentajes siempre (no solo cuando actualiza el máximo)
-    if maxDiversidades[i] > 0:
+    if np.isnan(diversidades[i]):
+      # Diversidad no seleccionada: sin porcentajes
+      PorcentajeExplor.append(np.nan)
+      PorcentajeExplot.append(np.nan)
+      state.append(1)
+    elif maxDiversidades[i] > 0:
       PorcentajeExplor.append((diversidades[i]/maxDiversidades[i])*100)
       PorcentajeExplot.append((abs(diversidades[i]-maxDiversidades[i])/maxDiversidades[i])*100)
       
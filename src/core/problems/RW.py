@@ -27,6 +27,8 @@ class RW:
 
         #parámetro de la discretización
         self.betaDis = betaDis
+        # DiscretizationScheme del experimento, se crea en la primera evaluacion
+        self.discretizador = None
         
         self.domResistCaractHormCompresion = np.linspace(25,40,4)
         self.domFluenciaAcero = np.array([2.8,4.2])
@@ -374,8 +376,12 @@ class RW:
         TF = params["TF"]
         FO = params["FO"]
         
-        ds = DS.DiscretizationScheme(poblacion,matrix,solutionsRanking,TF,binarizationOperator = None)
-        matrixProbT = ds.appliedTransferFunction()
+        # Un solo DiscretizationScheme por experimento: cambiar de TF no lo reconstruye
+        if self.discretizador is None:
+            self.discretizador = DS.DiscretizationScheme(poblacion,matrix,solutionsRanking,TF,binarizationOperator = None)
+        else:
+            self.discretizador.actualizar(poblacion,matrix,solutionsRanking,TF)
+        matrixProbT = self.discretizador.appliedTransferFunction()
         matrix = self.discretization(matrix,matrixProbT,solutionsRanking[0])
 
         costoTotal = np.zeros(poblacion.shape[0])
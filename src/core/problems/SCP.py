@@ -7,17 +7,22 @@ from ..discretization import DiscretizationScheme as DS
 
 #action : esquema de discretizacion DS
 class SCP:
-    def __init__(self,workdirInstance, instance_dir, instance_file):
+    def __init__(self,workdirInstance, instance_dir, instance_file, reparador=None):
         """Inicializa una instancia del Set Covering Problem.
 
         Args:
             workdirInstance (str): Directorio de trabajo base donde se encuentran las instancias.
             instance_dir (str): Subdirectorio que contiene la instancia especifica
             instance_file (str): Nombre del archivo de la instancia.
+            reparador (ReparaStrategy, opcional): Estrategia de reparacion ya construida
+                para la instancia (por ejemplo, desde el cache de instancias del worker).
         """
         self.workdirInstance = workdirInstance
         self.instance_dir = instance_dir
         self.instance_file = instance_file
+        self.reparador = reparador
+        # DiscretizationScheme del experimento, se crea en la primera evaluacion
+        self.discretizador = None
         
     def obtenerInstancia(self):
         """Obtiene la ruta completa de la instancia del problema.    
@@ -27,6 +32,24 @@ class SCP:
         """
         return os.path.join(self.workdirInstance, self.instance_dir, self.instance_file)
 
+    def obtenerReparador(self, cobertura, costos):
+        """Obtiene la estrategia de reparacion asociada a la instancia.
+
+        Si no se entrego una al crear el problema, se construye en la primera
+        evaluacion y se reutiliza en las siguientes. Para reutilizarla entre
+        experimentos, el worker la entrega desde su cache de instancias.
+
+        Args:
+            cobertura (numpy.ndarray): Matriz de cobertura del problema.
+            costos (numpy.ndarray): Vector de costos de cada conjunto.
+
+        Returns:
+            ReparaStrategy: Estrategia de reparacion de la instancia.
+        """
+        if self.reparador is None:
+            self.reparador = repara.ReparaStrategy(cobertura,costos,cobertura.shape[0],cobertura.shape[1])
+        return self.reparador
+
     def obtenerFitness(self,poblacion,matrix,solutionsRanking,paramsProblem):
         
         """Calcula el fitness de toda la poblacion aplicando discretizacion y reparacion.
@@ -40,13 +63,18 @@ class SCP:
                              - "costos" (numpy.ndarray): Vector de costos de cada conjunto.
                              - "cobertura" (numpy.ndarray): Matriz de cobertura del problema.
                              - "ds" (str): Esquema de discretizacion en formato "TF,BO".
-                             - "repairType" (str): Estrategia de reparacion.
+                             - "repairType" (int): Estrategia de reparacion (1 simple, 2 compleja,
+                               3 compleja + eliminacion de columnas redundantes).
+                             - "transferLUT" (bool, opcional): Usar la tabla precalculada de la
+                               funcion de transferencia en [lb, ub] (TablaTransferencia).
         Returns:
             tuple: Una tupla con 4 elementos:
                - matrix (numpy.ndarray): Matriz de soluciones discretizadas y reparadas.
                - fitness (numpy.ndarray): Vector con el fitness de cada solucion.
                - solutionsRanking (numpy.ndarray): Indices ordenados de menor a mayor fitness.
-               - numReparaciones (int): Numero total de reparaciones realizadas en la poblacion.
+               - numReparaciones (int): Columnas cambiadas por la reparacion en la poblacion:
+                 agregadas a los infactibles y, con repairType 3, las redundantes quitadas.
+                 Las ejecuciones anteriores a reparaPoblacion guardaban siempre 0.
         """
         
         
@@ -56,17 +84,21 @@ class SCP:
         ds = paramsProblem["ds"]
         repairType = paramsProblem["repairType"]
 
-        ds = ds.split(",")
-        ds = DS.DiscretizationScheme(poblacion,matrix,solutionsRanking,ds[0],ds[1])
-        matrix = ds.binariza()
-
-        repair = repara.ReparaStrategy(cobertura,costos,cobertura.shape[0],cobertura.shape[1])
-        matrizSinReparar = matrix
-        for solucion in range(matrix.shape[0]):
-            if repair.cumple(matrix[solucion]) == 0:
-                matrix[solucion] = repair.repara_one(matrix[solucion],repairType)[0]
-        matrizReparada = matrix
-        numReparaciones = np.sum(np.abs(matrizReparada - matrizSinReparar))
+        # Un solo DiscretizationScheme por experimento: cambiar de esquema no lo reconstruye
+        if self.discretizador is None:
+            tf, bo = ds.split(",")
+            limites = (paramsProblem["lb"], paramsProblem["ub"]) if paramsProblem.get("transferLUT") else None
+            self.discretizador = DS.DiscretizationScheme(poblacion,matrix,solutionsRanking,tf,bo,limites)
+        else:
+            self.discretizador.actualizar(poblacion,matrix,solutionsRanking,ds)
+        # binariza devuelve un buffer del discretizador; reparaPoblacion trabaja sobre una copia
+        matrix = self.discretizador.binariza()
+
+        repair = self.obtenerReparador(cobertura,costos)
+        # Solo se reparan los individuos infactibles, todos en una sola llamada
+        cobertura, infactibles = repair.cumplePoblacion(matrix)
+        matrix, reparaciones = repair.reparaPoblacion(matrix, infactibles, repairType, cobertura)
+        numReparaciones = np.sum(reparaciones)
 
         #Calculamos Fitness
         fitness = np.sum(np.multiply(matrix,costos),axis =1)
@@ -9,35 +9,79 @@ Created on Thu Nov 21 23:00:31 2019
 # import readOrProblems as rOP
 from . import solution as sl
 from . import heuristic as he
+from . import matrixUtility as mU
+from . import kernels as kn
 import random
 import numpy as np
+from scipy import sparse
 
 class ReparaStrategy:
 
-    def __init__(self, matrix, pesos, row, cols):
+    def __init__(self, matrix, pesos, row, cols, backend=None):
         
         """
     Inicializa la estrategia de reparacion para soluciones del problema SCP.
+
+    Precalcula las heuristicas de filas y los diccionarios fila-columna y
+    columna-fila de la instancia. Al depender solo de la instancia, un mismo
+    objeto puede reutilizarse en todas las evaluaciones y experimentos.
     
     Args:
-        matrix (numpy.ndarray): Matriz de cobertura del problema.
+        matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema.
+                 Se almacena en formato disperso por filas (CSR) y por columnas (CSC).
         pesos (numpy.ndarray): Vector de costos de cada columna.
         row (int): Numero de filas (restricciones) del problema.
         cols (int): Numero de columnas (variables) del problema.
+        backend (str, opcional): 'numpy' o 'numba' para la reparacion por poblacion.
+                 Por defecto 'numba' si esta instalado (ver kernels.backendPorDefecto).
     """
         
         
-        matrix = np.array(matrix)
+        matrix = sparse.csr_matrix(matrix)
+        matrix.sort_indices()
         self.rows = row
         self.cols = cols
         self.pesos = np.array(pesos)
+        # fila -> columnas (CSR) y columna -> filas (CSC)
         self.matrix = matrix
+        self.matrixCsc = matrix.tocsc()
+        self.matrixCsc.sort_indices()
         self.rHeuristic = he.getRowHeuristics(matrix)
-        self.dictCol = he.getColumnRow(matrix)
         self.dictcHeuristics = {}
         self.cHeuristic = []
         self.lSolution = []
         self.dict = he.getRowColumn(matrix)
+        # Columna de menor peso que cubre cada fila, usada por reparaSimple
+        self.menorPesoFila = np.array([self.dict[i][np.argmin(self.pesos[self.dict[i]])] for i in range(self.rows)])
+        # Filas de mayor a menor importancia (1/cobertura), usada por reparaPoblacion
+        self.ordenFilas = self.rHeuristic[::-1,0].astype(np.int64)
+        # Fase de eliminacion: columnas de cada fila (orden CSR) ordenadas de mayor
+        # a menor costo/cobertura, que es el orden en que se intenta quitarlas
+        largoColumna = np.diff(self.matrixCsc.indptr)
+        ratio = self.pesos / np.maximum(largoColumna, 1)
+        self.ordenEliminacion = np.lexsort((np.arange(self.cols), -ratio))
+        rango = np.empty(self.cols, dtype=np.int64)
+        rango[self.ordenEliminacion] = np.arange(self.cols)
+        self.filaNz = np.repeat(np.arange(self.rows), np.diff(self.matrix.indptr))
+        self.columnasEliminacion = self.matrix.indices[np.lexsort((rango[self.matrix.indices], self.filaNz))]
+
+        self.backend = backend if backend is not None else kn.backendPorDefecto()
+        if self.backend not in kn.BACKENDS:
+            raise ValueError(f"Backend de reparacion desconocido: {self.backend}")
+        if self.backend == 'numba' and not kn.NUMBA_DISPONIBLE:
+            raise ImportError("El backend 'numba' requiere tener Numba instalado")
+
+    def columnasFila(self, fila):
+        """
+    Entrega las columnas que cubren una fila, sin copiar la matriz.
+
+    Args:
+        fila (int): Indice de la fila.
+
+    Returns:
+        numpy.ndarray: Indices de las columnas que cubren la fila.
+    """
+        return self.matrix.indices[self.matrix.indptr[fila]:self.matrix.indptr[fila + 1]]
 
     def repara_one(self,solution,repair):
         
@@ -53,6 +97,7 @@ class ReparaStrategy:
         repair (int): Identificador de la estrategia de reparacion.
                      - 1: Reparacion simple (reparaSimple).
                      - 2: Reparacion compleja (reparaComplejo).
+                     - 3: Reparacion compleja seguida de eliminaRedundantes.
 
     Returns:
         tuple: Tupla con 2 elementos:
@@ -63,6 +108,253 @@ class ReparaStrategy:
             return self.reparaSimple(solution)
         elif repair == 2:
             return self.reparaComplejo(solution)
+        elif repair == 3:
+            solution, numReparaciones = self.reparaComplejo(solution)
+            solution, eliminadas = self.eliminaRedundantes(np.array([solution]))
+            return solution[0].tolist(), numReparaciones + int(eliminadas[0])
+
+    def reparaPoblacion(self, poblacion, infactibles, repair, cobertura=None):
+        
+        """
+    Repara en conjunto todos los individuos infactibles de una poblacion.
+    
+    En cada ronda, cada individuo que sigue infactible agrega una columna,
+    elegida con operaciones de arreglos sobre todos ellos a la vez:
+    - 1: Reparacion simple. Se toma la primera fila descubierta segun un orden
+         aleatorio propio de cada individuo y se agrega su columna de menor costo.
+    - 2: Reparacion compleja. Se proponen las 10 filas descubiertas mas
+         importantes, se evalua costo/filas descubiertas cubiertas para sus
+         columnas y se elige la mejor (o, con probabilidad 1/5, una al azar
+         entre las 10 mejores), igual que heuristByCols.
+    - 3: Reparacion compleja y luego eliminaRedundantes sobre toda la poblacion.
+    La cobertura por fila se actualiza de forma incremental con las filas de la
+    columna agregada. Con backend 'numba' las rondas las hace reparaRondasNumba.
+
+    Args:
+        poblacion (numpy.ndarray): Matriz binaria donde cada fila es una solucion.
+        infactibles (numpy.ndarray): Vector booleano con los individuos a reparar.
+        repair (int): Identificador de la estrategia de reparacion (1, 2 o 3).
+        cobertura (numpy.ndarray, opcional): Cobertura por fila entregada por
+                 cumplePoblacion, para no recalcularla.
+
+    Returns:
+        tuple: Tupla con 2 elementos:
+               - poblacion (numpy.ndarray): Copia de la poblacion con los individuos reparados.
+               - numReparaciones (numpy.ndarray): Columnas agregadas (y quitadas) en cada individuo.
+    """
+        
+        
+        poblacion = np.array(poblacion, copy=True)
+        numReparaciones = np.zeros(poblacion.shape[0], dtype=np.int64)
+        indices = np.flatnonzero(infactibles)
+        if len(indices) == 0:
+            if repair == 3:
+                return self.eliminaRedundantes(poblacion, cobertura)
+            return poblacion, numReparaciones
+        if cobertura is None:
+            cobertura = self.cumplePoblacion(poblacion[indices])[0]
+        else:
+            cobertura = cobertura[indices]
+        cobertura = np.array(cobertura, dtype=np.int64)
+
+        prioridad = np.random.uniform(size=cobertura.shape) if repair == 1 else None
+        if self.backend == 'numba':
+            self.reparaRondasNumba(poblacion, indices, cobertura, repair, prioridad, numReparaciones)
+            activos = []
+        else:
+            activos = np.arange(len(indices))
+        while len(activos) > 0:
+            descubiertas = cobertura[activos] == 0
+            siguen = np.any(descubiertas, axis=1)
+            activos = activos[siguen]
+            descubiertas = descubiertas[siguen]
+            if len(activos) == 0:
+                break
+
+            if repair == 1:
+                filas = np.argmin(np.where(descubiertas, prioridad[activos], np.inf), axis=1)
+                columnas = self.menorPesoFila[filas]
+            else:
+                opcion = np.random.randint(0, 5, size=len(activos))
+                azar = np.random.random_sample(len(activos))
+                columnas = self.seleccionaColumnas(descubiertas, opcion, azar)
+
+            poblacion[indices[activos], columnas] = 1
+            numReparaciones[indices[activos]] += 1
+            filas, posicion = mU.expandeSegmentos(self.matrixCsc.indptr, self.matrixCsc.indices, columnas)
+            cobertura[activos[posicion], filas] += 1
+
+        if repair == 3:
+            poblacion, eliminadas = self.eliminaRedundantes(poblacion)
+            numReparaciones += eliminadas
+        return poblacion, numReparaciones
+
+    def reparaRondasNumba(self, poblacion, indices, cobertura, repair, prioridad, numReparaciones):
+        
+        """
+    Version de las rondas de reparaPoblacion con los nucleos compilados de kernels.
+    
+    Sortea los mismos numeros aleatorios, en el mismo orden, que el backend
+    NumPy, por lo que ambos entregan las mismas soluciones. Modifica poblacion,
+    cobertura y numReparaciones en el mismo lugar.
+
+    Args:
+        poblacion (numpy.ndarray): Copia de la poblacion a reparar.
+        indices (numpy.ndarray): Individuos infactibles.
+        cobertura (numpy.ndarray): Cobertura por fila de los individuos infactibles.
+        repair (int): Identificador de la estrategia de reparacion (1, 2 o 3).
+        prioridad (numpy.ndarray): Prioridad aleatoria de las filas (solo repair 1).
+        numReparaciones (numpy.ndarray): Columnas agregadas a cada individuo.
+    """
+        
+        
+        indptrC, indicesC = self.matrixCsc.indptr, self.matrixCsc.indices
+        if repair == 1:
+            kn.reparaSimple(indptrC, indicesC, self.menorPesoFila, poblacion, indices, cobertura,
+                            prioridad, numReparaciones)
+            return
+        marca = np.full(self.cols, -1, dtype=np.int64)
+        activos = np.arange(len(indices))
+        while True:
+            activos = activos[kn.tieneDescubiertas(cobertura, activos)]
+            if len(activos) == 0:
+                break
+            opcion = np.random.randint(0, 5, size=len(activos))
+            azar = np.random.random_sample(len(activos))
+            columnas = kn.seleccionaColumnas(self.matrix.indptr, self.matrix.indices, indptrC, indicesC,
+                                             self.pesos, self.ordenFilas, cobertura, activos, opcion, azar, marca)
+            kn.agregaColumnas(indptrC, indicesC, poblacion, cobertura, indices, activos, columnas, numReparaciones)
+
+    def eliminaRedundantes(self, poblacion, cobertura=None):
+        
+        """
+    Quita de cada solucion factible las columnas redundantes.
+    
+    Una columna es redundante si todas las filas que cubre estan cubiertas al
+    menos dos veces. Se intenta quitar primero las de mayor costo/cobertura.
+    Se trabaja por rondas sobre toda la poblacion: en cada ronda, para cada
+    fila, solo se quitan las columnas redundantes que estan entre las
+    cobertura-1 primeras en ese orden, de modo que ninguna fila queda
+    descubierta y toda columna quitada tambien se quitaria recorriendo las
+    columnas una a una. La cobertura por fila se actualiza al final de cada
+    ronda; se termina cuando ningun individuo tiene columnas redundantes.
+
+    Args:
+        poblacion (numpy.ndarray): Matriz binaria de soluciones factibles.
+        cobertura (numpy.ndarray, opcional): Cobertura por fila entregada por
+                 cumplePoblacion, para no recalcularla.
+
+    Returns:
+        tuple: Tupla con 2 elementos:
+               - poblacion (numpy.ndarray): Copia de la poblacion sin columnas redundantes.
+               - numEliminadas (numpy.ndarray): Columnas quitadas a cada individuo.
+    """
+        
+        
+        poblacion = np.array(poblacion, copy=True)
+        if cobertura is None:
+            cobertura = self.cumplePoblacion(poblacion)[0]
+        cobertura = np.array(cobertura, dtype=np.int64)
+        numEliminadas = np.zeros(poblacion.shape[0], dtype=np.int64)
+        if self.backend == 'numba':
+            kn.eliminaRedundantes(self.matrixCsc.indptr, self.matrixCsc.indices, self.ordenEliminacion,
+                                  poblacion, cobertura, numEliminadas)
+            return poblacion, numEliminadas
+        inicioFila = self.matrix.indptr[:-1]
+        largoFila = np.diff(self.matrix.indptr)
+        sinFilas = np.diff(self.matrixCsc.indptr) == 0
+        inicioColumna = self.matrixCsc.indptr[:-1][~sinFilas]
+        # Bloques de individuos para acotar la memoria de los arreglos (individuos x nnz)
+        bloque = max(1, (1 << 22) // max(self.matrix.nnz, 1))
+
+        activos = np.arange(poblacion.shape[0])
+        while len(activos) > 0:
+            quedan = []
+            for k in range(0, len(activos), bloque):
+                grupo = activos[k:k + bloque]
+                # Se trabaja traspuesto (filas/columnas x individuos) para que cada
+                # seleccion de indices copie bloques contiguos
+                cov = np.ascontiguousarray(cobertura[grupo].T, dtype=np.int32)
+                enSolucion = poblacion[grupo].T != 0
+
+                # Candidatas: en la solucion y con todas sus filas cubiertas 2 o mas veces
+                redundante = np.repeat(sinFilas[:, np.newaxis], len(grupo), axis=1)
+                redundante[~sinFilas] = np.minimum.reduceat(cov[self.matrixCsc.indices], inicioColumna, axis=0) >= 2
+                candidatas = enSolucion & redundante
+
+                # Posicion de cada candidata entre las candidatas de cada fila
+                enFila = candidatas[self.columnasEliminacion]
+                acumulado = np.cumsum(enFila, axis=0, dtype=np.int32)
+                previas = acumulado[inicioFila] - enFila[inicioFila]
+                posicion = acumulado - np.repeat(previas, largoFila, axis=0)
+                falla = enFila & (posicion > np.repeat(cov - 1, largoFila, axis=0))
+
+                rechazadas = np.zeros_like(candidatas)
+                nz, individuo = np.nonzero(falla)
+                rechazadas[self.columnasEliminacion[nz], individuo] = True
+                quitar = (candidatas & ~rechazadas).T
+
+                cuantas = np.count_nonzero(quitar, axis=1)
+                if not np.any(cuantas):
+                    continue
+                poblacion[grupo] = np.where(quitar, 0, poblacion[grupo])
+                cobertura[grupo] -= np.asarray(self.matrix @ quitar.T.astype(np.int64)).T
+                numEliminadas[grupo] += cuantas
+                quedan.append(grupo[cuantas > 0])
+            activos = np.concatenate(quedan) if quedan else np.array([], dtype=np.int64)
+
+        return poblacion, numEliminadas
+
+    def seleccionaColumnas(self, descubiertas, opcion, azar):
+        
+        """
+    Elige, para varios individuos a la vez, la columna a agregar en la reparacion compleja.
+    
+    Version por poblacion de obtieneElemento3 + heuristByCols: para cada
+    individuo se proponen sus 10 filas descubiertas mas importantes, se
+    consideran las columnas que las cubren y se puntua cada una con
+    costo / filas descubiertas que cubre. Los empates se resuelven por indice
+    de columna.
+
+    Args:
+        descubiertas (numpy.ndarray): Matriz booleana (individuos x filas) de filas no cubiertas.
+        opcion (numpy.ndarray): Sorteo en [0, 5) por individuo; con 0 se elige al azar.
+        azar (numpy.ndarray): Sorteo en [0, 1) por individuo para la eleccion al azar.
+
+    Returns:
+        numpy.ndarray: Columna elegida para cada individuo.
+    """
+        
+        
+        nIndividuos = descubiertas.shape[0]
+        # 10 filas descubiertas mas importantes de cada individuo
+        ordenadas = descubiertas[:, self.ordenFilas]
+        propuestas = ordenadas & (np.cumsum(ordenadas, axis=1) <= 10)
+        individuo, posicion = np.nonzero(propuestas)
+        filas = self.ordenFilas[posicion]
+
+        # Columnas candidatas (individuo, columna), sin repetir
+        columnas, posicion = mU.expandeSegmentos(self.matrix.indptr, self.matrix.indices, filas)
+        clave = np.unique(individuo[posicion] * self.cols + columnas)
+        individuo = clave // self.cols
+        columnas = clave % self.cols
+
+        # Filas descubiertas que cubre cada candidata
+        filas, posicion = mU.expandeSegmentos(self.matrixCsc.indptr, self.matrixCsc.indices, columnas)
+        conteo = np.bincount(posicion, weights=descubiertas[individuo[posicion], filas], minlength=len(columnas))
+        peso = self.pesos[columnas] / conteo
+
+        # Por individuo, candidatas de menor a mayor peso
+        orden = np.lexsort((peso, individuo))
+        columnas = columnas[orden]
+        inicio = np.searchsorted(individuo[orden], np.arange(nIndividuos))
+        tam = np.minimum(np.bincount(individuo, minlength=nIndividuos), 10)
+
+        # Con probabilidad 1/5 se toma una al azar entre las 10 mejores
+        # (los sorteos vienen de afuera para que el backend Numba use los mismos)
+        azar = 1 + (azar * (tam - 1)).astype(np.int64)
+        desplazamiento = np.where((opcion == 0) & (tam > 1), azar, 0)
+        return columnas[inicio + desplazamiento]
         
         
         
@@ -87,7 +379,7 @@ class ReparaStrategy:
         
         lSolution = [i for i in range(len(solution)) if solution[i] == 1]
         lSolution, numReparaciones = sl.generaSolucion(lSolution, self.matrix, self.pesos, self.rHeuristic,
-                                                       self.dictcHeuristics, self.dict, self.cHeuristic, self.dictCol)
+                                                       self.dictcHeuristics, self.dict, self.cHeuristic, self.matrixCsc)
         sol = np.zeros(self.cols, dtype=np.float64)
         sol[lSolution] = 1
         return sol.tolist(), numReparaciones
@@ -115,10 +407,8 @@ class ReparaStrategy:
         indices = list(range(self.rows))
         random.shuffle(indices)
         for i in indices:
-            if np.sum(self.matrix[i] * solution) < 1:
-                idxRestriccion = np.argwhere((self.matrix[i]) > 0)
-                idxMenorPeso = idxRestriccion[np.argmin(self.pesos[idxRestriccion])]
-                solution[idxMenorPeso[0]] = 1
+            if np.sum(solution[self.columnasFila(i)]) < 1:
+                solution[self.menorPesoFila[i]] = 1
                 numRep += 1
         return solution, numRep
 
@@ -128,7 +418,7 @@ class ReparaStrategy:
     Verifica si una solucion es factible.
     
     Comprueba que todas las filas (restricciones) esten cubiertas por al menos
-    una columna activa en la solucion.
+    una columna activa en la solucion, con un producto disperso O(nnz).
 
     Args:
         solucion (list): Lista binaria representando la solucion a verificar.
@@ -138,6 +428,29 @@ class ReparaStrategy:
     """
         
         
-        for i in range(self.rows):
-            if np.sum(self.matrix[i] * solucion) < 1: return 0
-        return 1
\ No newline at end of file
+        if np.min(self.matrix @ np.asarray(solucion)) < 1: return 0
+        return 1
+
+    def cumplePoblacion(self, poblacion):
+        
+        """
+    Verifica la factibilidad de toda una poblacion en un solo producto disperso.
+    
+    Calcula, para cada individuo, cuantas columnas activas cubren cada fila,
+    sin recorrer filas ni individuos en Python.
+
+    Args:
+        poblacion (numpy.ndarray): Matriz binaria donde cada fila es una solucion.
+
+    Returns:
+        tuple: Tupla con 2 elementos:
+               - cobertura (numpy.ndarray): Matriz (individuos x filas) con el numero
+                 de columnas activas que cubren cada fila.
+               - infactibles (numpy.ndarray): Vector booleano, True para los individuos
+                 con al menos una fila sin cubrir.
+    """
+        
+        
+        cobertura = np.asarray(self.matrix @ np.asarray(poblacion).T).T
+        infactibles = np.any(cobertura < 1, axis=1)
+        return cobertura, infactibles
\ No newline at end of file
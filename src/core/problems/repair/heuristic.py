@@ -1,6 +1,6 @@
 __author__ = 'INVESTIGACION'
 import numpy as np
-from copy import deepcopy
+from scipy import sparse
 import math
 
 def getHeuristic(matrix, pesos):
@@ -34,7 +34,7 @@ def getRowHeuristics(matrix):
     Para cada fila, calcula 1/Cubrimiento. Mientras menos cubrimiento tenga
     una fila, mas importante es cubrirla.
     Args:
-        matrix (numpy.ndarray): Matriz de cobertura del problema.
+        matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema.
 
     Returns:
         numpy.ndarray: Matriz de 2 columnas ordenada por heuristica ascendente.
@@ -43,10 +43,8 @@ def getRowHeuristics(matrix):
     """
     row, col = matrix.shape
     rHeuristic = np.zeros((row,2)) # Dos columnas. La primera para indicar la columna la segunda para la Heuristica
-    for i in range(0,row):
-        rHeuristic[i,0] = int(i)
-        #print (i,sum(matrix[:,i]), pesos[i], float(pesos[i]/sum(matrix[:,i])))
-        rHeuristic[i,1] = 1/sum(matrix[i,:])
+    rHeuristic[:,0] = np.arange(row)
+    rHeuristic[:,1] = 1/np.asarray(matrix.sum(axis=1)).ravel()
     return rHeuristic[rHeuristic[:,1].argsort()]
 
 def getRowColumn(matrix):
@@ -54,20 +52,17 @@ def getRowColumn(matrix):
     Genera un diccionario que mapea cada fila con las columnas que la cubren.
 
     Args:
-        matrix (numpy.ndarray): Matriz de cobertura del problema (filas x columnas).
+        matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema (filas x columnas).
 
     Returns:
         dict: Diccionario donde cada llave es un índice de fila y su valor
               es una lista con los índices de las columnas que cubren esa fila.
     """
-    nrow, ncol = matrix.shape
+    csr = sparse.csr_matrix(matrix)
+    csr.sort_indices()
     dict = {}
-    for i in range(0,nrow):
-        list = []
-        for j in range(0,ncol):
-            if matrix[i,j]==1:
-                list.append(j)
-        dict[i] = deepcopy(list)
+    for i, lista in enumerate(np.split(csr.indices, csr.indptr[1:-1])):
+        dict[i] = lista.tolist()
     return dict
 
 def getColumnRow(matrix):
@@ -75,21 +70,37 @@ def getColumnRow(matrix):
     Genera un diccionario que mapea cada columna con las filas que cubre.
 
     Args:
-        matrix (numpy.ndarray): Matriz de cobertura del problema (filas x columnas).
+        matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema (filas x columnas).
 
     Returns:
         dict: Diccionario donde cada llave es un índice de columna y su valor es una lista con los índices de las filas que cubre esa columna.
     """
-    nrow, ncol = matrix.shape
+    csc = sparse.csc_matrix(matrix)
+    csc.sort_indices()
     dictCol = {}
-    for j in range(0,ncol):
-        list = []
-        for i in range(0,nrow):
-            if matrix[i,j]==1:
-                list.append(i)
-        dictCol[j] = deepcopy(list)
+    for j, lista in enumerate(np.split(csc.indices, csc.indptr[1:-1])):
+        dictCol[j] = lista.tolist()
     return dictCol
 
+def getProposedRowsMask(descubiertas,rHeuristic,lparam):
+    """
+        Selecciona las filas más importantes de entre las filas no cubiertas.
+
+        Igual que getProposedRows, pero recibe la máscara booleana de filas no
+        cubiertas, de modo que la pertenencia se consulta en O(1) y la selección
+        se hace en una sola pasada vectorizada sobre rHeuristic.
+
+        Args:
+            descubiertas (numpy.ndarray): Máscara booleana, True para las filas no cubiertas.
+            rHeuristic (numpy.ndarray): Matriz de heurísticas de filas ordenada ascendentemente.
+            lparam (int): Número de filas propuestas a retornar.
+
+        Returns:
+            numpy.ndarray: Índices de las filas propuestas (máximo lparam elementos).
+        """
+    orden = rHeuristic[::-1,0].astype(np.int64)
+    return orden[descubiertas[orden]][:lparam]
+
 def getProposedRows(uRows,rHeuristic,lparam):
     """
         Selecciona las filas más importantes de entre las filas no cubiertas.
@@ -318,7 +329,7 @@ def SeleccionaColumna6(Pesos, Matrix, R,S):
 
     Args:
         Pesos (numpy.ndarray): Vector de costos de las columnas.
-        Matrix (numpy.ndarray): Matriz de cobertura del problema.
+        Matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema.
         R (list): Lista de índices de filas no cubiertas.
         S (list): Lista de índices de columnas en la solución actual.
 
@@ -345,11 +356,13 @@ def SeleccionaColumna6(Pesos, Matrix, R,S):
     #print rowF, colF
     ColumnWeight = np.zeros((colF,NumberCalculus))
     Cont = 0
+    # Filas de R cubiertas por cada columna, en una sola pasada sobre los no ceros
+    K = np.asarray(Matrix_F.sum(axis=0)).ravel()
 
     for i in range(0,colF):
 
         ColumnWeight[Cont,0] = columnComplement[i]
-        K_i = np.sum(Matrix_F[:,i])
+        K_i = K[i]
         if K_i > 0:
             ColumnWeight[Cont,1] = Calcula_Measure_j(Option,Pesos,columnComplement[i],K_i)
         else:
@@ -441,7 +454,7 @@ def SeleccionaColumnaNueva(Pesos, Matrix, pRows,pColumns):
     #print 'El calculo', column
     return column
 
-def heuristByCols(pesos,uRows,pCols,dictCols):
+def heuristByCols(pesos,uRows,pCols,matrixCsc):
     """
     Selecciona columna evaluando cobertura sobre filas no cubiertas.
     
@@ -451,19 +464,23 @@ def heuristByCols(pesos,uRows,pCols,dictCols):
 
     Args:
         pesos (numpy.ndarray): Vector de costos de las columnas.
-        uRows (list): Lista de índices de filas no cubiertas (Uncovered Rows).
+        uRows (list): Lista de índices de filas no cubiertas (Uncovered Rows),
+            o máscara booleana de filas no cubiertas.
         pCols (list): Lista de índices de columnas propuestas.
-        dictCols (dict): Diccionario que mapea columnas a las filas que cubren.
+        matrixCsc (scipy.sparse.csc_matrix): Matriz de cobertura por columnas
+            (para cada columna, las filas que cubre).
 
     Returns:
         int: Índice de la columna seleccionada.
     """
+    pCols = np.asarray(pCols, dtype=np.int64)
+    descubiertas = np.zeros(matrixCsc.shape[0])
+    descubiertas[uRows] = 1
+    # Filas no cubiertas que cubre cada columna propuesta: O(nnz de pCols)
+    conteo = matrixCsc[:, pCols].T @ descubiertas
     ColumnWeight = np.zeros((len(pCols),2))
-    #print('pcols',len(pCols))
-    for i in range(0,len(pCols)):
-        lRows = dictCols[pCols[i]]
-        ColumnWeight[i,0] = pCols[i]
-        ColumnWeight[i,1] = float(pesos[pCols[i]])/len(list(set(lRows).intersection(set(uRows))))
+    ColumnWeight[:,0] = pCols
+    ColumnWeight[:,1] = pesos[pCols]/conteo
     ColumnWeight = ColumnWeight[ColumnWeight[:,1].argsort()]
     Option1 = np.random.randint(0,5)
     if Option1 == 0:
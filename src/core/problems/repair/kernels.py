@@ -0,0 +1,186 @@
+"""
+Nucleos compilados (Numba) de la reparacion del SCP.
+
+Son equivalentes, individuo por individuo, a las versiones con arreglos de
+ReparaStrategy (reparaPoblacion, seleccionaColumnas y eliminaRedundantes):
+reciben los mismos numeros aleatorios ya sorteados, por lo que con la misma
+semilla ambos backends entregan exactamente las mismas soluciones.
+
+Numba es opcional. Si no se puede importar, NUMBA_DISPONIBLE es False, las
+funciones quedan como Python puro (correctas pero lentas) y ReparaStrategy usa
+el backend NumPy.
+"""
+__author__ = 'INVESTIGACION'
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda funcion: funcion
+
+BACKENDS = ('numpy', 'numba')
+
+
+def backendPorDefecto():
+    """Entrega 'numba' si Numba esta instalado y 'numpy' en otro caso."""
+    return 'numba' if NUMBA_DISPONIBLE else 'numpy'
+
+
+@njit(cache=True)
+def reparaSimple(indptrC, indicesC, menorPesoFila, poblacion, indices, cobertura, prioridad, numReparaciones):
+    """
+    Reparacion simple de los individuos indicados, en el mismo lugar.
+
+    Mientras quede una fila descubierta se toma la de menor prioridad y se
+    agrega su columna de menor costo, igual que cada ronda de reparaPoblacion
+    con repair 1.
+
+    Args:
+        indptrC, indicesC (numpy.ndarray): Matriz de cobertura en formato CSC.
+        menorPesoFila (numpy.ndarray): Columna de menor costo de cada fila.
+        poblacion (numpy.ndarray): Poblacion completa, se modifica.
+        indices (numpy.ndarray): Individuos de poblacion a reparar.
+        cobertura (numpy.ndarray): Cobertura por fila de cada individuo a reparar, se modifica.
+        prioridad (numpy.ndarray): Prioridad aleatoria de cada fila para cada individuo.
+        numReparaciones (numpy.ndarray): Contador de columnas agregadas por individuo, se modifica.
+    """
+    for a in range(len(indices)):
+        cov = cobertura[a]
+        while True:
+            fila = -1
+            menor = np.inf
+            for i in range(len(cov)):
+                if cov[i] == 0 and prioridad[a, i] < menor:
+                    menor = prioridad[a, i]
+                    fila = i
+            if fila < 0:
+                break
+            columna = menorPesoFila[fila]
+            poblacion[indices[a], columna] = 1
+            numReparaciones[indices[a]] += 1
+            for k in range(indptrC[columna], indptrC[columna + 1]):
+                cov[indicesC[k]] += 1
+
+
+@njit(cache=True)
+def tieneDescubiertas(cobertura, activos):
+    """Para cada individuo activo, True si tiene alguna fila sin cubrir."""
+    siguen = np.zeros(len(activos), dtype=np.bool_)
+    for a in range(len(activos)):
+        cov = cobertura[activos[a]]
+        for i in range(len(cov)):
+            if cov[i] == 0:
+                siguen[a] = True
+                break
+    return siguen
+
+
+@njit(cache=True)
+def seleccionaColumnas(indptrF, indicesF, indptrC, indicesC, pesos, ordenFilas, cobertura, activos, opcion, azar, marca):
+    """
+    Una ronda de la reparacion compleja, igual que ReparaStrategy.seleccionaColumnas.
+
+    Args:
+        indptrF, indicesF (numpy.ndarray): Matriz de cobertura en formato CSR.
+        indptrC, indicesC (numpy.ndarray): Matriz de cobertura en formato CSC.
+        pesos (numpy.ndarray): Costo de cada columna.
+        ordenFilas (numpy.ndarray): Filas de mayor a menor importancia.
+        cobertura (numpy.ndarray): Cobertura por fila de cada individuo.
+        activos (numpy.ndarray): Individuos (filas de cobertura) que eligen columna.
+        opcion (numpy.ndarray): Sorteo en [0, 5) por individuo; con 0 se elige al azar.
+        azar (numpy.ndarray): Sorteo en [0, 1) por individuo para la eleccion al azar.
+        marca (numpy.ndarray): Arreglo de trabajo de largo columnas, en -1.
+
+    Returns:
+        numpy.ndarray: Columna elegida para cada individuo activo.
+    """
+    elegidas = np.empty(len(activos), dtype=np.int64)
+    candidatas = np.empty(len(marca), dtype=np.int64)
+    for a in range(len(activos)):
+        cov = cobertura[activos[a]]
+        # Columnas que cubren las 10 filas descubiertas mas importantes
+        nCandidatas = 0
+        nFilas = 0
+        for fila in ordenFilas:
+            if cov[fila] != 0:
+                continue
+            for k in range(indptrF[fila], indptrF[fila + 1]):
+                columna = indicesF[k]
+                if marca[columna] != a:
+                    marca[columna] = a
+                    candidatas[nCandidatas] = columna
+                    nCandidatas += 1
+            nFilas += 1
+            if nFilas == 10:
+                break
+        columnas = np.sort(candidatas[:nCandidatas])
+
+        # costo / filas descubiertas que cubre cada candidata
+        peso = np.empty(nCandidatas, dtype=np.float64)
+        for j in range(nCandidatas):
+            conteo = 0.0
+            for k in range(indptrC[columnas[j]], indptrC[columnas[j] + 1]):
+                if cov[indicesC[k]] == 0:
+                    conteo += 1.0
+            peso[j] = pesos[columnas[j]] / conteo
+        orden = np.argsort(peso, kind='mergesort')
+
+        tam = min(nCandidatas, 10)
+        desplazamiento = 0
+        if opcion[a] == 0 and tam > 1:
+            desplazamiento = 1 + int(azar[a] * (tam - 1))
+        elegidas[a] = columnas[orden[desplazamiento]]
+    marca[:] = -1
+    return elegidas
+
+
+@njit(cache=True)
+def agregaColumnas(indptrC, indicesC, poblacion, cobertura, indices, activos, columnas, numReparaciones):
+    """Agrega a cada individuo activo su columna elegida y actualiza su cobertura."""
+    for a in range(len(activos)):
+        columna = columnas[a]
+        poblacion[indices[activos[a]], columna] = 1
+        numReparaciones[indices[activos[a]]] += 1
+        cov = cobertura[activos[a]]
+        for k in range(indptrC[columna], indptrC[columna + 1]):
+            cov[indicesC[k]] += 1
+
+
+@njit(cache=True)
+def eliminaRedundantes(indptrC, indicesC, ordenEliminacion, poblacion, cobertura, numEliminadas):
+    """
+    Quita las columnas redundantes de cada solucion, en el mismo lugar.
+
+    Recorre las columnas de mayor a menor costo/cobertura y quita cada una que
+    este en la solucion y tenga todas sus filas cubiertas al menos dos veces.
+    Da el mismo resultado que las rondas de ReparaStrategy.eliminaRedundantes.
+
+    Args:
+        indptrC, indicesC (numpy.ndarray): Matriz de cobertura en formato CSC.
+        ordenEliminacion (numpy.ndarray): Columnas de mayor a menor costo/cobertura.
+        poblacion (numpy.ndarray): Soluciones factibles, se modifica.
+        cobertura (numpy.ndarray): Cobertura por fila de cada solucion, se modifica.
+        numEliminadas (numpy.ndarray): Contador de columnas quitadas por individuo, se modifica.
+    """
+    for n in range(poblacion.shape[0]):
+        cov = cobertura[n]
+        for columna in ordenEliminacion:
+            if poblacion[n, columna] == 0:
+                continue
+            redundante = True
+            for k in range(indptrC[columna], indptrC[columna + 1]):
+                if cov[indicesC[k]] < 2:
+                    redundante = False
+                    break
+            if not redundante:
+                continue
+            poblacion[n, columna] = 0
+            numEliminadas[n] += 1
+            for k in range(indptrC[columna], indptrC[columna + 1]):
+                cov[indicesC[k]] -= 1
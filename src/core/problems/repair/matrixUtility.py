@@ -1,28 +1,96 @@
 __author__ = 'INVESTIGACION'
+import numpy as np
+from scipy import sparse
 
 def getRows(matrix, columns):
     """
         Entrega las filas que no cubren la lista columns
-        Let go to iterate by row.
-        For each row we ask to the actual total column, if these contain the row
-        If the row is not contain, then ad to R
-        Else, nothing to do.
-    """
-#    print(columns)
-#    exit()
-    R = []
-    row, col = matrix.shape
-    
-#    print(f'matrix {columns}')
-#    columns = list(columns)
-    #print 'Las Filas y Columnas', row, col, len(columns)
-    for i in range(0, row):
-#        print(f'i,columns {type(i)} {type(columns)}')
-        
-        if sum(matrix[i,columns]) == 0:
-            R.append(i)
-#        exit()
-    return R
+        Se marcan como cubiertas las filas de cada columna de la solucion
+        (recorriendo solo los no ceros de esas columnas) y se retornan
+        las filas que quedaron sin marcar.
+
+    Args:
+        matrix (scipy.sparse.spmatrix | numpy.ndarray): Matriz de cobertura del problema,
+            idealmente en formato CSC para acceder directo a las filas de cada columna.
+        columns (list): Indices de las columnas de la solucion.
+
+    Returns:
+        list: Indices de las filas no cubiertas.
+    """
+    matrix = sparse.csc_matrix(matrix)
+    cubiertas = np.zeros(matrix.shape[0], dtype=bool)
+    cubiertas[matrix[:, columns].indices] = True
+    return np.flatnonzero(~cubiertas).tolist()
+
+def expandeSegmentos(indptr, indices, segmentos):
+    """
+    Concatena los indices de varios segmentos de una matriz CSR/CSC.
+
+    Para una matriz CSC, segmentos son columnas y se obtienen las filas de cada
+    una; para una CSR, segmentos son filas y se obtienen sus columnas. Todo se
+    hace con operaciones de arreglos, sin ciclos en Python.
+
+    Args:
+        indptr (numpy.ndarray): Punteros de inicio de cada segmento.
+        indices (numpy.ndarray): Indices de los no ceros.
+        segmentos (numpy.ndarray): Segmentos a expandir (pueden repetirse).
+
+    Returns:
+        tuple: Tupla con 2 elementos:
+               - valores (numpy.ndarray): Indices concatenados de todos los segmentos.
+               - posicion (numpy.ndarray): Para cada valor, la posicion en segmentos
+                 del segmento al que pertenece.
+    """
+    segmentos = np.asarray(segmentos, dtype=np.int64)
+    inicio = indptr[segmentos]
+    largo = indptr[segmentos + 1] - inicio
+    posicion = np.repeat(np.arange(len(segmentos)), largo)
+    desplazamiento = np.arange(int(largo.sum())) - np.repeat(np.cumsum(largo) - largo, largo)
+    return indices[inicio[posicion] + desplazamiento], posicion
+
+class CoberturaIncremental:
+    """
+    Mantiene la cobertura de cada fila para una solucion que se construye
+    columna a columna.
+
+    Guarda un contador por fila (cuantas columnas de la solucion la cubren) y
+    la mascara de filas no cubiertas. Agregar o quitar una columna solo toca
+    las filas que esa columna cubre, en vez de recalcular toda la matriz.
+    """
+
+    def __init__(self, matrixCsc, columns):
+        """
+        Args:
+            matrixCsc (scipy.sparse.csc_matrix): Matriz de cobertura por columnas.
+            columns (list): Indices de las columnas iniciales de la solucion.
+        """
+        self.matrix = matrixCsc
+        self.cobertura = np.asarray(matrixCsc[:, columns].sum(axis=1)).ravel().astype(np.int64)
+        self.descubiertas = self.cobertura == 0
+        self.numDescubiertas = int(np.count_nonzero(self.descubiertas))
+
+    def filasColumna(self, column):
+        """Entrega las filas que cubre una columna, sin copiar la matriz."""
+        return self.matrix.indices[self.matrix.indptr[column]:self.matrix.indptr[column + 1]]
+
+    def agregarColumna(self, column):
+        """Suma la columna a la cobertura. Costo O(filas cubiertas por la columna)."""
+        filas = self.filasColumna(column)
+        self.numDescubiertas -= int(np.count_nonzero(self.descubiertas[filas]))
+        self.cobertura[filas] += 1
+        self.descubiertas[filas] = False
+
+    def quitarColumna(self, column):
+        """Resta la columna de la cobertura. Costo O(filas cubiertas por la columna)."""
+        filas = self.filasColumna(column)
+        self.cobertura[filas] -= 1
+        nuevas = self.cobertura[filas] == 0
+        self.descubiertas[filas[nuevas]] = True
+        self.numDescubiertas += int(np.count_nonzero(nuevas))
+
+    def getRows(self):
+        """Entrega las filas no cubiertas, igual que getRows(matrix, columns)."""
+        return np.flatnonzero(self.descubiertas)
 
 #def checkcolumSolution(column,lsolution):
 #    state = 0 # The column is not in the solution
@@ -1,5 +1,6 @@
 __author__ = 'INVESTIGACION'
 import random as rn
+import numpy as np
 from . import matrixUtility as mU
 from . import heuristic as he
 
@@ -110,7 +111,7 @@ def obtieneElemento(lSolucion, matrix, pesos, rHeuristic,dictcHeuristics,dict,cH
         estado = 1
     return lSolucion, estado
 
-def obtieneElemento2(lSolucion,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,dictCols):
+def obtieneElemento2(lSolucion,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,matrixCsc):
 #    tIni = tU.obtieneTime()
     uRows = mU.getRows(matrix,lSolucion)
     uColumns = []
@@ -132,7 +133,8 @@ def obtieneElemento2(lSolucion,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeu
         #-----------------------------------------------------------------------------------------------
         #column = he.SeleccionaColumnaNueva(pesos, matrix, pRows,uColumns)
 
-        column = he.heuristByCols(pesos,uRows,uColumns,dictCols)
+        # matriz de cobertura en formato CSC (columna -> filas)
+        column = he.heuristByCols(pesos,uRows,uColumns,matrixCsc)
 
         lSolucion.append(int(column))
         estado = 0
@@ -142,18 +144,36 @@ def obtieneElemento2(lSolucion,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeu
     #print 'EL obtieneLEmento2', tIni, tFin
     return lSolucion, estado
 
-def generaSolucion(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,dictCol):
-#    print(f'lSolution {type(lSolution)},matrix {type(matrix)},pesos {type(pesos)},rHeuristic {type(rHeuristic)},dictcHeuristics {type(dictcHeuristics)},dict {type(dict)},cHeuristic {type(cHeuristic)},dictCol {type(dictCol)}')
-#    exit()
+def obtieneElemento3(lSolucion,cobertura,pesos,rHeuristic,matrixCsr):
+    # Igual que obtieneElemento2, pero las filas no cubiertas vienen de la
+    # cobertura incremental en vez de recalcularse con mU.getRows
+    if cobertura.numDescubiertas > 0:
+        pRows = he.getProposedRowsMask(cobertura.descubiertas,rHeuristic,lparam = 10 )
+        uColumns = np.unique(np.concatenate([matrixCsr.indices[matrixCsr.indptr[i]:matrixCsr.indptr[i+1]] for i in pRows]))
+
+        column = he.heuristByCols(pesos,cobertura.descubiertas,uColumns,cobertura.matrix)
+
+        lSolucion.append(int(column))
+        cobertura.agregarColumna(int(column))
+        estado = 0
+    else:
+        estado = 1
+    return lSolucion, estado
+
+def generaSolucion(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,matrixCsc):
 #    lSolution = list(lSolution)
     estado = 0
     contReparaciones = 0
+    # Cobertura por fila de la solucion, se actualiza al agregar cada columna
+    # matrix llega por filas (CSR) y matrixCsc por columnas (CSC)
+    cobertura = mU.CoberturaIncremental(matrixCsc, lSolution)
 #    tInicio = tU.obtieneTime()
     while estado == 0:
         #lSolution, estado = obtienenNuevoElemento1(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict, cHeuristic)
         #lSolution, estado = obtienenNuevoElemento(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict, cHeuristic)
         #lSolution, estado = obtieneElemento(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict, cHeuristic)
-        lSolution, estado = obtieneElemento2(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,dictCol)
+        #lSolution, estado = obtieneElemento2(lSolution,matrix,pesos,rHeuristic,dictcHeuristics,dict,cHeuristic,matrixCsc)
+        lSolution, estado = obtieneElemento3(lSolution,cobertura,pesos,rHeuristic,matrix)
         contReparaciones += 1
 
 #    tFin = tU.obtieneTime()
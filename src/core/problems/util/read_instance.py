@@ -1,23 +1,39 @@
 #!/usr/bin/python
 # encoding=utf8
+import hashlib
+import os
+import shutil
+import tempfile
 import numpy as np
+from scipy import sparse
 class Read():
 # -*- coding: utf-8 -*-
 
-    def __init__(self,file):
+    def __init__(self,file,usarCache=True,dirCache=None):
+        """
+        Args:
+            file (str): Ruta del archivo de la instancia (formato OR-Library).
+            usarCache (bool): Si es True se usa el cache binario (.npy) de la instancia.
+            dirCache (str, opcional): Directorio del cache. Por defecto instances/.cache,
+                     junto a los directorios de instancias.
+        """
         self.__c = []
         self.__r = []
         self.rows = 0
         self.columns  = 0
+        self.usarCache = usarCache
+        self.dirCache = dirCache
         self.LeerInstancia(file)
     
     def get_c(self):
+        """Vector de costos (numpy.ndarray, de solo lectura si viene del cache)."""
         return self.__c
 
     def set_c(self, c):
         self.__c = c    
         
     def get_r(self):
+        """Matriz de cobertura en formato disperso (scipy.sparse.csr_matrix)."""
         return self.__r
 
     def set_r(self, r):
@@ -30,67 +46,100 @@ class Read():
         return self.columns 
     
     def LeerInstancia(self,Instancia):
-#        print(f'abriendo archivo {datetime.now()}')
+        """Lee la instancia, desde el cache binario si el archivo ya fue leido antes."""
         self.optimo = self.obtenerOptimo(Instancia)
-        Archivo = open(Instancia, "r")
-#        print(f'fin abriendo archivo {datetime.now()}')    
-        # Leer Dimensión
-        Registro = Archivo.readline().split()
-        self.rows = int(Registro[0])
-        self.columns      = int(Registro[1])
-        
-        # Leer Costo
-        Costos        = []
-        Registro      = Archivo.readline()
-        ContVariables = 1
-#        print(f'ciclo qlo 1 {datetime.now()}')
-        while Registro != "" and ContVariables <= self.columns :
-            Valores = Registro.split()
-            for Contador in range(len(Valores)):
-                Costos.append(int(Valores[Contador]))
-                ContVariables = ContVariables + 1
-            Registro = Archivo.readline()
-#        print(f'fin ciclo qlo 1 {datetime.now()}')
-        # Preparar Matriz de Restricciones.
-        
-#        print(f'ciclo qlo 2 {datetime.now()}')
-        Restricciones = np.zeros((self.rows,self.columns), dtype=np.int32).tolist()
-#        for Fila in range(self.rows):
-#            Restricciones.append([])
-#            for Columna in range(self.columns):
-#                Restricciones[Fila].append(0)
-#        print(f'fin ciclo qlo 2 {datetime.now()}')
-        # Leer Restricciones    
-        ContVariables      = 1
-        Fila               = 0
-        cont = 0
-#        print(f'ciclo qlo 3 {datetime.now()}')
-        while Registro != "":
-#            if Registro != '\n': 
-#            Registro = Registro.strip()
-#            Registro = Registro.replace('\n','').replace(" ",',')
-#            Registro = np.fromstring(Registro, dtype=int, sep=",")
-#            print(np.fromstring(Registro, dtype=int, sep=","))
-#            exit()
-            CantidadValoresUno = int(Registro)
-            ContadorValoresUno = 0
-            Registro = Archivo.readline()
-#            print(Registro)
-            Registro = Registro.replace('\n','').replace("\\n'",'')
-#            print(Registro)
-            while Registro != "" and ContadorValoresUno < CantidadValoresUno: 
-                Columnas = Registro.split() 
-                for Contador in range(len(Columnas)):
-                    Columna = int(Columnas[Contador]) - 1
-                    Restricciones[Fila][Columna] = 1
-                    ContadorValoresUno = ContadorValoresUno + 1
-                Registro = Archivo.readline()
-            Fila = Fila + 1
-#        print(f'fin ciclo qlo 3 {datetime.now()}')
-        Archivo.close()
+        directorio = self.directorioCache(Instancia) if self.usarCache else None
+        if directorio is not None and os.path.isdir(directorio):
+            Costos, Restricciones = self.cargarCache(directorio)
+        else:
+            Costos, Restricciones = self.parsearInstancia(Instancia)
+            if directorio is not None:
+                self.guardarCache(directorio, Costos, Restricciones)
+        self.rows, self.columns = Restricciones.shape
         self.set_c(Costos)
-        self.set_r(Restricciones)        
+        self.set_r(Restricciones)
+
+    def parsearInstancia(self, Instancia):
+        """
+        Lee un archivo de la OR-Library de una vez y lo separa en numeros con NumPy.
+
+        Formato: filas y columnas, el costo de cada columna y, por cada fila, la
+        cantidad de columnas que la cubren seguida de esas columnas (desde 1).
+
+        Returns:
+            tuple: (costos (numpy.ndarray), matriz de cobertura (scipy.sparse.csr_matrix))
+        """
+        with open(Instancia, "r") as Archivo:
+            Numeros = np.fromstring(Archivo.read(), dtype=np.int64, sep=' ')
+        rows = int(Numeros[0])
+        columns = int(Numeros[1])
+        Costos = Numeros[2:2 + columns]
+
+        # Posicion de la cantidad de columnas de cada fila, el resto son indices
+        Posicion = 2 + columns
+        Cantidades = np.empty(rows, dtype=np.int64)
+        for Fila in range(rows):
+            Cantidades[Fila] = Numeros[Posicion]
+            Posicion += Cantidades[Fila] + 1
+        EsIndice = np.ones(len(Numeros), dtype=bool)
+        EsIndice[:2 + columns] = False
+        EsIndice[2 + columns + np.arange(rows) + np.concatenate(([0], np.cumsum(Cantidades)[:-1]))] = False
+        Indices = Numeros[EsIndice] - 1
+        IndicesFila = np.concatenate(([0], np.cumsum(Cantidades)))
+
+        Restricciones = sparse.csr_matrix(
+            (np.ones(len(Indices), dtype=np.int32), Indices.astype(np.int32), IndicesFila.astype(np.int32)),
+            shape=(rows, columns))
+        # Columnas repetidas en una fila se cuentan una sola vez
+        Restricciones.sum_duplicates()
+        Restricciones.data[:] = 1
+        return Costos, Restricciones
+
+    def directorioCache(self, Instancia):
+        """
+        Directorio del cache binario de la instancia: instances/.cache/<nombre>-<hash>.
+
+        La clave es el hash del contenido, por lo que un archivo modificado
+        genera un cache nuevo y nunca se lee uno desactualizado.
+        """
+        with open(Instancia, "rb") as Archivo:
+            Hash = hashlib.sha1(Archivo.read()).hexdigest()[:16]
+        Nombre = os.path.splitext(os.path.basename(Instancia))[0]
+        Base = self.dirCache or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(Instancia))), '.cache')
+        return os.path.join(Base, f'{Nombre}-{Hash}')
+
+    def cargarCache(self, directorio):
+        """
+        Carga costos y matriz desde archivos .npy mapeados en memoria (solo lectura),
+        de modo que varios procesos en la misma maquina comparten las paginas.
+        """
+        Costos = np.load(os.path.join(directorio, 'costos.npy'), mmap_mode='r')
+        Indices = np.load(os.path.join(directorio, 'indices.npy'), mmap_mode='r')
+        IndicesFila = np.load(os.path.join(directorio, 'indptr.npy'), mmap_mode='r')
+        Forma = tuple(int(n) for n in np.load(os.path.join(directorio, 'forma.npy')))
+        Restricciones = sparse.csr_matrix(
+            (np.ones(len(Indices), dtype=np.int32), Indices, IndicesFila), shape=Forma)
+        return Costos, Restricciones
 
+    def guardarCache(self, directorio, Costos, Restricciones):
+        """
+        Escribe el cache en un directorio temporal y lo renombra al final, asi otro
+        proceso nunca ve un cache a medio escribir. Si no se puede escribir se sigue
+        sin cache.
+        """
+        Temporal = None
+        try:
+            os.makedirs(os.path.dirname(directorio), exist_ok=True)
+            Temporal = tempfile.mkdtemp(dir=os.path.dirname(directorio))
+            np.save(os.path.join(Temporal, 'costos.npy'), np.asarray(Costos))
+            np.save(os.path.join(Temporal, 'indices.npy'), Restricciones.indices)
+            np.save(os.path.join(Temporal, 'indptr.npy'), Restricciones.indptr)
+            np.save(os.path.join(Temporal, 'forma.npy'), np.array(Restricciones.shape, dtype=np.int64))
+            os.rename(Temporal, directorio)
+        except OSError:
+            # Otro proceso ya lo escribio, o el directorio no es escribible
+            if Temporal is not None:
+                shutil.rmtree(Temporal, ignore_errors=True)
 
     def obtenerOptimo(self, archivoInstancia):
         orden = {
@@ -5,5 +5,7 @@ Provides database operations for the metaheuristic solver.
 """
 
 from .db_manager import DatabaseManager
+from .iteration_writer import IterationWriter
+from .telemetry import TelemetryRecorder, decode_telemetry
 
-__all__ = ['DatabaseManager']
+__all__ = ['DatabaseManager', 'IterationWriter', 'TelemetryRecorder', 'decode_telemetry']
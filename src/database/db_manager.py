@@ -1,39 +1,241 @@
 import configparser
+import csv
+import io
 import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import json
 import sqlalchemy as db
 from sqlalchemy import text  # IMPORTANTE: Para evitar el error "name 'text' is not defined"
 from sqlalchemy.exc import SQLAlchemyError
 
+from .telemetry import TELEMETRY_FORMAT, encode_telemetry, decode_telemetry
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Engines compartidos por proceso: clave (ruta de configuracion, pid)
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+# Valores por defecto de la seccion opcional [pool] de database.ini
+POOL_DEFAULTS = {
+    'pool_size': 2,             # conexiones que se mantienen abiertas
+    'max_overflow': 2,          # conexiones extra permitidas en picos
+    'pool_timeout': 30,         # segundos de espera por una conexion libre
+    'pool_recycle': 1800,       # segundos antes de reabrir una conexion
+    'pool_pre_ping': True,      # comprobar la conexion antes de usarla
+    'statement_timeout_ms': 0,  # limite por consulta en PostgreSQL (0 = sin limite)
+}
+
+
+class PoolMetrics:
+    """
+    Contadores del pool de un engine.
+
+    Los checkouts y las conexiones nuevas se cuentan con eventos del pool;
+    el tiempo de espera se mide en DatabaseManager.connect() y begin().
+    """
+
+    def __init__(self, engine):
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+        self._pool = engine.pool
+        db.event.listen(engine, 'checkout', self._on_checkout)
+        db.event.listen(engine, 'connect', self._on_connect)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def record_wait(self, seconds):
+        """Registra cuanto tardo en obtenerse una conexion del pool."""
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self):
+        """Contadores como diccionario."""
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'wait_avg_ms': 1000 * self.wait_total / self.waits if self.waits else 0.0,
+                'wait_max_ms': 1000 * self.wait_max,
+                'checked_out': self._pool.checkedout() if hasattr(self._pool, 'checkedout') else 0,
+                'size': self._pool.size() if hasattr(self._pool, 'size') else 0
+            }
+
+    def summary(self):
+        """Resumen de una linea de los contadores."""
+        stats = self.stats()
+        return (f"DB pool: {stats['checkouts']} checkouts, {stats['connects']} connections opened, "
+                f"wait avg {stats['wait_avg_ms']:.1f} ms / max {stats['wait_max_ms']:.1f} ms, "
+                f"{stats['checked_out']}/{stats['size']} in use")
+
+
+def get_engine(config_path):
+    """
+    Engine compartido por todos los DatabaseManager del proceso.
+
+    Se crea uno por archivo de configuracion y por pid: un proceso hijo creado
+    con fork no reutiliza las conexiones del padre, abre su propio pool. Las
+    metricas se registran antes de abrir la primera conexion, para contarlas todas.
+
+    Returns:
+        tuple: (engine, PoolMetrics)
+    """
+    key = (os.path.abspath(config_path), os.getpid())
+    with _ENGINES_LOCK:
+        if key not in _ENGINES:
+            engine = _create_engine(config_path)
+            metrics = PoolMetrics(engine)
+            if engine.dialect.name == 'sqlite':
+                _create_sqlite_schema(engine)
+            _ENGINES[key] = (engine, metrics)
+        return _ENGINES[key]
+
+
+def _create_engine(config_path):
+    config = configparser.ConfigParser()
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Archivo de configuración no encontrado: {config_path}")
+    config.read(config_path)
+    
+    p = {}
+    for option, default in POOL_DEFAULTS.items():
+        if isinstance(default, bool):
+            p[option] = config.getboolean('pool', option, fallback=default)
+        else:
+            p[option] = config.getint('pool', option, fallback=default)
+    
+    backend = config.get('database', 'backend', fallback='postgres')
+    if backend == 'sqlite':
+        return _create_sqlite_engine(config, p)
+    if backend != 'postgres':
+        raise ValueError(f"Backend desconocido en {config_path}: {backend} (usar postgres o sqlite)")
+    if 'postgres' not in config:
+        raise ValueError(f"Falta la sección [postgres] en {config_path}")
+    
+    c = config['postgres']
+    conn_str = f"postgresql://{c['user']}:{c['pass']}@{c['host']}:{c['port']}/{c['db_name']}"
+    
+    connect_args = {}
+    if p['statement_timeout_ms'] > 0:
+        connect_args['options'] = f"-c statement_timeout={p['statement_timeout_ms']}"
+    return db.create_engine(
+        conn_str,
+        pool_size=p['pool_size'],
+        max_overflow=p['max_overflow'],
+        pool_timeout=p['pool_timeout'],
+        pool_recycle=p['pool_recycle'],
+        pool_pre_ping=p['pool_pre_ping'],
+        connect_args=connect_args
+    )
+
+
+def _create_sqlite_engine(config, p):
+    """
+    Engine sobre un archivo SQLite en modo WAL, para correr la cola sin PostgreSQL.
+
+    Cada transaccion empieza con BEGIN IMMEDIATE: toma el lock de escritura al
+    inicio, asi la toma de experimentos es atomica entre procesos (lo que en
+    PostgreSQL hace FOR UPDATE SKIP LOCKED). Las lecturas no se bloquean (WAL).
+    El esquema lo crea get_engine con _create_sqlite_schema.
+    """
+    path = config.get('sqlite', 'path', fallback=os.path.join('data', 'experimentos.db'))
+    if not os.path.isabs(path):
+        path = os.path.join(ROOT_DIR, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    busy_timeout_ms = config.getint('sqlite', 'busy_timeout_ms', fallback=30000)
+    
+    engine = db.create_engine(
+        f"sqlite:///{path}",
+        poolclass=db.pool.QueuePool,
+        pool_size=p['pool_size'],
+        max_overflow=p['max_overflow'],
+        pool_timeout=p['pool_timeout'],
+        pool_recycle=p['pool_recycle'],
+        pool_pre_ping=p['pool_pre_ping'],
+        connect_args={
+            'timeout': busy_timeout_ms / 1000,
+            # Columnas TIMESTAMP se leen como datetime, igual que en PostgreSQL
+            'detect_types': sqlite3.PARSE_DECLTYPES,
+            # El IterationWriter usa la conexion desde otro hilo
+            'check_same_thread': False
+        }
+    )
+    
+    def configurar(dbapi_connection, connection_record):
+        # Transacciones manejadas por el evento 'begin', no por el driver
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+        dbapi_connection.execute('PRAGMA synchronous=NORMAL')
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+    
+    def begin_immediate(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+    
+    db.event.listen(engine, 'connect', configurar)
+    db.event.listen(engine, 'begin', begin_immediate)
+    return engine
+
+
+def _create_sqlite_schema(engine):
+    """Crea las tablas que falten (sql/create_sqlite_schema.sql)."""
+    with open(os.path.join(ROOT_DIR, 'sql', 'create_sqlite_schema.sql')) as f:
+        schema = f.read()
+    connection = engine.raw_connection()
+    try:
+        connection.executescript(schema)
+    finally:
+        connection.close()
+
+
 class DatabaseManager:
     def __init__(self, config_path=None):
         if config_path is None:
-            config_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'config',
-                'database.ini'
-            )
-        self.engine = self._create_engine(config_path)
+            config_path = os.path.join(ROOT_DIR, 'config', 'database.ini')
+        # Todas las instancias del proceso comparten el mismo engine (y pool)
+        self.engine, self.pool_metrics = get_engine(config_path)
+        self.is_sqlite = self.engine.dialect.name == 'sqlite'
         self.metadata = db.MetaData()
 
-    def _create_engine(self, config_path):
-        config = configparser.ConfigParser()
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"Archivo de configuración no encontrado: {config_path}")
-        config.read(config_path)
-        if 'postgres' not in config:
-            raise ValueError(f"Falta la sección [postgres] en {config_path}")
-        
-        c = config['postgres']
-        conn_str = f"postgresql://{c['user']}:{c['pass']}@{c['host']}:{c['port']}/{c['db_name']}"
-        return db.create_engine(conn_str)
+    @contextmanager
+    def connect(self):
+        """Conexion del pool compartido, midiendo la espera por ella."""
+        start = time.perf_counter()
+        connection = self.engine.connect()
+        self.pool_metrics.record_wait(time.perf_counter() - start)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def begin(self):
+        """Como connect(), dentro de una transaccion que se confirma al salir."""
+        with self.connect() as connection:
+            with connection.begin():
+                yield connection
 
     def get_queue_status(self):
         """Obtiene estadísticas de la cola de experimentos."""
         stats = {'pendiente': 0, 'ejecutando': 0, 'completado': 0, 'error': 0, 'total': 0}
         try:
-            with self.engine.connect() as connection:
+            with self.connect() as connection:
                 sql = text("SELECT estado, COUNT(*) as count FROM datos_ejecucion GROUP BY estado;")
                 result = connection.execute(sql).fetchall()
                 for row in result:
@@ -46,20 +248,361 @@ class DatabaseManager:
             print(f"Error crítico en base de datos: {e}")
             return stats
 
-    def get_pending_experiment(self):
+    def json_text(self, *keys, column='parametros'):
+        """
+        Expresion SQL que extrae como texto column -> keys[0] -> ... segun el dialecto.
+
+        En PostgreSQL, ('paramsProblem', 'instance_name') da la misma expresion
+        que el indice de sql/create_indice_afinidad.sql.
+        """
+        if self.is_sqlite:
+            return f"json_extract({column}, '$.{'.'.join(keys)}')"
+        path = ''.join(f" -> '{key}'" for key in keys[:-1])
+        return f"({column}::jsonb{path} ->> '{keys[-1]}')"
+
+    def create_experiment(self, algorithm_name, parameters, status='pendiente'):
+        """
+        Agrega un experimento a la cola.
+
+        Args:
+            algorithm_name (str): Valor de nombre_algoritmo.
+            parameters (dict): Parametros del experimento, se guardan como JSON.
+            status (str): Estado inicial, normalmente 'pendiente'.
+
+        Returns:
+            int: Id del experimento creado, o None si hubo un error.
+        """
         try:
-            with self.engine.connect() as connection:
-                # Se cargan las tablas dinámicamente si es necesario
+            with self.begin() as connection:
                 sql = text("""
-                    UPDATE datos_ejecucion SET estado = 'ejecutando', inicio = :inicio
-                    WHERE id = (SELECT id FROM datos_ejecucion WHERE estado = 'pendiente' 
-                    ORDER BY id ASC LIMIT 1 FOR UPDATE)
-                    RETURNING id, nombre_algoritmo, parametros;
+                    INSERT INTO datos_ejecucion (nombre_algoritmo, parametros, estado)
+                    VALUES (:nombre, :parametros, :estado) RETURNING id;
+                """)
+                return connection.execute(sql, {
+                    "nombre": algorithm_name,
+                    "parametros": json.dumps(parameters),
+                    "estado": status
+                }).scalar()
+        except Exception as e:
+            print(f"Error al crear experimento: {e}")
+            return None
+
+    def get_pending_instances(self, limit=10):
+        """
+        Instancias con mas experimentos pendientes.
+
+        Returns:
+            list: Tuplas (problemName, instance_dir, instance_file, pendientes),
+                  de mayor a menor cantidad de pendientes.
+        """
+        try:
+            with self.connect() as connection:
+                sql = text(f"""
+                    SELECT {self.json_text('problemName')},
+                           {self.json_text('paramsProblem', 'instance_dir')},
+                           {self.json_text('paramsProblem', 'instance_file')},
+                           COUNT(*)
+                    FROM datos_ejecucion WHERE estado = 'pendiente'
+                    GROUP BY 1, 2, 3 ORDER BY 4 DESC LIMIT :limite;
                 """)
-                result = connection.execute(sql, {"inicio": datetime.now()}).fetchone()
-                if result:
-                    return result[0], result[1], json.loads(result[2])
-                return 0, '', {}
+                return [tuple(row) for row in connection.execute(sql, {"limite": limit}).fetchall()]
+        except Exception as e:
+            print(f"Error crítico en base de datos: {e}")
+            return []
+
+    def get_pending_experiment(self, preferred_instance=None):
+        """
+        Toma el siguiente experimento pendiente y lo marca como 'ejecutando'.
+
+        Con preferred_instance (afinidad) se prefiere el pendiente mas antiguo de
+        esa instancia, normalmente la ultima que ejecuto el worker, para que sus
+        caches sigan sirviendo; si no queda ninguno se toma el mas antiguo.
+
+        Returns:
+            tuple: (id, nombre_algoritmo, parametros) o (0, '', {}) si no hay pendientes.
+        """
+        experiments = self.claim_experiments(1, preferred_instance)
+        if experiments:
+            self.start_experiment(experiments[0][0])
+            return experiments[0]
+        return 0, '', {}
+
+    def claim_experiments(self, n, preferred_instance=None):
+        """
+        Toma hasta n experimentos pendientes en una sola transaccion.
+
+        Usa FOR UPDATE SKIP LOCKED: cada worker salta las filas que otro esta
+        tomando en ese momento en vez de esperar por la misma fila mas antigua.
+        En SQLite la transaccion (BEGIN IMMEDIATE) ya excluye a los demas workers.
+        Con preferred_instance se llenan primero con pendientes de esa instancia
+        y el resto con los mas antiguos.
+
+        Los experimentos quedan en 'ejecutando' con inicio en NULL: inicio se
+        marca con start_experiment cuando el worker empieza cada uno, para que
+        la espera en el buffer local no cuente como tiempo de ejecucion.
+
+        Returns:
+            list: Tuplas (id, nombre_algoritmo, parametros) ordenadas por id; vacia
+                  si no hay pendientes o hubo un error.
+        """
+        try:
+            with self.begin() as connection:
+                rows = []
+                if preferred_instance is not None:
+                    rows = connection.execute(
+                        self._claim_sql(f"AND {self.json_text('paramsProblem', 'instance_name')} = :instancia"),
+                        {"n": n, "instancia": preferred_instance}
+                    ).fetchall()
+                if len(rows) < n:
+                    rows += connection.execute(
+                        self._claim_sql(), {"n": n - len(rows)}
+                    ).fetchall()
+                return [(row[0], row[1], json.loads(row[2])) for row in sorted(rows, key=lambda row: row[0])]
         except Exception as e:
             print(f"Error al obtener experimento: {e}")
-            return 0, '', {}
\ No newline at end of file
+            return []
+
+    def start_experiment(self, experiment_id):
+        """
+        Marca el inicio de un experimento tomado, al empezar a ejecutarlo.
+
+        Args:
+            experiment_id (int): Id en datos_ejecucion.
+        """
+        try:
+            with self.begin() as connection:
+                sql = text("UPDATE datos_ejecucion SET inicio = :inicio WHERE id = :id AND estado = 'ejecutando';")
+                connection.execute(sql, {"inicio": datetime.now(), "id": experiment_id})
+        except Exception as e:
+            print(f"Error al iniciar experimento {experiment_id}: {e}")
+
+    def release_experiments(self, ids):
+        """
+        Devuelve a 'pendiente' experimentos tomados que no se alcanzaron a ejecutar.
+
+        Solo afecta a los que siguen en 'ejecutando', para no pisar uno que ya
+        termino o fallo.
+
+        Returns:
+            int: Numero de experimentos liberados.
+        """
+        if not ids:
+            return 0
+        try:
+            with self.begin() as connection:
+                sql = text("""
+                    UPDATE datos_ejecucion SET estado = 'pendiente', inicio = NULL
+                    WHERE id IN :ids AND estado = 'ejecutando';
+                """).bindparams(db.bindparam('ids', expanding=True))
+                return connection.execute(sql, {"ids": list(ids)}).rowcount
+        except Exception as e:
+            print(f"Error al liberar experimentos: {e}")
+            return 0
+
+    ITERATION_COLUMNS = ('id_ejecucion', 'numero_iteracion', 'fitness_mejor', 'parametros_iteracion')
+    RESULT_COLUMNS = ('id_ejecucion', 'fitness', 'inicio', 'fin', 'mejor_solucion')
+
+    def insert_iteration_data(self, data, method=None):
+        """
+        Inserta un lote de registros de iteracion en datos_iteracion.
+
+        Args:
+            data (list): Diccionarios con id_ejecucion, numero_iteracion,
+                         fitness_mejor y parametros_iteracion.
+            method (str, opcional): 'copy' (COPY FROM STDIN), 'insert' (INSERT por
+                   lotes) o None para usar COPY y volver a INSERT si falla.
+
+        Returns:
+            list: Lista vacia, para reiniciar el buffer del llamador.
+
+        Raises:
+            RuntimeError: Si las filas no se pudieron insertar.
+        """
+        if not self._bulk_insert('datos_iteracion', self.ITERATION_COLUMNS, data, method):
+            raise RuntimeError(f"No se pudieron insertar {len(data)} filas en datos_iteracion")
+        return []
+
+    def insert_best_solution(self, data, method=None):
+        """
+        Inserta el resultado final de uno o mas experimentos en resultado_ejecucion.
+
+        Args:
+            data (list): Diccionarios con id_ejecucion, fitness, inicio, fin y,
+                         opcionalmente, mejor_solucion.
+            method (str, opcional): Igual que en insert_iteration_data.
+
+        Raises:
+            RuntimeError: Si las filas no se pudieron insertar.
+        """
+        if not self._bulk_insert('resultado_ejecucion', self.RESULT_COLUMNS,
+                                 [{"mejor_solucion": None, **row} for row in data], method):
+            raise RuntimeError(f"No se pudieron insertar {len(data)} filas en resultado_ejecucion")
+
+    def _bulk_insert(self, table, columns, data, method=None):
+        """
+        Inserta filas con COPY si se puede y, si no, con INSERT por lotes.
+
+        Returns:
+            bool: True si las filas se insertaron.
+        """
+        if not data:
+            return True
+        if method in (None, 'copy') and self._copy_rows(table, columns, data):
+            return True
+        if method == 'copy':
+            return False
+        try:
+            with self.begin() as connection:
+                sql = text(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    VALUES ({', '.join(':' + column for column in columns)});
+                """)
+                connection.execute(sql, data)
+            return True
+        except Exception as e:
+            print(f"Error al insertar en {table}: {e}")
+            return False
+
+    def insert_rows(self, connection, table, columns, data):
+        """
+        Inserta filas dentro de la transaccion de connection (obtenida con begin()).
+
+        Usa COPY en PostgreSQL (psycopg2) e INSERT por lotes en otro caso. A
+        diferencia de _bulk_insert, los errores se propagan, para que la
+        transaccion completa se deshaga junto con lo demas que haya hecho.
+
+        Args:
+            connection: Conexion de self.begin().
+            table (str): Tabla destino.
+            columns (tuple): Columnas a escribir.
+            data (list): Diccionarios con esas columnas.
+        """
+        if not data:
+            return
+        if self.engine.dialect.name == 'postgresql':
+            cursor = connection.connection.cursor()
+            if hasattr(cursor, 'copy_expert'):
+                cursor.copy_expert(self._copy_sql(table, columns), self._csv_buffer(columns, data))
+                return
+        connection.execute(db.table(table, *[db.column(column) for column in columns]).insert(), data)
+
+    @staticmethod
+    def _copy_sql(table, columns):
+        """COPY desde STDIN en CSV, con \\N como NULL."""
+        return f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    @staticmethod
+    def _csv_buffer(columns, data):
+        """Filas en CSV para COPY; los None se escriben como \\N."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in data:
+            writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+        return buffer
+
+    def _copy_rows(self, table, columns, data):
+        """
+        Inserta filas con COPY ... FROM STDIN (psycopg2 copy_expert), en formato CSV.
+
+        Es mucho mas rapido que INSERT para lotes grandes. Los None se escriben
+        como \\N, que es el NULL declarado en el COPY.
+
+        Returns:
+            bool: True si se pudo usar COPY; False si el driver no lo soporta o fallo.
+        """
+        if self.engine.dialect.name != 'postgresql':
+            return False
+        buffer = self._csv_buffer(columns, data)
+        start = time.perf_counter()
+        connection = self.engine.raw_connection()
+        self.pool_metrics.record_wait(time.perf_counter() - start)
+        try:
+            cursor = connection.cursor()
+            if not hasattr(cursor, 'copy_expert'):
+                # Driver distinto de psycopg2
+                return False
+            cursor.copy_expert(self._copy_sql(table, columns), buffer)
+            connection.commit()
+            return True
+        except Exception as e:
+            connection.rollback()
+            print(f"COPY en {table} fallo, se usa INSERT: {e}")
+            return False
+        finally:
+            connection.close()
+
+    def insert_telemetry(self, experiment_id, arrays):
+        """
+        Guarda las series de un experimento como un blob comprimido en telemetria_ejecucion.
+
+        Si el experimento ya tenia telemetria (por ejemplo, se reejecuto) se reemplaza.
+
+        Args:
+            experiment_id (int): Id en datos_ejecucion.
+            arrays (dict): Series por columna, como las entrega TelemetryRecorder.arrays().
+
+        Raises:
+            RuntimeError: Si la telemetria no se pudo guardar.
+        """
+        blob = encode_telemetry(arrays)
+        iteraciones = max((len(values) for values in arrays.values()), default=0)
+        try:
+            with self.begin() as connection:
+                sql = text("""
+                    INSERT INTO telemetria_ejecucion (id_ejecucion, formato, iteraciones, datos)
+                    VALUES (:id, :formato, :iteraciones, :datos)
+                    ON CONFLICT (id_ejecucion) DO UPDATE
+                    SET formato = EXCLUDED.formato, iteraciones = EXCLUDED.iteraciones,
+                        datos = EXCLUDED.datos, fecha = CURRENT_TIMESTAMP;
+                """)
+                connection.execute(sql, {"id": experiment_id, "formato": TELEMETRY_FORMAT,
+                                         "iteraciones": iteraciones, "datos": blob})
+        except Exception as e:
+            raise RuntimeError(f"No se pudo guardar la telemetria del experimento {experiment_id}: {e}") from e
+
+    def get_telemetry(self, experiment_id, connection=None):
+        """
+        Lee la telemetria de un experimento.
+
+        Args:
+            experiment_id (int): Id en datos_ejecucion.
+            connection (opcional): Conexion abierta a reutilizar.
+
+        Returns:
+            dict: Columna -> ndarray (una entrada o fila por iteracion), o None si
+                  el experimento no tiene telemetria.
+        """
+        sql = text("SELECT datos FROM telemetria_ejecucion WHERE id_ejecucion = :id;")
+        if connection is None:
+            with self.connect() as connection:
+                blob = connection.execute(sql, {"id": experiment_id}).scalar()
+        else:
+            blob = connection.execute(sql, {"id": experiment_id}).scalar()
+        return None if blob is None else decode_telemetry(blob)
+
+    def finish_experiment(self, experiment_id, fin, estado):
+        """
+        Marca un experimento como terminado (o con error).
+
+        Args:
+            experiment_id (int): Id en datos_ejecucion.
+            fin (datetime): Fecha de termino (puede ser None).
+            estado (str): Nuevo estado, por ejemplo 'terminado' o 'error'.
+        """
+        try:
+            with self.begin() as connection:
+                sql = text("UPDATE datos_ejecucion SET estado = :estado, fin = :fin WHERE id = :id;")
+                connection.execute(sql, {"estado": estado, "fin": fin, "id": experiment_id})
+        except Exception as e:
+            print(f"Error al finalizar experimento {experiment_id}: {e}")
+
+    def _claim_sql(self, filtro=""):
+        """UPDATE que toma los :n pendientes mas antiguos que cumplen el filtro."""
+        bloqueo = "" if self.is_sqlite else "FOR UPDATE SKIP LOCKED"
+        return text(f"""
+            UPDATE datos_ejecucion SET estado = 'ejecutando', inicio = NULL
+            WHERE id IN (SELECT id FROM datos_ejecucion WHERE estado = 'pendiente' {filtro}
+            ORDER BY id ASC LIMIT :n {bloqueo})
+            RETURNING id, nombre_algoritmo, parametros;
+        """)
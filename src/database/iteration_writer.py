@@ -0,0 +1,110 @@
+"""
+Iteration Writer
+
+Background writer for per-iteration records, so the optimisation loop does
+not wait on database round-trips.
+"""
+
+import queue
+import threading
+import time
+
+
+# Queue marker asking the writer thread to write what it has right away
+_FLUSH = object()
+# Queue marker stopping the writer thread
+_STOP = object()
+
+
+class IterationWriter:
+    """
+    Writes iteration records to datos_iteracion from a background thread.
+
+    Solvers push one record per iteration with put(). The writer thread
+    groups them into batches of up to batch_size records (or whatever has
+    arrived after flush_interval seconds) and inserts each batch with
+    DatabaseManager.insert_iteration_data.
+
+    The queue is bounded: if the database falls behind by max_pending
+    records, put() blocks until the writer catches up (back-pressure), so
+    memory stays bounded. flush() blocks until every record pushed so far is
+    written and must be called before finish_experiment: it raises if any
+    batch since the previous flush could not be written, so the run is not
+    marked finished with iterations missing.
+    """
+
+    def __init__(self, db, batch_size=500, max_pending=5000, flush_interval=2.0):
+        """
+        Args:
+            db: DatabaseManager used for the inserts
+            batch_size: Maximum records per insert
+            max_pending: Maximum records waiting in the queue before put() blocks
+            flush_interval: Seconds to wait for a batch to fill up before writing it
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        # Records of failed batches since the last flush, and the last error
+        self.failed = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='iteration-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, record):
+        """Queue one iteration record; blocks while the queue is full."""
+        self._queue.put(record)
+
+    def flush(self, check=True):
+        """
+        Block until every queued record has been written.
+
+        Args:
+            check: Raise RuntimeError if a batch failed since the last flush.
+                The failure count is reset either way, so the solvers' error
+                path can drain the queue with check=False.
+        """
+        self._queue.put(_FLUSH)
+        self._queue.join()
+        failed, error = self.failed, self.error
+        self.failed, self.error = 0, None
+        if check and failed:
+            raise RuntimeError(f"{failed} iteration records could not be written: {error}") from error
+
+    def close(self):
+        """Write pending records and stop the writer thread."""
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        """Writer thread: collect batches and insert them."""
+        while True:
+            item = self._queue.get()
+            batch = []
+            taken = 1
+            deadline = time.monotonic() + self.flush_interval
+            # Keep collecting until the batch is full, the interval ends or a marker arrives
+            while item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    taken += 1
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self.db.insert_iteration_data(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    print(f"Error writing iteration data: {e}")
+                    self.failed += len(batch)
+                    self.error = e
+            for _ in range(taken):
+                self._queue.task_done()
+            if item is _STOP:
+                return
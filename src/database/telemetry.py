@@ -0,0 +1,75 @@
+"""
+Telemetry
+
+Compact columnar storage for the iteration series of one experiment.
+
+Instead of one datos_iteracion row per iteration with a JSON string of
+stringified arrays, the whole run is kept as NumPy columns and stored as a
+single np.savez_compressed blob in telemetria_ejecucion
+(sql/create_telemetria_ejecucion.sql).
+"""
+
+import io
+
+import numpy as np
+
+
+# Format tag stored next to each blob, in case the layout changes
+TELEMETRY_FORMAT = 'npz-v1'
+
+
+class TelemetryRecorder:
+    """
+    Accumulates the iteration series of one run as columns.
+
+    Each call to record() adds one iteration. Every keyword is a column:
+    scalars become 1-D arrays and 1-D values (e.g. the 6 diversities) become
+    one row of a 2-D array. String values (the discretization scheme) are
+    stored as an integer code per iteration plus a '<column>_names' array
+    with the distinct strings, so the blob holds no Python objects.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._codes = {}
+        self.iterations = 0
+
+    def record(self, **values):
+        """Add one iteration; every call must give the same columns."""
+        for name, value in values.items():
+            if isinstance(value, str):
+                codes = self._codes.setdefault(name, {})
+                value = codes.setdefault(value, len(codes))
+            self._columns.setdefault(name, []).append(value)
+        self.iterations += 1
+
+    def arrays(self):
+        """
+        Return the recorded series.
+
+        Returns:
+            dict: Column name -> ndarray with one entry (or row) per iteration.
+        """
+        arrays = {name: np.asarray(values) for name, values in self._columns.items()}
+        for name, codes in self._codes.items():
+            arrays[name] = arrays[name].astype(np.int16)
+            arrays[f'{name}_names'] = np.array(list(codes), dtype=str)
+        return arrays
+
+
+def encode_telemetry(arrays):
+    """Serialize a dict of arrays as a compressed .npz blob."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_telemetry(blob):
+    """
+    Read a blob written by encode_telemetry.
+
+    Returns:
+        dict: Column name -> ndarray.
+    """
+    with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
@@ -11,7 +11,7 @@ import time
 from datetime import datetime
 import json
 
-from ..database import DatabaseManager
+from ..database import DatabaseManager, IterationWriter, TelemetryRecorder
 from ..core.problems import RW
 from ..core.metrics import Diversidad as dv
 
@@ -26,9 +26,18 @@ class RWMLSolver:
     - Adaptive discretization scheme selection
     """
     
-    def __init__(self):
-        """Initialize solver with database connection."""
+    def __init__(self, telemetry='json'):
+        """
+        Initialize solver with database connection.
+        
+        Args:
+            telemetry: Where iteration data goes: 'json' (datos_iteracion rows),
+                'blob' (one compressed telemetria_ejecucion blob) or 'both'
+        """
         self.db = DatabaseManager()
+        self.telemetry = telemetry
+        # Iteration records are written from a background thread
+        self.writer = IterationWriter(self.db)
         self.workdir = os.path.abspath(os.getcwd())
     
     def solve(self, experiment_id, mh_algorithm, params_mh, ml_algorithm, 
@@ -95,15 +104,20 @@ class RWMLSolver:
             params['bestHistoricalIndividual'] = matrix_cont.copy()
             params['fitnessHistoricalIndividual'] = fitness.copy()
             
+            # Diversities to compute each iteration (paramsML selection and stride)
+            diversity_plan = dv.PlanDiversidades(params_ml)
+            
             # Initial diversity calculation
             max_diversidades = np.zeros(7)
             diversidades, max_diversidades, porcentaje_explor, porcentaje_explot, new_states = \
-                dv.ObtenerDiversidadYEstado(matrix_dis, max_diversidades)
+                dv.ObtenerDiversidadYEstado(matrix_dis, max_diversidades, diversity_plan.indices(0))
             state = new_states[0]
             
+            # Columnar series of the run, stored as one blob at the end
+            telemetry = TelemetryRecorder() if self.telemetry != 'json' else None
+            
             # Start optimization
             inicio = datetime.now()
-            memory = []
             
             for iter in range(max_iter):
                 process_time_start = time.process_time()
@@ -147,7 +161,9 @@ class RWMLSolver:
                 
                 # Calculate diversity
                 diversidades, max_diversidades, porcentaje_explor, porcentaje_explot, new_states = \
-                    dv.ObtenerDiversidadYEstado(matrix_dis, max_diversidades)
+                    dv.ObtenerDiversidadYEstado(
+                        matrix_dis, max_diversidades, diversity_plan.indices(iter + 1), diversidades
+                    )
                 
                 best_fitness_str = str(np.min(fitness))
                 
@@ -168,35 +184,45 @@ class RWMLSolver:
                 process_time_end = np.round(time.process_time() - process_time_start, 6)
                 
                 # Store iteration data
-                data_iter = {
-                    "id_ejecucion": experiment_id,
-                    "numero_iteracion": iter,
-                    "fitness_mejor": best_fitness_str,
-                    "parametros_iteracion": json.dumps({
-                        "fitness": best_fitness_str,
-                        "clockTime": wall_time_end,
-                        "processTime": process_time_end,
-                        "DS": str(action),
-                        "Diversidades": str(diversidades),
-                        "PorcentajeExplor": str(porcentaje_explor),
-                        "BestCostoTotal": str(best_costo),
-                        "BestEmisionTotal": str(best_emision),
-                        "BestVolumenHormigon": str(best_volumen),
-                        "BestKilosTotalesAcero": str(best_kilos),
-                        "Best": str(matrix_dis[solutions_ranking[0]])
-                    })
-                }
-                
-                memory.append(data_iter)
-                
-                # Insert data every 100 iterations to avoid memory issues
-                if iter % 100 == 0 and iter > 0:
-                    self.db.insert_iteration_data(memory)
-                    memory = []
+                if self.telemetry != 'blob':
+                    data_iter = {
+                        "id_ejecucion": experiment_id,
+                        "numero_iteracion": iter,
+                        "fitness_mejor": best_fitness_str,
+                        "parametros_iteracion": json.dumps({
+                            "fitness": best_fitness_str,
+                            "clockTime": wall_time_end,
+                            "processTime": process_time_end,
+                            "DS": str(action),
+                            "Diversidades": str(diversidades),
+                            "PorcentajeExplor": str(porcentaje_explor),
+                            "BestCostoTotal": str(best_costo),
+                            "BestEmisionTotal": str(best_emision),
+                            "BestVolumenHormigon": str(best_volumen),
+                            "BestKilosTotalesAcero": str(best_kilos),
+                            "Best": str(matrix_dis[solutions_ranking[0]])
+                        })
+                    }
+                    self.writer.put(data_iter)
+                if telemetry is not None:
+                    telemetry.record(
+                        fitness=np.min(fitness),
+                        clock_time=wall_time_end,
+                        process_time=process_time_end,
+                        ds=ds_actions[action],
+                        diversidades=diversidades,
+                        porcentaje_explor=porcentaje_explor,
+                        best_costo=best_costo,
+                        best_emision=best_emision,
+                        best_volumen=best_volumen,
+                        best_kilos=best_kilos,
+                        best=matrix_dis[solutions_ranking[0]].copy()
+                    )
             
-            # Insert remaining iteration data
-            if len(memory) > 0:
-                self.db.insert_iteration_data(memory)
+            # All iteration data must be written before the run is marked finished
+            self.writer.flush()
+            if telemetry is not None:
+                self.db.insert_telemetry(experiment_id, telemetry.arrays())
             
             # Store final results
             fin = datetime.now()
@@ -221,6 +247,8 @@ class RWMLSolver:
             print(f'Error executing experiment {experiment_id}: {e}')
             import traceback
             traceback.print_exc()
+            # Drain the queue without raising again; the run is marked 'error' anyway
+            self.writer.flush(check=False)
             self.db.finish_experiment(experiment_id, datetime.now(), 'error')
             return False
     
@@ -10,8 +10,8 @@ import time
 from datetime import datetime
 import json
 
-from ..database import DatabaseManager
-from ..core.problems.util import read_instance as Instance
+from ..database import DatabaseManager, IterationWriter, TelemetryRecorder
+from ..utils.instance_cache import InstanceCache
 from ..core.problems import SCP
 from ..core.metrics import Diversidad as dv
 
@@ -23,9 +23,21 @@ class SCPSolver:
     Uses fixed discretization schemes (BCL, MIR) without ML adaptation.
     """
     
-    def __init__(self):
-        """Initialize solver with database connection."""
+    def __init__(self, instance_cache=None, telemetry='json'):
+        """
+        Initialize solver with database connection.
+        
+        Args:
+            instance_cache: InstanceCache shared by the worker's solvers
+                (a private one is created if not given)
+            telemetry: Where iteration data goes: 'json' (datos_iteracion rows),
+                'blob' (one compressed telemetria_ejecucion blob) or 'both'
+        """
         self.db = DatabaseManager()
+        self.telemetry = telemetry
+        # Iteration records are written from a background thread
+        self.writer = IterationWriter(self.db)
+        self.instance_cache = instance_cache if instance_cache is not None else InstanceCache()
         self.workdir = os.path.abspath(os.getcwd())
         self.instance_dir = os.path.join(self.workdir, 'instances')
     
@@ -66,10 +78,11 @@ class SCPSolver:
                 )
                 return False
             
-            # Read instance data
-            instance = Instance.Read(instance_path)
-            coverage_matrix = np.array(instance.get_r())
-            cost_vector = np.array(instance.get_c())
+            # Instance data and repair structures, reused across experiments
+            instance = self.instance_cache.get_scp(instance_path)
+            coverage_matrix = instance['coverage']  # sparse CSR
+            cost_vector = instance['costs']
+            problem.reparador = instance['repair']
             
             # Setup problem parameters
             dim = len(cost_vector)
@@ -99,15 +112,24 @@ class SCPSolver:
             params_problem['bestHistoricalIndividual'] = matrix_cont.copy()
             params_problem['fitnessHistoricalIndividual'] = fitness.copy()
             
+            # Diversities to compute each iteration (paramsML selection and stride)
+            diversity_plan = dv.PlanDiversidades(params_ml)
+            # Column counts of the binary population, updated from the changed columns
+            diversity_tracker = dv.SeguimientoDiversidad()
+            
             # Initial diversity calculation
             max_diversidades = np.zeros(7)
             diversidades, max_diversidades, porcentaje_explor, porcentaje_explot, new_states = \
-                dv.ObtenerDiversidadYEstado(matrix_bin, max_diversidades)
+                dv.ObtenerDiversidadYEstado(
+                    matrix_bin, max_diversidades, diversity_plan.indices(0), seguimiento=diversity_tracker
+                )
             state = new_states[0]
             
+            # Columnar series of the run, stored as one blob at the end
+            telemetry = TelemetryRecorder() if self.telemetry != 'json' else None
+            
             # Start optimization
             inicio = datetime.now()
-            memory = []
             
             for iter in range(max_iter):
                 process_time_start = time.process_time()
@@ -141,7 +163,10 @@ class SCPSolver:
                 
                 # Calculate diversity
                 diversidades, max_diversidades, porcentaje_explor, porcentaje_explot, new_states = \
-                    dv.ObtenerDiversidadYEstado(matrix_bin, max_diversidades)
+                    dv.ObtenerDiversidadYEstado(
+                        matrix_bin, max_diversidades, diversity_plan.indices(iter + 1), diversidades,
+                        seguimiento=diversity_tracker
+                    )
                 
                 best_fitness_str = str(np.min(fitness))
                 
@@ -150,31 +175,37 @@ class SCPSolver:
                 process_time_end = np.round(time.process_time() - process_time_start, 6)
                 
                 # Store iteration data
-                data_iter = {
-                    "id_ejecucion": experiment_id,
-                    "numero_iteracion": iter,
-                    "fitness_mejor": best_fitness_str,
-                    "parametros_iteracion": json.dumps({
-                        "fitness": best_fitness_str,
-                        "clockTime": wall_time_end,
-                        "processTime": process_time_end,
-                        "DS": str(ds_scheme),
-                        "Diversidades": str(diversidades),
-                        "PorcentajeExplor": str(porcentaje_explor),
-                        "numReparaciones": str(num_repairs)
-                    })
-                }
-                
-                memory.append(data_iter)
-                
-                # Insert data every 50 iterations to avoid memory issues
-                if iter % 50 == 0 and iter > 0:
-                    self.db.insert_iteration_data(memory)
-                    memory = []
+                if self.telemetry != 'blob':
+                    data_iter = {
+                        "id_ejecucion": experiment_id,
+                        "numero_iteracion": iter,
+                        "fitness_mejor": best_fitness_str,
+                        "parametros_iteracion": json.dumps({
+                            "fitness": best_fitness_str,
+                            "clockTime": wall_time_end,
+                            "processTime": process_time_end,
+                            "DS": str(ds_scheme),
+                            "Diversidades": str(diversidades),
+                            "PorcentajeExplor": str(porcentaje_explor),
+                            "numReparaciones": str(num_repairs)
+                        })
+                    }
+                    self.writer.put(data_iter)
+                if telemetry is not None:
+                    telemetry.record(
+                        fitness=np.min(fitness),
+                        clock_time=wall_time_end,
+                        process_time=process_time_end,
+                        ds=str(ds_scheme),
+                        diversidades=diversidades,
+                        porcentaje_explor=porcentaje_explor,
+                        num_reparaciones=num_repairs
+                    )
             
-            # Insert remaining iteration data
-            if len(memory) > 0:
-                self.db.insert_iteration_data(memory)
+            # All iteration data must be written before the run is marked finished
+            self.writer.flush()
+            if telemetry is not None:
+                self.db.insert_telemetry(experiment_id, telemetry.arrays())
             
             # Store final results
             fin = datetime.now()
@@ -197,6 +228,8 @@ class SCPSolver:
             print(f'Error executing experiment {experiment_id}: {e}')
             import traceback
             traceback.print_exc()
+            # Drain the queue without raising again; the run is marked 'error' anyway
+            self.writer.flush(check=False)
             self.db.finish_experiment(experiment_id, datetime.now(), 'error')
             return False
     
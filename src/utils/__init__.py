@@ -5,5 +5,6 @@ Helper modules for configuration and common operations.
 """
 
 from .config_manager import ConfigManager
+from .instance_cache import InstanceCache
 
-__all__ = ['ConfigManager']
+__all__ = ['ConfigManager', 'InstanceCache']
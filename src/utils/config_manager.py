@@ -9,6 +9,8 @@ import yaml
 import json
 from typing import Dict, List, Any
 
+from ..core.metrics.Diversidad import IndiceDiversidad
+
 
 class ConfigManager:
     """
@@ -71,6 +73,13 @@ class ConfigManager:
         "softMax-rulette-elitist"
     ]
     
+    # SCP repair strategies (paramsProblem['repairType'])
+    REPAIR_TYPES = {
+        1: "simple",
+        2: "complex",
+        3: "complex + redundant column elimination"
+    }
+    
     @staticmethod
     def load_yaml_config(config_path: str) -> Dict:
         """Load experiment configuration from YAML file."""
@@ -108,6 +117,11 @@ class ConfigManager:
         lb = problem_params.get('lb', -10)
         ub = problem_params.get('ub', 10)
         repair_type = problem_params.get('repair_type', 2)
+        transfer_lut = bool(problem_params.get('transfer_lut', False))
+        if repair_type not in cls.REPAIR_TYPES:
+            raise ValueError(
+                f"Unknown repair_type {repair_type}, expected one of {list(cls.REPAIR_TYPES)}"
+            )
         instance_dir = problem_params.get('instance_dir', 'MSCP/')
         
         # Generate all combinations
@@ -133,6 +147,7 @@ class ConfigManager:
                                         lb=lb,
                                         ub=ub,
                                         repair_type=repair_type,
+                                        transfer_lut=transfer_lut,
                                         instance_dir=instance_dir,
                                         params=params
                                     )
@@ -143,7 +158,8 @@ class ConfigManager:
     @classmethod
     def _create_experiment(cls, problem, instance, mh, ml, ds_name,
                           reward_idx, policy_idx, run, population, max_iter,
-                          fo, lb, ub, repair_type, instance_dir, params):
+                          fo, lb, ub, repair_type, instance_dir, params,
+                          transfer_lut=False):
         """
         Create a single experiment configuration.
         
@@ -159,6 +175,7 @@ class ConfigManager:
             'instance_file': f'{instance}.txt',
             'instance_dir': instance_dir,
             'repairType': repair_type,
+            'transferLUT': transfer_lut,
             'lb': lb,
             'ub': ub
         }
@@ -225,7 +242,8 @@ class ConfigManager:
             return {
                 'discretizationsScheme': cls.DISCRETIZATION_SCHEMES.get(ds_name, []),
                 'FO': fo,
-                'beta_dis': params.get('beta_dis', 0.8)
+                'beta_dis': params.get('beta_dis', 0.8),
+                **cls._get_diversity_params(params)
             }
         
         # Common ML parameters
@@ -237,7 +255,8 @@ class ConfigManager:
             'epsilon': params.get('epsilon', 0.1),
             'statesQ': params.get('states_q', 2),
             'W': params.get('W', 10),
-            'visitarTodosAlmenosUnaVez': params.get('visit_all_once', True)
+            'visitarTodosAlmenosUnaVez': params.get('visit_all_once', True),
+            **cls._get_diversity_params(params)
         }
         
         # QL/SARSA/BQSA specific
@@ -254,3 +273,23 @@ class ConfigManager:
             ml_params['cond_backward'] = params.get('cond_backward', 10)
         
         return ml_params
+    
+    @classmethod
+    def _get_diversity_params(cls, params):
+        """
+        Diversity measures computed by the solvers (see Diversidad.PlanDiversidades).
+        
+        'diversities' lists measure names or indices (default: all 6),
+        'diversity_stride' samples them every N iterations and
+        'state_every_iteration' keeps the ML state measure computed every
+        iteration regardless of the stride.
+        """
+        diversities = params.get('diversities', list(range(6)))
+        stride = params.get('diversity_stride', 1)
+        if not isinstance(stride, int) or stride < 1:
+            raise ValueError(f"diversity_stride must be a positive integer, got {stride!r}")
+        return {
+            'diversidades': [IndiceDiversidad(measure) for measure in diversities],
+            'pasoDiversidades': stride,
+            'estadoCadaIteracion': bool(params.get('state_every_iteration', True))
+        }
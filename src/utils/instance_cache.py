@@ -0,0 +1,85 @@
+"""
+Instance Cache
+
+Per-worker in-memory cache of parsed problem instances.
+
+Consecutive experiments usually share an instance (a YAML grid produces
+many runs per instance), so the worker keeps the most recently used ones
+in memory together with their derived repair structures and hands them
+to the solvers instead of re-reading and rebuilding them per experiment.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from ..core.problems.util import read_instance as Instance
+from ..core.problems.repair import ReparaStrategy as repara
+
+
+class InstanceCache:
+    """
+    Bounded LRU cache of SCP instances.
+
+    Each entry holds the coverage matrix (sparse CSR), the cost vector and
+    the ReparaStrategy built for them. Entries are keyed by instance path;
+    when the cache is full the least recently used entry is dropped.
+    """
+
+    def __init__(self, max_size=4):
+        """
+        Args:
+            max_size: Maximum number of instances kept in memory
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get_scp(self, instance_path):
+        """
+        Get a parsed SCP instance, loading it on a miss.
+
+        Args:
+            instance_path: Full path of the instance file
+
+        Returns:
+            dict: {'coverage': csr_matrix, 'costs': ndarray, 'repair': ReparaStrategy}
+        """
+        if instance_path in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(instance_path)
+            return self._entries[instance_path]
+
+        self.misses += 1
+        instance = Instance.Read(instance_path)
+        coverage = instance.get_r()
+        costs = np.array(instance.get_c())
+        entry = {
+            'coverage': coverage,
+            'costs': costs,
+            'repair': repara.ReparaStrategy(coverage, costs, coverage.shape[0], coverage.shape[1])
+        }
+        self._entries[instance_path] = entry
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        """Return cache counters as a dict."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+    def summary(self):
+        """One-line human readable summary of the counters."""
+        stats = self.stats()
+        return (f"Instance cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate), {stats['size']}/{stats['max_size']} instances")
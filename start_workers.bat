@@ -2,6 +2,7 @@
 REM Script para iniciar 14 workers
 REM Uso: start_workers.bat          (abre 14 terminales)
 REM      start_workers.bat --silent (abre 1 terminal con todos los workers en background)
+REM En Linux/macOS usar en su lugar: python cli/worker.py --continuous --processes 14
 
 setlocal enabledelayedexpansion
 
@@ -0,0 +1,70 @@
+"""
+Parity of the SCP repair backends.
+
+The NumPy and Numba backends must repair the same population, with the same
+seed, into identical feasible solutions with identical repair counts.
+Skipped when Numba is not installed.
+
+Usage:
+    python -m unittest tests.test_repair_parity
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.problems.util import read_instance as Instance
+from src.core.problems.repair import ReparaStrategy as repara
+from src.core.problems.repair import kernels
+
+
+INSTANCE = os.path.join(os.path.dirname(__file__), '..', 'instances', 'MSCP', 'mscp41.txt')
+SEED = 0
+POPULATION = 10
+# Mostly feasible (drop phase) to almost empty (add phase)
+DENSITIES = [0.9, 0.05, 0.005]
+
+
+@unittest.skipUnless(kernels.NUMBA_DISPONIBLE, "Numba is not installed")
+class RepairParityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        instance = Instance.Read(INSTANCE)
+        matrix = instance.get_r()
+        costs = np.array(instance.get_c())
+        rows, cols = matrix.shape
+        cls.cols = cols
+        cls.backends = {
+            backend: repara.ReparaStrategy(matrix, costs, rows, cols, backend=backend)
+            for backend in kernels.BACKENDS
+        }
+
+    def repair(self, backend, population, repair_type):
+        np.random.seed(SEED)
+        strategy = self.backends[backend]
+        coverage, infeasible = strategy.cumplePoblacion(population)
+        return strategy.reparaPoblacion(population.copy(), infeasible, repair_type, coverage)
+
+    def test_backends_agree(self):
+        rng = np.random.default_rng(SEED)
+        for repair_type in (1, 2, 3):
+            for density in DENSITIES:
+                population = (rng.random((POPULATION, self.cols)) < density).astype(np.float64)
+                with self.subTest(repair_type=repair_type, density=density):
+                    solutions, repairs = self.repair('numpy', population, repair_type)
+                    solutions_numba, repairs_numba = self.repair('numba', population, repair_type)
+                    for result in (solutions, solutions_numba):
+                        _, infeasible = self.backends['numpy'].cumplePoblacion(result)
+                        self.assertFalse(np.any(infeasible))
+                    np.testing.assert_array_equal(solutions, solutions_numba)
+                    np.testing.assert_array_equal(repairs, repairs_numba)
+
+
+if __name__ == '__main__':
+    unittest.main()